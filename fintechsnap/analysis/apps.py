@@ -5,6 +5,13 @@ class AnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analysis'
 
+    def ready(self):
+        from django.conf import settings
+
+        if getattr(settings, "FINMENTOR_PRELOAD_INDEX", False):
+            from .index import get_index
+            get_index()
+
 from django.contrib.auth import get_user_model
 from django.db.utils import OperationalError
 
@@ -0,0 +1,102 @@
+# analysis/index.py
+
+import logging
+import threading
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from ml_models.dataset import load_columns
+
+logger = logging.getLogger(__name__)
+
+PERSONA_MAP = {
+    0: "Financially Moderate",
+    1: "Financially Stable",
+    2: "Financially Stressed"
+}
+
+# Features the nearest-neighbour lookup matches on (L1 / Manhattan distance)
+INDEX_COLUMNS = ["monthly_income", "total_emi", "net_balance"]
+
+
+class ProfileIndex:
+    """
+    Manhattan-metric KD-tree over the reference profiles.
+
+    Points are kept as one contiguous float64 matrix; persona and spending
+    labels are stored as arrays aligned with it. With normalize=True every
+    feature is divided by its standard deviation before indexing, so large
+    incomes do not dominate the distance.
+    """
+
+    def __init__(self, points, personas, spending, normalize=False, leaf_size=40):
+        points = np.ascontiguousarray(points, dtype=np.float64)
+
+        self.points = points
+        self.personas = np.asarray(personas, dtype=object)
+        self.spending = np.asarray(spending, dtype=object)
+        self.normalize = normalize
+
+        if normalize:
+            scale = points.std(axis=0)
+            scale[scale == 0] = 1.0
+        else:
+            scale = np.ones(points.shape[1])
+        self.scale = scale
+
+        self.tree = KDTree(points / scale, leaf_size=leaf_size, metric="manhattan")
+
+    def __len__(self):
+        return self.points.shape[0]
+
+    def query(self, queries, k=1):
+        """
+        k nearest reference profiles for every row of `queries`
+        (shape (n, len(INDEX_COLUMNS))). Returns (distances, indices),
+        each of shape (n, k), nearest first. Distances are in the
+        (optionally normalised) index space.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float64))
+        k = min(k, len(self))
+        return self.tree.query(queries / self.scale, k=k)
+
+
+def _decode_personas(column):
+    if np.issubdtype(column.dtype, np.number):
+        return np.array([PERSONA_MAP.get(int(code), "Unknown") for code in column], dtype=object)
+    return column.astype(object)
+
+
+def load_reference():
+    """(points, personas, spending) arrays for the reference dataset."""
+    columns = load_columns(columns=INDEX_COLUMNS + ["persona", "spending_behaviour"])
+    return (
+        np.column_stack([columns[name] for name in INDEX_COLUMNS]).astype(np.float64),
+        _decode_personas(columns["persona"]),
+        columns["spending_behaviour"].astype(object),
+    )
+
+
+_reference = None
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_index(normalize=False):
+    """Process-wide index, built from the reference dataset on first use."""
+    global _reference
+
+    index = _indexes.get(normalize)
+    if index is not None:
+        return index
+
+    with _lock:
+        index = _indexes.get(normalize)
+        if index is None:
+            if _reference is None:
+                _reference = load_reference()
+            index = ProfileIndex(*_reference, normalize=normalize)
+            _indexes[normalize] = index
+            logger.info("Built profile index over %d rows (normalize=%s)", len(index), normalize)
+    return index
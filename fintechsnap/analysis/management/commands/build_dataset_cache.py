@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_models.dataset import build_cache, cache_dir_for, default_source, is_fresh
+
+
+class Command(BaseCommand):
+    help = "Convert the Finmentor workbook into the memory-mappable columnar cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            help="Workbook to convert (default: settings.FINMENTOR_DATASET_PATH).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild even if the cache matches the source hash.",
+        )
+
+    def handle(self, *args, **options):
+        source = options["source"] or default_source()
+        cache_dir = cache_dir_for(source)
+
+        try:
+            fresh = is_fresh(source, cache_dir)
+        except OSError as e:
+            raise CommandError(f"Cannot read {source}: {e}")
+
+        if fresh and not options["force"]:
+            self.stdout.write(f"Cache in {cache_dir} is up to date.")
+            return
+
+        started = time.perf_counter()
+        manifest = build_cache(source, cache_dir)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached {manifest['rows']} rows x {len(manifest['columns'])} columns "
+            f"to {cache_dir} in {time.perf_counter() - started:.2f}s "
+            f"(sha256 {manifest['sha256'][:12]})"
+        ))
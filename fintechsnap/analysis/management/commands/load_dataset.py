@@ -0,0 +1,111 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from analysis.models import FinancialDataset
+from ml_models.dataset import load_columns
+
+# (table column, dataset column) in insert order
+COLUMN_MAP = [
+    ("income", "monthly_income"),
+    ("expense", "total_expense"),
+    ("savings", "current_savings"),
+    ("emi", "total_emi"),
+    ("expense_ratio", "expense_ratio"),
+    ("savings_rate", "savings_rate"),
+    ("emi_ratio", "emi_ratio"),
+    ("persona", "persona"),
+]
+
+# Older exports have no current_savings column; fall back to net balance
+FALLBACKS = {"current_savings": "net_balance"}
+
+
+class Command(BaseCommand):
+    help = "Bulk-load the reference dataset into the financial_dataset table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            help="Workbook to load (default: settings.FINMENTOR_DATASET_PATH).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows written per executemany / COPY batch.",
+        )
+        parser.add_argument(
+            "--append",
+            action="store_true",
+            help="Keep existing rows instead of replacing the table contents.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be positive.")
+
+        columns = self._read_columns(options["source"])
+        total = len(columns[0])
+
+        table = connection.ops.quote_name(FinancialDataset._meta.db_table)
+        names = [name for name, _ in COLUMN_MAP]
+        write_chunk = self._copy_chunk if connection.vendor == "postgresql" else self._insert_chunk
+
+        started = time.perf_counter()
+        written = 0
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not options["append"]:
+                cursor.execute(f"DELETE FROM {table}")
+
+            for start in range(0, total, chunk_size):
+                chunk = [column[start:start + chunk_size].tolist() for column in columns]
+                write_chunk(cursor, table, names, chunk)
+                written += len(chunk[0])
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"  {written}/{total} rows ({written / elapsed:,.0f} rows/s)"
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {written} rows into {FinancialDataset._meta.db_table} in "
+            f"{elapsed:.2f}s ({written / elapsed if elapsed else written:,.0f} rows/s)"
+        ))
+
+    def _read_columns(self, source):
+        data = load_columns(source)
+
+        columns = []
+        for _, name in COLUMN_MAP:
+            if name not in data and name in FALLBACKS:
+                name = FALLBACKS[name]
+            if name not in data:
+                raise CommandError(f"Dataset has no '{name}' column.")
+
+            # Memory-mapped; rows are converted one chunk at a time
+            columns.append(data[name])
+        return columns
+
+    def _insert_chunk(self, cursor, table, names, chunk):
+        placeholders = ", ".join(["%s"] * len(names))
+        quoted = ", ".join(connection.ops.quote_name(n) for n in names)
+        cursor.executemany(
+            f"INSERT INTO {table} ({quoted}) VALUES ({placeholders})",
+            list(zip(*chunk)),
+        )
+
+    def _copy_chunk(self, cursor, table, names, chunk):
+        buffer = io.StringIO()
+        for row in zip(*chunk):
+            buffer.write("\t".join(str(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        quoted = ", ".join(connection.ops.quote_name(n) for n in names)
+        cursor.cursor.copy_expert(f"COPY {table} ({quoted}) FROM STDIN", buffer)
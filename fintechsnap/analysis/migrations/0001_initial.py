@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialDataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('income', models.FloatField()),
+                ('expense', models.FloatField()),
+                ('savings', models.FloatField()),
+                ('emi', models.FloatField()),
+                ('expense_ratio', models.FloatField()),
+                ('savings_rate', models.FloatField()),
+                ('emi_ratio', models.FloatField()),
+                ('persona', models.CharField(max_length=50)),
+            ],
+            options={
+                'db_table': 'financial_dataset',
+            },
+        ),
+    ]
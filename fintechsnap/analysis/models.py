@@ -1,3 +1,20 @@
 from django.db import models
 
-# Create your models here.
+
+class FinancialDataset(models.Model):
+    """Reference profiles loaded by `manage.py load_dataset`."""
+
+    income = models.FloatField()
+    expense = models.FloatField()
+    savings = models.FloatField()
+    emi = models.FloatField()
+    expense_ratio = models.FloatField()
+    savings_rate = models.FloatField()
+    emi_ratio = models.FloatField()
+    persona = models.CharField(max_length=50)
+
+    class Meta:
+        db_table = "financial_dataset"
+
+    def __str__(self):
+        return f"{self.persona} ({self.income})"
@@ -1,3 +1,28 @@
 from django.test import TestCase
 
-# Create your tests here.
+
+class AnalyzeFinancesTests(TestCase):
+    url = "/analysis/analyze/"
+
+    def test_returns_the_nearest_profile(self):
+        response = self.client.get(
+            self.url, {"monthly_income": 50000, "total_emi": 5000, "net_balance": 10000, "k": 3},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["matches"]), 3)
+
+    def test_rejects_non_numeric_input(self):
+        response = self.client.get(self.url, {"monthly_income": "lots"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid input data."})
+
+    def test_rejects_amounts_that_are_not_finite(self):
+        for field in ("monthly_income", "total_emi", "net_balance"):
+            for value in ("nan", "inf", "-inf"):
+                with self.subTest(field=field, value=value):
+                    response = self.client.get(self.url, {field: value})
+
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {"error": "Invalid input data."})
@@ -1,35 +1,50 @@
-from django.http import JsonResponse
-import pandas as pd
-
-PERSONA_MAP = {
-    0: "Financially Moderate",
-    1: "Financially Stable",
-    2: "Financially Stressed"
-}
-
-def analyze_finances(request):
-    income = float(request.GET.get("monthly_income", 0) or 0)
-    total_emi = float(request.GET.get("total_emi", 0) or 0)
-    net_balance = float(request.GET.get("net_balance", 0) or 0)
+import math
 
-    df = pd.read_excel(r"D:\riya\Finmentor_Data_TRANSFORMED_FINAL.xlsx")
-
-    df["distance"] = (
-        (df["monthly_income"] - income).abs() +
-        (df["total_emi"] - total_emi).abs() +
-        (df["net_balance"] - net_balance).abs()
-    )
+from django.http import JsonResponse
 
-    row = df.sort_values("distance").iloc[0]
+from .index import get_index
 
-    # ✅ decode persona
-    persona_code = int(row["persona"])
-    persona_label = PERSONA_MAP.get(persona_code, "Unknown")
+MAX_NEIGHBOURS = 50
 
-    # ✅ spending behaviour already text
-    spending_label = str(row["spending_behaviour"])
 
-    return JsonResponse({
-        "spending_behaviour": spending_label,
-        "persona": persona_label
-    })
+def analyze_finances(request):
+    try:
+        income = float(request.GET.get("monthly_income", 0) or 0)
+        total_emi = float(request.GET.get("total_emi", 0) or 0)
+        net_balance = float(request.GET.get("net_balance", 0) or 0)
+        k = int(request.GET.get("k", 1) or 1)
+    except ValueError:
+        return JsonResponse({"error": "Invalid input data."}, status=400)
+
+    # float() accepts "nan" and "inf", which the index cannot search for
+    if not all(math.isfinite(value) for value in (income, total_emi, net_balance)):
+        return JsonResponse({"error": "Invalid input data."}, status=400)
+
+    k = max(1, min(k, MAX_NEIGHBOURS))
+    normalize = request.GET.get("normalize", "").lower() in ("1", "true", "yes")
+
+    # Nearest reference profile(s) by Manhattan distance
+    index = get_index(normalize=normalize)
+    distances, rows = index.query([[income, total_emi, net_balance]], k=k)
+    distances, rows = distances[0], rows[0]
+
+    nearest = rows[0]
+    response = {
+        "spending_behaviour": index.spending[nearest],
+        "persona": index.personas[nearest],
+    }
+
+    if k > 1:
+        response["matches"] = [
+            {
+                "monthly_income": float(index.points[row, 0]),
+                "total_emi": float(index.points[row, 1]),
+                "net_balance": float(index.points[row, 2]),
+                "spending_behaviour": index.spending[row],
+                "persona": index.personas[row],
+                "distance": round(float(distance), 4),
+            }
+            for distance, row in zip(distances, rows)
+        ]
+
+    return JsonResponse(response)
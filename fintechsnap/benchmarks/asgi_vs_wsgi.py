@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Read-page throughput of the WSGI and ASGI deployment profiles.
+
+Starts gunicorn with deploy/gunicorn_wsgi.py (gthread workers, sync views)
+and then deploy/gunicorn_asgi.py (uvicorn workers, financeapp.async_views)
+against the configured database, and drives the dashboard, spending,
+savings, loans and action-plan pages with an increasing number of
+concurrent logged-in readers.
+
+    python benchmarks/asgi_vs_wsgi.py --workers 1 --concurrency 1 16 64 256
+
+Run it with the database the deployment uses (DATABASE_URL); SQLite
+serialises far more than PostgreSQL does.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "benchmarks"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fintechsnap.settings")
+
+from client import run_load  # noqa: E402
+from servers import PROFILES, serve  # noqa: E402
+
+READ_PATHS = ["/dashboard/", "/spending/", "/savings/", "/loans-emi/", "/action-plan/"]
+
+
+def session_cookie(username="bench-reader"):
+    """Create (or reuse) a reader with a finance record, goals and categories."""
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from financeapp.models import ExpenseCategory, FinanceRecord, SavingsGoal
+
+    user, _ = User.objects.get_or_create(username=username)
+    if not FinanceRecord.objects.filter(user=user).exists():
+        FinanceRecord.objects.create(
+            user=user, income=80000, expenses=42000, net_balance=38000,
+            savings_rate=47.5, fixed_obligations=6000, score=72,
+            persona="Financially Stable", spending_behaviour="Moderate",
+            savings_behaviour="Good Saver", emi_status="Normal EMI",
+        )
+        for name, amount, kind in [
+            ("Rent", 18000, "Essential"), ("Groceries", 8000, "Essential"),
+            ("Transport", 4000, "Essential"), ("Dining Out", 5000, "Discretionary"),
+            ("Shopping", 7000, "Discretionary"),
+        ]:
+            ExpenseCategory.objects.create(user=user, name=name, amount=amount, type=kind)
+        for name, target in [("Emergency fund", 240000), ("Holiday", 90000)]:
+            SavingsGoal.objects.create(
+                user=user, name=name, target_amount=target, allocation_percent=50
+            )
+
+    client = Client()
+    client.force_login(user)
+    return {settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value}
+
+
+def bench_profile(profile, port, workers, levels, duration, cookies):
+    with serve(profile, port, workers):
+        # One warm-up pass so lazy imports and connections are in place
+        asyncio.run(run_load("127.0.0.1", port, READ_PATHS, 4, 1.0, cookies))
+
+        results = []
+        for concurrency in levels:
+            result = asyncio.run(
+                run_load("127.0.0.1", port, READ_PATHS, concurrency, duration, cookies)
+            )
+            print(f"{profile:>5} c={concurrency:<5} {result['rps']:>8.1f} req/s  "
+                  f"p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+                  f"p99 {result['p99_ms']:>8.2f}ms  errors {result['errors']}", flush=True)
+            results.append(result)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers per profile.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    cookies = session_cookie()
+
+    report = {"workers": args.workers, "duration": args.duration, "paths": READ_PATHS}
+    for profile in args.profiles:
+        report[profile] = bench_profile(
+            profile, args.port, args.workers, args.concurrency, args.duration, cookies
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/client.py
+#
+# Minimal asyncio HTTP/1.1 client for the load benchmarks: one keep-alive
+# connection per virtual user, so thousands of concurrent users cost a
+# socket each rather than a thread each. Standard library only.
+
+import asyncio
+import time
+
+import numpy as np
+
+
+class Connection:
+    def __init__(self, host, port, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies = {}
+        self._reader = None
+        self._writer = None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        """Returns (status, headers, body); cookies are kept per connection."""
+        for attempt in range(2):
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await asyncio.wait_for(
+                    self._exchange(method, path, body, headers or {}), self.timeout
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Server closed an idle keep-alive connection; retry once
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _exchange(self, method, path, body, headers):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+        await self._writer.drain()
+
+        head = await self._reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        for line in header_lines:
+            if not line:
+                continue
+            name, _, value = line.partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "set-cookie":
+                key, _, rest = value.partition("=")
+                self.cookies[key] = rest.split(";", 1)[0]
+            response_headers[name] = value
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).strip(), 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            payload = b"".join(chunks)
+        else:
+            payload = await self._reader.readexactly(int(response_headers.get("content-length", 0)))
+
+        if response_headers.get("connection") == "close":
+            await self.close()
+
+        return status, response_headers, payload
+
+
+def percentiles(latencies_ms):
+    if not latencies_ms:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(max(latencies_ms)), 2),
+    }
+
+
+async def run_load(host, port, paths, concurrency, duration, cookies=None):
+    """
+    `concurrency` users request `paths` round-robin for `duration` seconds,
+    each on its own keep-alive connection. Returns throughput, latency
+    percentiles and error counts (non-2xx/3xx statuses and exceptions).
+    """
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def user(offset):
+        nonlocal errors
+        connection = Connection(host, port)
+        connection.cookies.update(cookies or {})
+        i = offset
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    status, _, _ = await connection.request("GET", paths[i % len(paths)])
+                    if status >= 400:
+                        errors += 1
+                except (OSError, asyncio.TimeoutError, ValueError):
+                    errors += 1
+                    await connection.close()
+                latencies.append((time.perf_counter() - started) * 1000)
+                i += 1
+        finally:
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        **percentiles(latencies),
+    }
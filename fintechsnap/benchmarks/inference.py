@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+Inference micro-benchmarks for the persona models in ml_models/.
+
+Every case runs over batches of 1, 10, 1k and 100k rows resampled from the
+training dataset and reports per-call p50/p95/p99 latency and rows/s:
+
+    scaler.transform    StandardScaler.transform
+    svm.predict         the served SVM (FINMENTOR_SVM_ENGINE artifact)
+    hmm.predict_rows    per-row state decode used for scoring
+    hmm.predict         hmmlearn's own predict (Viterbi over the batch)
+    crf.tag_rows        feature dicts + the reused pycrfsuite tagger
+    ensemble.vote       predict_personas: scale, three models, vote, score
+
+Results are written as JSON; with a baseline file, every case/batch whose
+metric got worse by more than --threshold is reported and the exit status
+is 1.
+
+    python benchmarks/inference.py --output results.json \\
+        --baseline benchmarks/baselines/inference.json --threshold 0.25
+    python benchmarks/inference.py --update-baseline
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from ml_models.crf.predict import feature_dicts, tag_rows  # noqa: E402
+from ml_models.ensemble import predict_personas  # noqa: E402
+from ml_models.features import scale_features  # noqa: E402
+from ml_models.hmm.predict import predict_rows  # noqa: E402
+from ml_models.manager import MODEL_DIR, ModelRegistry  # noqa: E402
+
+BATCH_SIZES = [1, 10, 1_000, 100_000]
+DEFAULT_BASELINE = BASE_DIR / "benchmarks" / "baselines" / "inference.json"
+
+# Compared against the baseline: lower is better for latencies
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def sample_rows(n, seed=0):
+    from ml_models.svm.train import load_training_data
+
+    X, _, _, _ = load_training_data()
+    rng = np.random.default_rng(seed)
+    return X[rng.integers(0, X.shape[0], n)]
+
+
+def build_cases(models):
+    scaler, svm_model, hmm_model, crf_model = models
+
+    return {
+        "scaler.transform": (False, lambda X: scaler.transform(X)),
+        "svm.predict": (True, lambda X: svm_model.predict(X)),
+        "hmm.predict_rows": (True, lambda X: predict_rows(hmm_model, X)),
+        "hmm.predict": (True, lambda X: hmm_model.predict(X)),
+        "crf.tag_rows": (True, lambda X: tag_rows(crf_model, feature_dicts(X))),
+        "ensemble.vote": (False, lambda X: predict_personas(X, models=models, timeout=math.inf)),
+    }
+
+
+def time_case(fn, X, budget, min_calls=3, max_calls=1000):
+    """Call fn(X) until `budget` seconds or max_calls; per-call latencies in ms."""
+    fn(X)  # warm-up
+
+    timings = []
+    deadline = time.perf_counter() + budget
+    while len(timings) < max_calls and (len(timings) < min_calls or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn(X)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {
+        "calls": len(timings),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "rows_per_s": round(X.shape[0] / (float(np.mean(timings)) / 1000), 1),
+    }
+
+
+def run(models, batch_sizes, budget, cases=None):
+    X_raw = sample_rows(max(batch_sizes))
+    X_scaled = scale_features(X_raw, models[0])
+
+    results = {}
+    for name, (scaled, fn) in build_cases(models).items():
+        if cases and name not in cases:
+            continue
+        results[name] = {}
+        for size in batch_sizes:
+            X = (X_scaled if scaled else X_raw)[:size]
+            results[name][str(size)] = stats = time_case(fn, X, budget)
+            print(f"{name:>17} n={size:<7} p50 {stats['p50_ms']:>10.3f}ms  "
+                  f"p95 {stats['p95_ms']:>10.3f}ms  p99 {stats['p99_ms']:>10.3f}ms  "
+                  f"{stats['rows_per_s']:>14,.0f} rows/s", flush=True)
+    return results
+
+
+def environment():
+    import hmmlearn
+    import pycrfsuite
+    import sklearn
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scikit-learn": sklearn.__version__,
+        "hmmlearn": hmmlearn.__version__,
+        "python-crfsuite": getattr(pycrfsuite, "__version__", "unknown"),
+    }
+
+
+def compare(results, baseline, threshold, metric):
+    """Case/batch pairs whose metric grew by more than `threshold` (a fraction)."""
+    regressions = []
+    for name, sizes in results.items():
+        for size, stats in sizes.items():
+            before = baseline.get(name, {}).get(size)
+            if not before or not before.get(metric):
+                continue
+            change = stats[metric] / before[metric] - 1
+            if change > threshold:
+                regressions.append({
+                    "case": name,
+                    "batch": int(size),
+                    "metric": metric,
+                    "baseline": before[metric],
+                    "current": stats[metric],
+                    "change": round(change, 3),
+                })
+    return regressions
+
+
+def _display_path(path):
+    path = Path(path).resolve()
+    return str(path.relative_to(BASE_DIR)) if path.is_relative_to(BASE_DIR) else str(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model-dir", default=str(MODEL_DIR),
+                        help="Artifacts to benchmark (default: ml_models/).")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--cases", nargs="+", help="Only run these cases.")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Seconds spent per case and batch size (at least 3 calls).")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown before a case counts as a regression.")
+    parser.add_argument("--metric", choices=METRICS, default="p50_ms")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store this run as the new baseline instead of comparing.")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.model_dir)
+    models = registry.get_many("scaler", "svm", "hmm", "crf")
+
+    report = {
+        "environment": environment(),
+        "model_dir": _display_path(args.model_dir),
+        "results": run(models, args.batch_sizes, args.budget, args.cases),
+    }
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline written to {baseline_path}")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        report["comparison"] = {
+            "baseline": _display_path(baseline_path),
+            "metric": args.metric,
+            "threshold": args.threshold,
+            "regressions": compare(report["results"], baseline["results"],
+                                   args.threshold, args.metric),
+        }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    regressions = report.get("comparison", {}).get("regressions", [])
+    for r in regressions:
+        print(f"REGRESSION {r['case']} n={r['batch']}: {r['metric']} "
+              f"{r['baseline']} -> {r['current']} (+{r['change']:.0%})")
+    if "comparison" in report and not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} ({args.metric}).")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Latest-row lookup time as per-user history grows.
+
+Builds a throwaway test database (the configured engine: in-memory SQLite
+by default, a test_ database on PostgreSQL with DATABASE_URL), then grows
+one user's ExpenseCategory and SavingsGoal history and the FinanceRecord
+table (one record per user, so it grows across users) step by step. At
+every step it times:
+
+    record.latest_for     FinanceRecord.objects.latest_for(user)
+    category.latest_for   ExpenseCategory.objects.latest_for(user)
+    goal.latest_for       SavingsGoal.objects.latest_for(user)
+    category.unindexed    newest-by-amount category: same filter, but an
+                          order no index covers, so the user's rows are
+                          sorted on every call (the control)
+
+The latest_for lookups seek the (user, -created_at) indexes and stay flat;
+the control grows with the history.
+
+    python benchmarks/latest_record.py --sizes 1 10 100 1000 5000 --explain
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fintechsnap.settings")
+
+SIZES = [1, 10, 100, 1_000, 5_000]
+
+
+def lookups(user):
+    from financeapp.models import ExpenseCategory, FinanceRecord, SavingsGoal
+
+    return {
+        "record.latest_for": lambda: FinanceRecord.objects.latest_for(user),
+        "category.latest_for": lambda: ExpenseCategory.objects.latest_for(user),
+        "goal.latest_for": lambda: SavingsGoal.objects.latest_for(user),
+        "category.unindexed": lambda: ExpenseCategory.objects.filter(user=user).order_by("-amount").first(),
+    }
+
+
+def plans(user):
+    from financeapp.models import ExpenseCategory, FinanceRecord, SavingsGoal
+
+    return {
+        "record.latest_for": FinanceRecord.objects.for_user(user)[:1].explain(),
+        "category.latest_for": ExpenseCategory.objects.for_user(user)[:1].explain(),
+        "goal.latest_for": SavingsGoal.objects.for_user(user)[:1].explain(),
+        "category.unindexed": ExpenseCategory.objects.filter(user=user).order_by("-amount")[:1].explain(),
+    }
+
+
+def grow(user, size, batch=1_000):
+    """Bring the user's history and the FinanceRecord table up to `size` rows."""
+    from django.contrib.auth.models import User
+
+    from financeapp.models import ExpenseCategory, FinanceRecord, SavingsGoal
+
+    have = ExpenseCategory.objects.filter(user=user).count()
+    ExpenseCategory.objects.bulk_create(
+        (ExpenseCategory(user=user, name=f"Category {i}", amount=i % 997, type="Essential")
+         for i in range(have, size)),
+        batch_size=batch,
+    )
+    SavingsGoal.objects.bulk_create(
+        (SavingsGoal(user=user, name=f"Goal {i}", target_amount=1000 + i) for i in range(have, size)),
+        batch_size=batch,
+    )
+
+    others = FinanceRecord.objects.count()
+    users = User.objects.bulk_create(
+        (User(username=f"bench-latest-{i}") for i in range(others, size)), batch_size=batch,
+    )
+    FinanceRecord.objects.bulk_create(
+        (FinanceRecord(user=u, income=80000, expenses=40000, net_balance=40000,
+                       savings_rate=50.0, score=70) for u in users),
+        batch_size=batch,
+    )
+
+
+def time_lookup(fn, calls):
+    fn()  # warm-up
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+    return {
+        "p50_us": round(timings[len(timings) // 2], 1),
+        "p95_us": round(timings[int(len(timings) * 0.95)], 1),
+    }
+
+
+def run(sizes, calls, explain):
+    from django.contrib.auth.models import User
+
+    user = User.objects.create(username="bench-latest-owner")
+
+    results = {}
+    for size in sizes:
+        grow(user, size)
+        results[str(size)] = step = {
+            name: time_lookup(fn, calls) for name, fn in lookups(user).items()
+        }
+        print(f"history {size:>6}  " + "  ".join(
+            f"{name} {stats['p50_us']:>7.1f}us" for name, stats in step.items()
+        ), flush=True)
+
+    if explain:
+        for name, plan in plans(user).items():
+            print(f"\n{name}:\n{plan}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--calls", type=int, default=500, help="Timed calls per lookup and size.")
+    parser.add_argument("--explain", action="store_true", help="Print the query plans at the largest size.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        results = run(sorted(args.sizes), args.calls, args.explain)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "vendor": connection.vendor,
+            "calls": args.calls,
+            "results": results,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+"""
+End-to-end load test of the real user flow against a local server.
+
+A synthetic population of users registers (form + e-mailed OTP), logs in
+and submits a first profile; then every user loops over a weighted mix of
+POST /compute/ and the read pages for --duration seconds. The report has,
+per URL: requests/s, p50/p95/p99 latency, mean SQL queries and error rate.
+
+    # start gunicorn (deploy/gunicorn_wsgi.py) with 1 worker, read-heavy mix
+    python benchmarks/loadtest.py --start wsgi --users 50 --scenario read-heavy
+
+    # against a server that is already running, write-heavy mix
+    python benchmarks/loadtest.py --url 127.0.0.1:8000 --scenario write-heavy
+
+Query counts come from the Server-Timing header, so the server must run
+with FINMENTOR_SERVER_TIMING=true (--start sets it). The OTP is read from the pending session in the
+database, so the harness must use the same database as the server (SQLite
+or a local PostgreSQL via DATABASE_URL). Each run is saved as JSON under
+benchmarks/results/; --compare prints the change against an earlier run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "benchmarks"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fintechsnap.settings")
+
+from client import Connection, percentiles  # noqa: E402
+from servers import PROFILES, serve  # noqa: E402
+
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+# Relative weights of the steps in the main loop
+SCENARIOS = {
+    "read-heavy": {
+        "compute": 1, "dashboard": 8, "spending": 4, "savings": 4, "action_plan": 3,
+    },
+    "write-heavy": {
+        "compute": 6, "dashboard": 2, "spending": 1, "savings": 1, "action_plan": 1,
+    },
+}
+
+READ_PAGES = {
+    "dashboard": "/dashboard/",
+    "spending": "/spending/",
+    "savings": "/savings/",
+    "action_plan": "/action-plan/",
+}
+
+EXPENSE_FIELDS = [
+    "rent", "groceries", "transport", "utilities", "healthcare",
+    "education", "dining_out", "shopping", "entertainment",
+]
+
+
+# ---------------- SYNTHETIC POPULATION ----------------
+def population(n, seed):
+    """One (income, fixed, expense-share vector) profile per user."""
+    rng = np.random.default_rng(seed)
+    income = np.round(rng.lognormal(np.log(60_000), 0.5, n), -2)
+    fixed = np.round(income * rng.uniform(0.0, 0.5, n), -2)
+    spend = income * rng.uniform(0.3, 1.1, n)
+    shares = rng.dirichlet(np.ones(len(EXPENSE_FIELDS)), n)
+    return [
+        {"income": float(income[i]), "fixed": float(fixed[i]), "spend": float(spend[i]),
+         "shares": shares[i]}
+        for i in range(n)
+    ]
+
+
+def compute_form(profile, rng):
+    # Each submission drifts a little, like a user updating their numbers
+    drift = rng.uniform(0.9, 1.1)
+    data = {"income": round(profile["income"] * drift), "fixed": round(profile["fixed"])}
+    for field, share in zip(EXPENSE_FIELDS, profile["shares"]):
+        data[field] = round(profile["spend"] * share * drift)
+    return data
+
+
+# ---------------- RECORDING ----------------
+def db_queries(server_timing):
+    """Query count from a 'db;dur=..;desc="N queries"' Server-Timing entry."""
+    if not server_timing:
+        return None
+    for entry in server_timing.split(","):
+        name, _, params = entry.strip().partition(";")
+        if name == "db":
+            desc = params.partition('desc="')[2]
+            return int(desc.split()[0]) if desc else None
+    return 0  # timed, but no SQL ran
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, name, started, ok, headers=None):
+        self.latencies[name].append((time.perf_counter() - started) * 1000)
+        if not ok:
+            self.errors[name] += 1
+        queries = db_queries(headers.get("server-timing", "") if headers else "")
+        if queries is not None:
+            self.queries[name].append(queries)
+
+    def report(self, elapsed):
+        urls = {}
+        for name, latencies in sorted(self.latencies.items()):
+            count = len(latencies)
+            urls[name] = {
+                "requests": count,
+                "rps": round(count / elapsed, 2) if elapsed else None,
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / count, 4),
+                "db_queries_mean": (
+                    round(float(np.mean(self.queries[name])), 2) if self.queries[name] else None
+                ),
+                **percentiles(latencies),
+            }
+        return urls
+
+
+async def step(recorder, connection, name, method, path, form=None, expect=(200,), location=None):
+    """One request; a wrong status or redirect target counts as an error."""
+    body = None
+    headers = {}
+    if form is not None:
+        form = dict(form, csrfmiddlewaretoken=connection.cookies.get("csrftoken", ""))
+        body = urlencode(form).encode()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+    started = time.perf_counter()
+    try:
+        status, response_headers, _ = await connection.request(method, path, body, headers)
+    except (OSError, asyncio.TimeoutError, ValueError):
+        recorder.add(name, started, False)
+        await connection.close()
+        return None
+
+    ok = status in expect and (
+        location is None or response_headers.get("location", "").rstrip("/").endswith(location.rstrip("/"))
+    )
+    recorder.add(name, started, ok, response_headers)
+    return response_headers if ok else None
+
+
+# ---------------- USER FLOW ----------------
+def pending_otp(session_key):
+    from django.contrib.sessions.backends.db import SessionStore
+
+    pending = SessionStore(session_key=session_key).get("pending_registration") or {}
+    return pending.get("otp")
+
+
+async def sign_up(recorder, connection, username, password):
+    await step(recorder, connection, "GET /accounts/register/", "GET", "/accounts/register/")
+    ok = await step(
+        recorder, connection, "POST /accounts/register/", "POST", "/accounts/register/",
+        form={"username": username, "email": f"{username}@loadtest.local",
+              "password1": password, "password2": password},
+        expect=(302,), location="/accounts/verify-otp/",
+    )
+    if ok is None:
+        return False
+
+    from asgiref.sync import sync_to_async
+
+    otp = await sync_to_async(pending_otp)(connection.cookies.get("sessionid"))
+    ok = await step(
+        recorder, connection, "POST /accounts/verify-otp/", "POST", "/accounts/verify-otp/",
+        form={"otp": otp or ""}, expect=(302,), location="/accounts/login/",
+    )
+    if ok is None:
+        return False
+
+    await step(recorder, connection, "GET /accounts/login/", "GET", "/accounts/login/")
+    ok = await step(
+        recorder, connection, "POST /accounts/login/", "POST", "/accounts/login/",
+        form={"username": username, "password": password},
+        expect=(302,), location="/dashboard/",
+    )
+    return ok is not None
+
+
+async def compute(recorder, connection, profile, rng):
+    return await step(
+        recorder, connection, "POST /compute/", "POST", "/compute/",
+        form=compute_form(profile, rng), expect=(302,), location="/dashboard/",
+    )
+
+
+async def virtual_user(index, profile, args, run_id, recorders, signup_slots, ready, start):
+    recorder, setup_recorder = recorders
+    rng = np.random.default_rng(args.seed + index)
+    connection = Connection(args.host, args.port)
+    username = f"lt-{run_id}-{index}"
+
+    async with signup_slots:
+        signed_up = await sign_up(setup_recorder, connection, username, f"Lt!{uuid.uuid4().hex}")
+        if signed_up:
+            await compute(setup_recorder, connection, profile, rng)
+    ready.set_result(signed_up)
+
+    await start.wait()
+    if not signed_up:
+        await connection.close()
+        return
+
+    weights = SCENARIOS[args.scenario]
+    names = list(weights)
+    p = np.array([weights[n] for n in names], dtype=float)
+    p /= p.sum()
+
+    deadline = time.perf_counter() + args.duration
+    try:
+        while time.perf_counter() < deadline:
+            name = names[rng.choice(len(names), p=p)]
+            if name == "compute":
+                await compute(recorder, connection, profile, rng)
+            else:
+                path = READ_PAGES[name]
+                await step(recorder, connection, f"GET {path}", "GET", path)
+            if args.think_ms:
+                await asyncio.sleep(rng.exponential(args.think_ms / 1000))
+    finally:
+        await connection.close()
+
+
+async def run(args, run_id):
+    profiles = population(args.users, args.seed)
+    recorders = (Recorder(), Recorder())
+    loop = asyncio.get_running_loop()
+
+    # Sign-up is throttled (password hashing dominates it) and kept out of
+    # the measured phase: every user waits for `start`
+    signup_slots = asyncio.Semaphore(args.signup_concurrency)
+    readies = [loop.create_future() for _ in profiles]
+    start = asyncio.Event()
+
+    setup_started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(virtual_user(
+            i, profile, args, run_id, recorders, signup_slots, readies[i], start
+        ))
+        for i, profile in enumerate(profiles)
+    ]
+    signed_up = sum(await asyncio.gather(*readies))
+    setup_elapsed = time.perf_counter() - setup_started
+
+    started = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    recorder, setup_recorder = recorders
+    total = sum(len(v) for v in recorder.latencies.values())
+    errors = sum(recorder.errors.values())
+    return {
+        "setup": {
+            "seconds": round(setup_elapsed, 2),
+            "signed_up": signed_up,
+            "urls": setup_recorder.report(setup_elapsed),
+        },
+        "seconds": round(elapsed, 2),
+        "requests": total,
+        "rps": round(total / elapsed, 2),
+        "error_rate": round(errors / total, 4) if total else None,
+        "urls": recorder.report(elapsed),
+    }
+
+
+def cleanup(run_id):
+    from django.contrib.auth.models import User
+
+    deleted, _ = User.objects.filter(username__startswith=f"lt-{run_id}-").delete()
+    return deleted
+
+
+def print_report(result, previous=None):
+    setup = result["setup"]
+    print(f"Signed up {setup['signed_up']}/{result['users']} users in {setup['seconds']}s")
+    print(f"\n{result['requests']} requests in {result['seconds']}s: "
+          f"{result['rps']} req/s, error rate {result['error_rate']:.2%}")
+    print(f"{'url':<28} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'errors':>7}")
+    for name, stats in result["urls"].items():
+        queries = "-" if stats["db_queries_mean"] is None else f"{stats['db_queries_mean']:.1f}"
+        line = (f"{name:<28} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f}ms {stats['p95_ms']:>8.1f}ms "
+                f"{stats['p99_ms']:>8.1f}ms {queries:>8} {stats['error_rate']:>7.2%}")
+        before = (previous or {}).get("urls", {}).get(name)
+        if before:
+            line += f"   (p95 {before['p95_ms']:.1f}ms, {before['rps']:.1f} req/s before)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="127.0.0.1:8000", help="host:port of a running server.")
+    target.add_argument("--start", choices=list(PROFILES),
+                        help="Start gunicorn with this deploy/ profile for the run.")
+    parser.add_argument("--workers", type=int, default=1, help="Workers for --start.")
+    parser.add_argument("--port", type=int, default=8766, help="Port for --start.")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent synthetic users.")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), default="read-heavy")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of the main phase.")
+    parser.add_argument("--think-ms", type=float, default=0.0,
+                        help="Mean think time between a user's requests.")
+    parser.add_argument("--signup-concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<run>.json).")
+    parser.add_argument("--compare", help="Earlier result file to compare against.")
+    parser.add_argument("--keep-users", action="store_true",
+                        help="Leave the synthetic users in the database.")
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+
+    run_id = uuid.uuid4().hex[:8]
+    if args.start:
+        args.host = "127.0.0.1"
+    else:
+        args.host, _, port = args.url.partition(":")
+        args.port = int(port or 80)
+
+    try:
+        if args.start:
+            env = {"FINMENTOR_SERVER_TIMING": "true"}
+            with serve(args.start, args.port, args.workers, env):
+                result = asyncio.run(run(args, run_id))
+        else:
+            result = asyncio.run(run(args, run_id))
+    finally:
+        if not args.keep_users:
+            cleanup(run_id)
+
+    report = {
+        "run": run_id,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": args.start or args.url,
+        "workers": args.workers if args.start else None,
+        "scenario": args.scenario,
+        "weights": SCENARIOS[args.scenario],
+        "users": args.users,
+        "duration": args.duration,
+        "think_ms": args.think_ms,
+        **result,
+    }
+
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(report, previous)
+
+    output = Path(args.output or RESULTS_DIR / f"{report['timestamp'][:19].replace(':', '')}-{args.scenario}-{run_id}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved to {output}")
+
+
+if __name__ == "__main__":
+    main()
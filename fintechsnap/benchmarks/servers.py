@@ -0,0 +1,55 @@
+# benchmarks/servers.py
+#
+# Start a local gunicorn with one of the deploy/ profiles for a benchmark
+# run and stop it afterwards.
+
+import asyncio
+import contextlib
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from client import Connection
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    "wsgi": ("deploy/gunicorn_wsgi.py", "fintechsnap.wsgi"),
+    "asgi": ("deploy/gunicorn_asgi.py", "fintechsnap.asgi"),
+}
+
+
+async def wait_until_up(server, port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and server.poll() is None:
+        connection = Connection("127.0.0.1", port, timeout=5)
+        try:
+            await connection.request("GET", "/about/")
+            return
+        except OSError:
+            await asyncio.sleep(0.25)
+        finally:
+            await connection.close()
+    raise RuntimeError(f"Server on port {port} did not come up")
+
+
+@contextlib.contextmanager
+def serve(profile, port, workers=1, env=None):
+    """Run gunicorn with deploy/gunicorn_<profile>.py until the block exits."""
+    config, app = PROFILES[profile]
+    server_env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), **(env or {}))
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", config, app, "--log-level", "warning"],
+        cwd=BASE_DIR, env=server_env,
+        # Console e-mail (OTP) and debug prints would flood the report
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_until_up(server, port))
+        yield server
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
@@ -0,0 +1,41 @@
+# ASGI deployment profile:
+#
+#     gunicorn -c deploy/gunicorn_asgi.py fintechsnap.asgi
+#
+# Each uvicorn worker runs one event loop; the read-only pages are served by
+# financeapp.async_views, so a worker keeps many dashboard readers in flight
+# while they wait on the database instead of one per thread.
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+keepalive = 5
+
+# Models are loaded once in the master and shared copy-on-write
+preload_app = True
+
+raw_env = ["FINMENTOR_ASYNC_VIEWS=true"]
+
+# Each worker writes its metrics to a file here (fintechsnap.metrics); the
+# directory is emptied on start and an exited worker's gauges are dropped.
+metrics_dir = os.environ.setdefault(
+    "FINMENTOR_METRICS_DIR",
+    os.path.join(tempfile.gettempdir(), f"fintechsnap-metrics-{os.environ.get('PORT', '8000')}"),
+)
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from fintechsnap.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid, metrics_dir)
@@ -0,0 +1,36 @@
+# WSGI deployment profile (the Procfile default), kept alongside the ASGI
+# one so both can be benchmarked with the same worker count:
+#
+#     gunicorn -c deploy/gunicorn_wsgi.py fintechsnap.wsgi
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+keepalive = 5
+
+preload_app = True
+
+# Each worker writes its metrics to a file here (fintechsnap.metrics); the
+# directory is emptied on start and an exited worker's gauges are dropped.
+metrics_dir = os.environ.setdefault(
+    "FINMENTOR_METRICS_DIR",
+    os.path.join(tempfile.gettempdir(), f"fintechsnap-metrics-{os.environ.get('PORT', '8000')}"),
+)
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from fintechsnap.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid, metrics_dir)
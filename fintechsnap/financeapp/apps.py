@@ -1,6 +1,24 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class FinanceappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'financeapp'
+
+    def ready(self):
+        # Load and warm the persona models once per process so requests
+        # never pay for unpickling them.
+        if not getattr(settings, "FINMENTOR_PRELOAD_MODELS", True):
+            return
+
+        from ml_models.manager import registry
+
+        try:
+            registry.warm_up()
+        except Exception:
+            logger.exception("Model warm-up failed")
@@ -0,0 +1,78 @@
+# financeapp/async_views.py
+#
+# Async versions of the read-only pages, served when FINMENTOR_ASYNC_VIEWS
+# is on (the ASGI deployment profile). They read the same user snapshot
+# (snapshots.py, rebuilt through the async ORM on a miss), so the rendered
+# pages are identical to the sync ones.
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+
+from .contexts import DASHBOARD_SESSION_KEYS, dashboard_context
+from .snapshots import aget_snapshot
+
+
+async def _user(request):
+    user = await request.auser()
+    # Templates (auth context processor) read request.user synchronously;
+    # pin the resolved user so that never hits the database in the loop.
+    request.user = user
+    return user
+
+
+@login_required
+async def dashboard(request):
+    user = await _user(request)
+    record = (await aget_snapshot(request, user)).record
+
+    if not record:
+        messages.info(request, "Please fill in your financial details.")
+        return redirect("input")
+
+    outputs = {
+        key: await request.session.aget(key, default)
+        for key, default in DASHBOARD_SESSION_KEYS.items()
+    }
+
+    return render(request, "dashboard.html", dashboard_context(user, record, outputs))
+
+
+@login_required
+async def loans_emi(request):
+    snapshot = await aget_snapshot(request, await _user(request))
+
+    return render(request, "loans_emi.html", snapshot.contexts["loans_emi"])
+
+
+@login_required
+async def action_plan(request):
+    snapshot = await aget_snapshot(request, await _user(request))
+
+    if not snapshot.record:
+        messages.info(request, "Please fill in your financial details.")
+        return redirect("input")
+
+    return render(request, "action_plan.html", snapshot.contexts["action_plan"])
+
+
+@login_required
+async def spending_insights(request):
+    snapshot = await aget_snapshot(request, await _user(request))
+
+    if not snapshot.record:
+        messages.info(request, "Please fill in your financial details to view spending insights.")
+        return redirect("input")
+
+    return render(request, "spending.html", snapshot.contexts["spending"])
+
+
+@login_required
+async def savings_goals(request):
+    snapshot = await aget_snapshot(request, await _user(request))
+
+    if not snapshot.record:
+        messages.info(request, "Please fill in your financial details.")
+        return redirect("input")
+
+    return render(request, "savings.html", snapshot.contexts["savings"])
@@ -0,0 +1,213 @@
+# financeapp/contexts.py
+#
+# Page contexts built from already-fetched rows, so the sync views, their
+# async counterparts (async_views.py) and the cached user snapshots
+# (snapshots.py) render identical pages.
+
+import numpy as np
+from django.conf import settings
+
+from .projections import project_goals, timeline
+
+def _risk_label(score):
+    if score < 40:
+        return "High Risk"
+    elif score < 70:
+        return "Moderate Risk"
+    return "Low Risk"
+
+
+def dashboard_context(user, record, outputs):
+    score = record.score or 0
+
+    # Final persona should ALWAYS match what was saved
+    final_output = record.persona
+
+    return {
+        "user_name": user.first_name or user.username,
+        "risk": _risk_label(score),
+        "persona": final_output,
+        "score": score,
+        "spending_behaviour": record.spending_behaviour,
+        "savings_behaviour": record.savings_behaviour,
+        "emi_status": record.emi_status,
+        "expense_ratio": round((record.expenses / record.income) * 100, 1)
+            if record.income > 0 else 0,
+        "emi_ratio": round((record.fixed_obligations / record.income) * 100, 1)
+            if record.income > 0 else 0,
+        "disposable_income": record.net_balance,
+        "savings_rate": round(record.savings_rate, 1),
+        "svm_output": outputs["svm_output"],
+        "crf_output": outputs["crf_output"],
+        "hmm_output": outputs["hmm_output"],
+        "hmm_trend": outputs["hmm_trend"],
+        "final_output": final_output,
+        "selection_reason": outputs["selection_reason"],
+    }
+
+
+# Stored model outputs shown on the dashboard (session key -> default)
+DASHBOARD_SESSION_KEYS = {
+    "svm_output": "Not Available",
+    "crf_output": "Not Available",
+    "hmm_output": "Not Available",
+    "hmm_trend": "",
+    "selection_reason": "",
+}
+
+
+def loans_emi_context(record):
+    emi_ratio = 0
+    income = 0
+    existing_emis = 0
+
+    if record and record.income > 0:
+        income = record.income
+        existing_emis = record.fixed_obligations  # your total_emi
+        emi_ratio = round((existing_emis / income) * 100, 1)
+
+    return {
+        "income": income,
+        "existing_emis": existing_emis,
+        "emi_ratio": emi_ratio,
+    }
+
+
+def action_plan_context(record):
+    score = record.score or 0
+    savings_rate = record.savings_rate or 0  # already stored as %
+    emi_ratio = (record.fixed_obligations / record.income) * 100 if record.income > 0 else 0
+    expense_ratio = (record.expenses / record.income) * 100 if record.income > 0 else 0
+
+    # -------- RISK LABEL --------
+    health_label = _risk_label(score)
+
+    # -------- DYNAMIC ACTION PLAN --------
+    action_points = []
+
+    if savings_rate < 20:
+        action_points.append("Increase savings rate to at least 20% of income.")
+
+    if emi_ratio > 35:
+        action_points.append("Reduce EMI burden below 35% of income.")
+
+    if expense_ratio > 60:
+        action_points.append("Optimize discretionary spending to reduce expense ratio.")
+
+    if savings_rate >= 30:
+        action_points.append(
+            "Maintain your strong savings discipline and consider building a 6-month emergency fund."
+        )
+
+    if not action_points:
+        action_points.append(
+            "Your financial profile appears balanced. Continue maintaining your current savings and spending habits."
+        )
+    return {
+        "score": score,
+        "health_label": health_label,
+        "savings_rate": round(savings_rate, 1),
+        "emi_to_income_pct": round(emi_ratio, 1),
+        "monthly_income": record.income,
+        "monthly_savings": record.net_balance,
+        "monthly_expenses": record.expenses,
+        "total_emi": record.fixed_obligations,
+        "action_points": action_points
+    }
+
+
+def spending_context(record, summary, categories):
+    """`summary` is the user's CategorySummary (None before the first submission)."""
+    expense_income_ratio = round(
+        (record.expenses / record.income) * 100, 1
+    ) if record.income > 0 else 0
+
+    cat_data = [
+        {
+            "name": c.name,
+            "amount": c.amount,
+            "percent": summary.share(c.amount),
+            "type": c.type,
+        }
+        for c in categories
+    ] if summary else []
+
+    top_category_name = None
+    top_category_pct = None
+    if summary and summary.category_count:
+        top_category_name = summary.top_category
+        top_category_pct = summary.share(summary.top_amount)
+
+    essentials_pct = summary.share(summary.essential_total) if summary else 0
+    discretionary_pct = summary.share(summary.discretionary_total) if summary else 0
+
+    chart_labels = [c["name"] for c in cat_data]
+    chart_values = [c["amount"] for c in cat_data]
+
+    return {
+        "monthly_expenses": record.expenses,
+        "categories": cat_data,
+        "top_category_name": top_category_name,
+        "top_category_pct": top_category_pct,
+        "essentials_pct": essentials_pct,
+        "discretionary_pct": discretionary_pct,
+        "persona": record.persona,                
+        "spending_behaviour": record.spending_behaviour, 
+        "expense_income_ratio": expense_income_ratio, 
+        "chart_labels": chart_labels,
+        "chart_values": chart_values,
+        "monthly_income": record.income,
+    }
+
+
+def savings_context(record, goals):
+    savings_rate = record.savings_rate or 0
+
+    if savings_rate >= 30:
+        savings_health_label = "Strong"
+    elif savings_rate >= 15:
+        savings_health_label = "Moderate"
+    else:
+        savings_health_label = "Needs Improvement"
+
+    coverage_months = 0
+    if record.expenses > 0:
+        coverage_months = round(record.net_balance / record.expenses, 1)
+
+    # -------- GOAL PROJECTIONS --------
+    # ETAs are the stored ones (projections.refresh_projections); the
+    # monthly amounts, progress and timeline come from the same engine
+    goal_projections = []
+    allocation_total = 0
+    over_allocated = False
+    timeline_rows = []
+    if goals:
+        target = [goal.target_amount for goal in goals]
+        saved = [goal.saved_amount for goal in goals]
+        projection = project_goals(
+            target, saved, [goal.allocation_percent for goal in goals], record.net_balance
+        )
+        allocation_total = round(float(projection.allocation_total[0]), 1)
+        over_allocated = bool(projection.over_allocated[0])
+        goal_projections = [
+            {"goal": goal, "monthly": monthly, "progress": int(progress)}
+            for goal, monthly, progress in zip(goals, projection.monthly.tolist(), projection.progress.tolist())
+        ]
+
+        reachable = projection.months[~np.isnan(projection.months)]
+        months = int(min(reachable.max(initial=0), settings.FINMENTOR_PROJECTION_HORIZON))
+        balances = timeline(target, saved, projection.monthly, months).tolist()
+        timeline_rows = [{"month": month, "balances": balances[month]} for month in range(1, months + 1)]
+
+    return {
+        "monthly_savings": record.net_balance,
+        "savings_rate": round(savings_rate, 1),
+        "coverage_months": coverage_months,
+        "savings_health_label": savings_health_label,
+        "goals": goals,
+        "goal_projections": goal_projections,
+        "allocation_total": allocation_total,
+        "over_allocated": over_allocated,
+        "timeline": timeline_rows,
+        "persona": record.persona,
+    }
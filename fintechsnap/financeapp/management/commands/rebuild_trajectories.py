@@ -0,0 +1,32 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from financeapp.trajectory import decode_all, rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's HMM forward state from their submission history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk upsert.")
+        parser.add_argument(
+            "--decode",
+            action="store_true",
+            help="Also Viterbi-decode every history and report the trends.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_all(batch_size=options["batch_size"])
+        self.stdout.write(f"Rebuilt {written} trajectories in {time.perf_counter() - started:.2f}s")
+
+        if options["decode"]:
+            started = time.perf_counter()
+            decoded = decode_all()
+            trends = Counter(entry["trend"] for entry in decoded.values())
+            self.stdout.write(
+                f"Decoded {len(decoded)} histories in {time.perf_counter() - started:.2f}s: "
+                + ", ".join(f"{trend} {count}" for trend, count in sorted(trends.items()))
+            )
@@ -0,0 +1,152 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from ml_models.distill import DEFAULT_MAX_DEPTH, DEFAULT_SAMPLES
+from ml_models.manager import MODEL_DIR
+from ml_models.svm.select import DEFAULT_LATENCY_BUDGET_US
+from ml_models.svm.train import DEFAULT_HMM_RESTARTS, DEFAULT_SEED, train_all
+
+
+class Command(BaseCommand):
+    help = "Retrain the SVM, HMM and CRF persona models in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            help="Training workbook (default: settings.FINMENTOR_DATASET_PATH).",
+        )
+        parser.add_argument(
+            "--output-dir",
+            default=str(MODEL_DIR),
+            help="Where the .pkl artifacts are written (default: ml_models/).",
+        )
+        parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+        parser.add_argument(
+            "--hmm-restarts",
+            type=int,
+            default=DEFAULT_HMM_RESTARTS,
+            help="Random HMM initialisations; the best log-likelihood is kept.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Process pool size (default: all cores).",
+        )
+        parser.add_argument("--test-size", type=float, default=0.2)
+        parser.add_argument(
+            "--report",
+            help="Where to write the JSON report (default: <output-dir>/training_report.json).",
+        )
+        parser.add_argument(
+            "--select-svm",
+            action="store_true",
+            help="Cross-validate SVC kernels/C/gamma/probability and keep the "
+                 "most accurate one within the latency budget.",
+        )
+        parser.add_argument(
+            "--latency-budget-us",
+            type=float,
+            default=DEFAULT_LATENCY_BUDGET_US,
+            help="Per-row single-prediction budget for --select-svm (microseconds).",
+        )
+        parser.add_argument("--cv", type=int, default=5, help="CV folds for --select-svm.")
+        parser.add_argument(
+            "--n-jobs",
+            type=int,
+            default=-1,
+            help="Parallel CV jobs for --select-svm (default: all cores).",
+        )
+        parser.add_argument(
+            "--distill",
+            action="store_true",
+            help="Also distil the ensemble into a single decision tree "
+                 "(persona_distilled.pkl, served with FINMENTOR_PERSONA_ENGINE=distilled).",
+        )
+        parser.add_argument(
+            "--distill-samples",
+            type=int,
+            default=DEFAULT_SAMPLES,
+            help="Synthetic profiles labelled by the ensemble for --distill.",
+        )
+        parser.add_argument(
+            "--distill-depth",
+            type=int,
+            default=DEFAULT_MAX_DEPTH,
+            help="Maximum depth of the distilled tree.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Train and report without overwriting the saved models.",
+        )
+
+    def handle(self, *args, **options):
+        output_dir = Path(options["output_dir"])
+
+        svm_selection = None
+        if options["select_svm"]:
+            svm_selection = {
+                "latency_budget_us": options["latency_budget_us"],
+                "cv": options["cv"],
+                "n_jobs": options["n_jobs"],
+            }
+
+        distill = None
+        if options["distill"]:
+            distill = {
+                "n_samples": options["distill_samples"],
+                "max_depth": options["distill_depth"],
+            }
+
+        report = train_all(
+            source=options["source"],
+            output_dir=None if options["dry_run"] else output_dir,
+            seed=options["seed"],
+            hmm_restarts=options["hmm_restarts"],
+            workers=options["workers"],
+            test_size=options["test_size"],
+            svm_selection=svm_selection,
+            distill=distill,
+        )
+
+        self.stdout.write(f"{'model':>9}  {'accuracy':>8}  {'fit (s)':>8}")
+        for name, model_report in report["models"].items():
+            self.stdout.write(
+                f"{name:>9}  {model_report['accuracy']:>8.4f}  {model_report['fit_seconds']:>8.3f}"
+            )
+
+        selection = report.get("svm_selection")
+        if selection:
+            self.stdout.write("\nSVC candidates (cv accuracy, single-row latency):")
+            for candidate in selection["candidates"]:
+                marker = "*" if candidate is selection["selected"] else " "
+                self.stdout.write(
+                    f" {marker} {candidate['cv_accuracy']:.4f}  "
+                    f"{candidate['single_row_us']:>8.1f}us  {candidate['params']}"
+                )
+            if not selection["budget_met"]:
+                self.stdout.write(self.style.WARNING(
+                    "No candidate met the latency budget; kept the fastest one."
+                ))
+
+        distilled = report["models"].get("distilled")
+        if distilled:
+            self.stdout.write(
+                f"\nDistilled tree: depth {distilled['max_depth']}, {distilled['leaves']} leaves, "
+                f"fidelity {distilled['fidelity']:.4f} (sweep) / "
+                f"{distilled['reference_fidelity']:.4f} (test rows), "
+                f"{distilled['distilled_single_row_us']}us vs "
+                f"{distilled['ensemble_single_row_us']}us per row ({distilled['speedup']}x)"
+            )
+
+        report_path = Path(options["report"] or output_dir / "training_report.json")
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2))
+
+        action = "Trained" if options["dry_run"] else f"Trained and saved to {output_dir}"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} in {report['total_seconds']}s; report: {report_path}"
+        ))
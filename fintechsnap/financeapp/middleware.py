@@ -0,0 +1,101 @@
+# financeapp/middleware.py
+
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from fintechsnap import timing
+from fintechsnap.timing import RequestTimings
+
+timing_logger = logging.getLogger("fintechsnap.timing")
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise with an async path.
+
+    WhiteNoiseMiddleware is sync-only, so under ASGI Django runs it, and
+    everything below it, through the single thread-sensitive executor:
+    every request pays two thread hops and requests are serialised on
+    that thread. This subclass is async-capable: static files are still
+    served by WhiteNoise (off the event loop), everything else goes
+    straight to the async handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(
+                request.path_info
+            )
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """
+    Times each request by phase and reports it in a Server-Timing header
+    and a structured "fintechsnap.timing" log record:
+
+        db        SQL time and query count (connection.execute_wrapper)
+        session   session load/save (financeapp.sessions, includes its SQL)
+        model     persona model inference (ml_models.ensemble)
+        template  template rendering (fintechsnap.timing.TimedDjangoTemplates)
+        total     the whole request below this middleware
+
+    Only installed when settings.FINMENTOR_SERVER_TIMING is on; otherwise the
+    phase hooks cost one ContextVar lookup each.
+
+    Sync-only on purpose: under ASGI Django then runs the rest of the chain
+    in the thread-sensitive executor, which is also where the async ORM
+    runs its queries, so the execute wrapper sees them.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "FINMENTOR_SERVER_TIMING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = timing.activate(timings)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            timing.deactivate(token)
+        total = time.perf_counter() - started
+
+        response["Server-Timing"] = timings.header(total)
+        timing_logger.info(json.dumps({
+            "event": "request_timing",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 3),
+            "phases": timings.as_dict(),
+        }))
+        return response
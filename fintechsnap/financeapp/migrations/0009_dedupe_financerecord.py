@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def keep_latest_record(apps, schema_editor):
+    """Delete all but the newest FinanceRecord of every user (the one the pages show)."""
+    FinanceRecord = apps.get_model("financeapp", "FinanceRecord")
+
+    duplicated = (
+        FinanceRecord.objects.values("user")
+        .annotate(records=Count("id"))
+        .filter(records__gt=1)
+        .values_list("user", flat=True)
+    )
+    for user_id in duplicated:
+        records = FinanceRecord.objects.filter(user_id=user_id)
+        latest = records.order_by("-created_at", "-id").values_list("id", flat=True)[0]
+        records.exclude(id=latest).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeapp', '0008_rename_savings_financerecord_net_balance_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_record, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeapp', '0009_dedupe_financerecord'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='financerecord',
+            constraint=models.UniqueConstraint(fields=('user',), name='unique_financerecord_user'),
+        ),
+    ]
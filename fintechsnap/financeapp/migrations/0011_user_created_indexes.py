@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeapp', '0010_financerecord_unique_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expensecategory',
+            index=models.Index(fields=['user', '-created_at'], name='expensecat_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='financerecord',
+            index=models.Index(fields=['user', '-created_at'], name='financerecord_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savingsgoal',
+            index=models.Index(fields=['user', '-created_at'], name='savingsgoal_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeapp', '0011_user_created_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.FloatField(default=0)),
+                ('essential_total', models.FloatField(default=0)),
+                ('discretionary_total', models.FloatField(default=0)),
+                ('category_count', models.PositiveIntegerField(default=0)),
+                ('top_category', models.CharField(blank=True, max_length=100)),
+                ('top_amount', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='category_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+def populate(apps, schema_editor):
+    """One CategorySummary per user who already has expense categories."""
+    ExpenseCategory = apps.get_model("financeapp", "ExpenseCategory")
+    CategorySummary = apps.get_model("financeapp", "CategorySummary")
+
+    totals = ExpenseCategory.objects.values("user").annotate(
+        total=Sum("amount"),
+        essential_total=Sum("amount", filter=Q(type="Essential")),
+        discretionary_total=Sum("amount", filter=Q(type="Discretionary")),
+        category_count=Count("id"),
+    )
+
+    summaries = []
+    for row in totals:
+        top = (
+            ExpenseCategory.objects.filter(user=row["user"])
+            .order_by("-amount", "id").values("name", "amount").first()
+        )
+        summaries.append(CategorySummary(
+            user_id=row["user"],
+            total=row["total"] or 0,
+            essential_total=row["essential_total"] or 0,
+            discretionary_total=row["discretionary_total"] or 0,
+            category_count=row["category_count"],
+            top_category=top["name"],
+            top_amount=top["amount"],
+        ))
+    CategorySummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeapp', '0012_categorysummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
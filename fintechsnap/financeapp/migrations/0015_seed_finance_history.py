@@ -0,0 +1,49 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def seed(apps, schema_editor):
+    """
+    Start every user's history with their current FinanceRecord, dated
+    when it was created, and the month and year rollups it falls in.
+    """
+    FinanceRecord = apps.get_model("financeapp", "FinanceRecord")
+    FinanceSnapshot = apps.get_model("financeapp", "FinanceSnapshot")
+    FinanceRollup = apps.get_model("financeapp", "FinanceRollup")
+
+    for record in FinanceRecord.objects.all():
+        snapshot = FinanceSnapshot.objects.create(
+            user_id=record.user_id,
+            income=record.income,
+            expenses=record.expenses,
+            fixed_obligations=record.fixed_obligations,
+            net_balance=record.net_balance,
+            savings_rate=record.savings_rate,
+            score=record.score,
+            persona=record.persona,
+        )
+        # auto_now_add stamps the migration time; keep the record's instead
+        FinanceSnapshot.objects.filter(pk=snapshot.pk).update(created_at=record.created_at)
+
+        day = timezone.localdate(record.created_at)
+        for period, start in (("month", day.replace(day=1)), ("year", day.replace(month=1, day=1))):
+            FinanceRollup.objects.create(
+                user_id=record.user_id,
+                period=period,
+                period_start=start,
+                count=1,
+                score_sum=record.score,
+                income_sum=record.income,
+                savings_rate_sum=record.savings_rate,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeapp', '0014_financesnapshot_financerollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeapp', '0015_seed_finance_history'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceTrajectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_alpha', models.JSONField(default=list)),
+                ('state', models.PositiveSmallIntegerField(default=0)),
+                ('previous_state', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('steps', models.PositiveIntegerField(default=0)),
+                ('model_key', models.CharField(blank=True, max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='finance_trajectory', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+import math
+from collections import defaultdict
+
+from django.db import migrations
+from django.utils import timezone
+
+# Largest value of a PositiveIntegerField on every database
+MAX_ETA_MONTHS = 2147483647
+
+
+def eta_months(target, saved, monthly):
+    """Whole months until a goal is reached (0 if already), None if never."""
+    remaining = max(target - saved, 0)
+    if remaining == 0:
+        return 0
+    if monthly <= 0:
+        return None
+    # Rounding first keeps 3.0000000001 at 3
+    months = math.ceil(round(remaining / monthly, 9))
+    return months if months <= MAX_ETA_MONTHS else None
+
+
+def populate(apps, schema_editor):
+    """ETAs for the goals that exist already; later ones are stored as goals and savings change."""
+    SavingsGoal = apps.get_model("financeapp", "SavingsGoal")
+    FinanceRecord = apps.get_model("financeapp", "FinanceRecord")
+
+    goals = list(SavingsGoal.objects.only("id", "user_id", "target_amount", "saved_amount", "allocation_percent"))
+    if not goals:
+        return
+
+    net_balance = dict(FinanceRecord.objects.values_list("user_id", "net_balance"))
+    allocation_total = defaultdict(float)
+    for goal in goals:
+        allocation_total[goal.user_id] += goal.allocation_percent
+
+    now = timezone.now()
+    for goal in goals:
+        # Goals of a user allocating more than 100% share the savings in
+        # proportion to their percentages
+        scale = 100 / allocation_total[goal.user_id] if allocation_total[goal.user_id] > 100 else 1
+        monthly = max(net_balance.get(goal.user_id, 0.0), 0) * (goal.allocation_percent / 100) * scale
+        goal.eta_months = eta_months(goal.target_amount, goal.saved_amount, monthly)
+        goal.projected_at = now
+
+    SavingsGoal.objects.bulk_update(goals, ["eta_months", "projected_at"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeapp', '0017_savingsgoal_projection'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,21 @@
-from django.db import models
+from django.db import connection, models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class UserHistoryQuerySet(models.QuerySet):
+    """Per-user rows read newest first, in the order of the (user, -created_at) indexes."""
+
+    def for_user(self, user):
+        return self.filter(user=user).order_by("-created_at")
+
+    def latest_for(self, user):
+        """The user's newest row, or None: one seek on the (user, -created_at) index."""
+        return self.for_user(user).first()
+
+    async def alatest_for(self, user):
+        return await self.for_user(user).afirst()
+
 
 class FinanceRecord(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -18,9 +34,133 @@ class FinanceRecord(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserHistoryQuerySet.as_manager()
+
+    class Meta:
+        # compute_health keeps one current record per user (update_or_create)
+        constraints = [
+            models.UniqueConstraint(fields=["user"], name="unique_financerecord_user"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="financerecord_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.score} ({self.created_at.date()})"
 
+class FinanceSnapshot(models.Model):
+    """One row per compute_health submission; rows are never updated."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    income = models.FloatField()
+    expenses = models.FloatField()
+    fixed_obligations = models.FloatField(default=0)
+    net_balance = models.FloatField()
+    savings_rate = models.FloatField()
+    score = models.IntegerField()
+    persona = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = UserHistoryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="financesnap_user_created_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("FinanceSnapshot rows are append-only.")
+        super().save(*args, **kwargs)
+
+
+class FinanceRollupManager(models.Manager):
+    def add(self, snapshot):
+        """
+        Fold one FinanceSnapshot into its month and year rows with a single
+        upsert: a period is inserted the first time it is seen and added to
+        afterwards, so concurrent first writers land in the same row.
+
+        bulk_create(update_conflicts=True) can only overwrite a conflicting
+        row, not add to it, hence the SQL; ON CONFLICT ... DO UPDATE reads
+        the same on SQLite and PostgreSQL.
+        """
+        day = timezone.localdate(snapshot.created_at)
+        sums = {
+            "count": 1,
+            "score_sum": snapshot.score,
+            "income_sum": snapshot.income,
+            "savings_rate_sum": snapshot.savings_rate,
+        }
+
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        key = ", ".join(quote(name) for name in ("user_id", "period", "period_start"))
+        columns = ", ".join(quote(name) for name in sums)
+        increments = ", ".join(
+            f"{quote(name)} = {table}.{quote(name)} + excluded.{quote(name)}" for name in sums
+        )
+
+        periods = FinanceRollup.period_starts(day)
+        row = "(" + ", ".join(["%s"] * (3 + len(sums))) + ")"
+        params = []
+        for period, start in periods.items():
+            params += [snapshot.user_id, period, connection.ops.adapt_datefield_value(start), *sums.values()]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({key}, {columns}) VALUES {', '.join([row] * len(periods))} "
+                f"ON CONFLICT ({key}) DO UPDATE SET {increments}",
+                params,
+            )
+
+
+class FinanceRollup(models.Model):
+    """Per-user monthly and yearly sums of FinanceSnapshot values, for trends."""
+
+    MONTH = "month"
+    YEAR = "year"
+    PERIODS = [(MONTH, "Month"), (YEAR, "Year")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    period = models.CharField(max_length=5, choices=PERIODS)
+    period_start = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    income_sum = models.FloatField(default=0)
+    savings_rate_sum = models.FloatField(default=0)
+
+    objects = FinanceRollupManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "period", "period_start"], name="unique_financerollup_period",
+            ),
+        ]
+
+    @classmethod
+    def period_starts(cls, day):
+        return {cls.MONTH: day.replace(day=1), cls.YEAR: day.replace(month=1, day=1)}
+
+
+class FinanceTrajectory(models.Model):
+    """
+    The HMM forward state of a user's FinanceSnapshot history, advanced
+    one submission at a time (financeapp/trajectory.py).
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="finance_trajectory")
+    # Normalized log p(state | every submission so far), one value per state
+    log_alpha = models.JSONField(default=list)
+    state = models.PositiveSmallIntegerField(default=0)
+    previous_state = models.PositiveSmallIntegerField(null=True, blank=True)
+    steps = models.PositiveIntegerField(default=0)
+    # ml_models.hmm.predict.model_key() of the HMM that produced log_alpha
+    model_key = models.CharField(max_length=40, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
 class ExpenseCategory(models.Model):
     CATEGORY_TYPES = [
         ("Essential", "Essential"),
@@ -34,28 +174,81 @@ class ExpenseCategory(models.Model):
     type = models.CharField(max_length=20, choices=CATEGORY_TYPES)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserHistoryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="expensecat_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.amount}"
-    
+
+
+class CategorySummaryManager(models.Manager):
+    def refresh_for(self, user, categories):
+        """
+        Upsert the user's summary (one statement) from `categories`, the
+        ExpenseCategory rows save_profile has just written, so nothing is
+        read back. The top category is the first of the largest, as in
+        the (-amount, id) order of the rows.
+        """
+        categories = list(categories)
+        top = max(categories, key=lambda c: c.amount, default=None)
+        totals = {
+            "total": sum(c.amount for c in categories),
+            "essential_total": sum(c.amount for c in categories if c.type == "Essential"),
+            "discretionary_total": sum(c.amount for c in categories if c.type == "Discretionary"),
+            "category_count": len(categories),
+            "top_category": top.name if top else "",
+            "top_amount": top.amount if top else 0.0,
+        }
+
+        summary = self.model(user=user, **totals)
+        self.bulk_create(
+            [summary], update_conflicts=True, unique_fields=["user"],
+            update_fields=[*totals, "updated_at"],
+        )
+        return summary
+
+
+class CategorySummary(models.Model):
+    """Per-user expense totals, rewritten whenever the categories are (save_profile)."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="category_summary")
+    total = models.FloatField(default=0)
+    essential_total = models.FloatField(default=0)
+    discretionary_total = models.FloatField(default=0)
+    category_count = models.PositiveIntegerField(default=0)
+    top_category = models.CharField(max_length=100, blank=True)
+    top_amount = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CategorySummaryManager()
+
+    def share(self, amount):
+        """`amount` as a percentage of the total, as shown on the spending page."""
+        return round((amount / self.total) * 100, 1) if self.total > 0 else 0
+
+
 class SavingsGoal(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     target_amount = models.FloatField()
     saved_amount = models.FloatField(default=0)  # NEW ✅
     allocation_percent = models.FloatField(default=0)
+    # Months until target_amount is reached at the current savings (None:
+    # never), stored by financeapp.projections.refresh_projections()
+    eta_months = models.PositiveIntegerField(null=True, blank=True)
+    projected_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
-    def progress_percent(self):
-        if self.target_amount > 0:
-            return min(int((self.saved_amount / self.target_amount) * 100), 100)
-        return 0
-
-    def estimated_months_to_reach(self, monthly_savings):
-        allocated = (self.allocation_percent / 100) * monthly_savings
-        if allocated > 0:
-            remaining = max(self.target_amount - self.saved_amount, 0)
-            return round(remaining / allocated, 1)
-        return None
+    objects = UserHistoryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="savingsgoal_user_created_idx"),
+        ]
 
 class EmiProfile(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
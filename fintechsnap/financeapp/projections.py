@@ -0,0 +1,126 @@
+# financeapp/projections.py
+#
+# Savings-goal projections. project_goals() takes goals as arrays (any
+# number of users at once, `owners` mapping goals to users) and computes
+# what each goal gets per month, when it reaches its target, and which
+# users allocate more than 100% of their savings, in one NumPy pass.
+# timeline() expands that into month-by-month balances for the savings
+# page. refresh_projections() stores the ETAs on SavingsGoal: for one user
+# after their goals or savings change, for everyone nightly (manage.py
+# project_goals).
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from django.utils import timezone
+
+from .models import FinanceRecord, SavingsGoal
+
+# Largest eta_months a PositiveIntegerField holds on every database; an ETA
+# past it (a tiny allocation towards a huge target) is stored as never
+MAX_ETA_MONTHS = 2147483647
+
+
+@dataclass
+class GoalProjection:
+    monthly: np.ndarray           # amount put towards each goal every month
+    months: np.ndarray            # months until each target is reached: 0 if already, NaN if never
+    progress: np.ndarray          # percent of each target saved so far, 0-100
+    allocation_total: np.ndarray  # per user: allocation_percent summed over their goals
+    over_allocated: np.ndarray    # per user: allocation_total > 100
+
+
+def project_goals(target, saved, allocation_percent, monthly_savings, owners=None):
+    """
+    Project goals given as arrays of target_amount, saved_amount and
+    allocation_percent. `monthly_savings` holds one amount per user and
+    `owners` the user index of every goal (all goals belong to user 0 if
+    omitted).
+
+    Each goal gets its allocation_percent of the owner's savings. A user
+    whose percentages add up to more than 100 is flagged, and their goals
+    share the savings in proportion to their percentages instead, since
+    no more than the savings can be put aside. Negative savings fund
+    nothing.
+    """
+    target = np.asarray(target, dtype=np.float64)
+    saved = np.asarray(saved, dtype=np.float64)
+    allocation = np.asarray(allocation_percent, dtype=np.float64)
+    monthly_savings = np.atleast_1d(np.asarray(monthly_savings, dtype=np.float64))
+    owners = np.zeros(target.shape, dtype=np.intp) if owners is None else np.asarray(owners, dtype=np.intp)
+
+    allocation_total = np.bincount(owners, weights=allocation, minlength=monthly_savings.shape[0])
+    over_allocated = allocation_total > 100
+    scale = np.ones_like(allocation_total)
+    np.divide(100, allocation_total, out=scale, where=over_allocated)
+
+    monthly = np.maximum(monthly_savings, 0)[owners] * (allocation / 100) * scale[owners]
+    remaining = np.maximum(target - saved, 0)
+
+    months = np.full(target.shape, np.nan)
+    np.divide(remaining, monthly, out=months, where=monthly > 0)
+    # Whole months, as on the timeline; rounding first keeps 3.0000000001 at 3
+    months = np.ceil(np.round(months, 9))
+    months[remaining == 0] = 0
+
+    progress = np.zeros(target.shape)
+    np.divide(saved * 100, target, out=progress, where=target > 0)
+
+    return GoalProjection(
+        monthly=monthly,
+        months=months,
+        progress=np.clip(np.floor(progress), 0, 100),
+        allocation_total=allocation_total,
+        over_allocated=over_allocated,
+    )
+
+
+def timeline(target, saved, monthly, months):
+    """
+    (months + 1, n) balances of every goal at the start and after each
+    month, capped at the goal's target.
+    """
+    target = np.asarray(target, dtype=np.float64)
+    saved = np.asarray(saved, dtype=np.float64)
+    steps = np.arange(months + 1)[:, None]
+    return np.minimum(saved + steps * np.asarray(monthly), np.maximum(target, saved))
+
+
+def eta_months(months):
+    """A projected `months` value as stored in SavingsGoal.eta_months."""
+    return int(months) if math.isfinite(months) and months <= MAX_ETA_MONTHS else None
+
+
+def refresh_projections(users=None, monthly_savings=None, batch_size=1000):
+    """
+    Recompute and store eta_months of every goal of `users` (all users if
+    None). Monthly savings are the users' FinanceRecord net balance unless
+    `monthly_savings` ({user_id: amount}) is given. Returns the ids of the
+    users whose allocations add up to more than 100%.
+    """
+    goals = SavingsGoal.objects.all() if users is None else SavingsGoal.objects.filter(user__in=users)
+    rows = list(goals.values_list("id", "user_id", "target_amount", "saved_amount", "allocation_percent"))
+    if not rows:
+        return set()
+
+    ids, user_ids, target, saved, allocation = (np.array(column) for column in zip(*rows))
+    user_index, owners = np.unique(user_ids, return_inverse=True)
+
+    if monthly_savings is None:
+        records = FinanceRecord.objects.all() if users is None else FinanceRecord.objects.filter(user__in=users)
+        monthly_savings = dict(records.values_list("user_id", "net_balance"))
+    savings = [monthly_savings.get(user_id, 0.0) for user_id in user_index.tolist()]
+
+    projection = project_goals(target, saved, allocation, savings, owners)
+
+    now = timezone.now()
+    SavingsGoal.objects.bulk_update(
+        [
+            SavingsGoal(id=goal_id, eta_months=eta_months(months), projected_at=now)
+            for goal_id, months in zip(ids.tolist(), projection.months.tolist())
+        ],
+        ["eta_months", "projected_at"],
+        batch_size=batch_size,
+    )
+    return set(user_index[projection.over_allocated].tolist())
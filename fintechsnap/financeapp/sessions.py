@@ -0,0 +1,25 @@
+# financeapp/sessions.py
+
+from django.contrib.sessions.backends import db
+
+from fintechsnap.timing import phase
+
+
+class SessionStore(db.SessionStore):
+    """Database sessions whose load and save are timed as the "session" phase."""
+
+    def load(self):
+        with phase("session"):
+            return super().load()
+
+    async def aload(self):
+        with phase("session"):
+            return await super().aload()
+
+    def save(self, must_create=False):
+        with phase("session"):
+            return super().save(must_create)
+
+    async def asave(self, must_create=False):
+        with phase("session"):
+            return await super().asave(must_create)
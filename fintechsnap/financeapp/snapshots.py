@@ -0,0 +1,164 @@
+# financeapp/snapshots.py
+#
+# Per-user snapshot of everything the dashboard pages read: the latest
+# FinanceRecord, the expense categories and their CategorySummary, the
+# savings goals and the page contexts derived from them. It lives in Django's cache framework
+# (FINMENTOR_SNAPSHOT_CACHE, local memory unless CACHES says otherwise),
+# so moving between dashboard, spending, savings, loans and action plan
+# runs no finance queries once the snapshot is built.
+#
+# The cache key carries two versions. One is per user, in the cache
+# itself, so a write from one session or device invalidates the snapshot
+# every other session of the user reads. The other is kept in the
+# session: with a per-process cache such as locmem, where the user's
+# version only changes in the process that handled the write, the other
+# workers still miss for the writing session instead of serving it a
+# stale copy. Writes (compute_health, the goal views) call
+# invalidate_snapshot(), which bumps both; a fresh session starts a fresh
+# session version. Writes outside a request (the nightly project_goals
+# command) clear the whole cache alias with invalidate_all_snapshots().
+
+import secrets
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import caches
+
+from ml_models.cache import CACHE_REQUESTS
+
+from .contexts import action_plan_context, loans_emi_context, savings_context, spending_context
+from .models import CategorySummary, ExpenseCategory, FinanceRecord, SavingsGoal
+
+SESSION_VERSION_KEY = "snapshot_version"
+
+
+@dataclass
+class UserSnapshot:
+    record: FinanceRecord | None
+    summary: CategorySummary | None
+    categories: list
+    goals: list
+    # Page contexts that depend only on the rows above; the pages other
+    # than loans/EMI redirect to the input form without a record
+    contexts: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_rows(cls, record, summary, categories, goals):
+        snapshot = cls(record, summary, categories, goals)
+        snapshot.contexts["loans_emi"] = loans_emi_context(record)
+        if record is not None:
+            snapshot.contexts.update({
+                "action_plan": action_plan_context(record),
+                "spending": spending_context(record, summary, categories),
+                "savings": savings_context(record, goals),
+            })
+        return snapshot
+
+
+def _cache():
+    return caches[settings.FINMENTOR_SNAPSHOT_CACHE]
+
+
+def _key(user, user_version, session_version):
+    return f"finmentor:snapshot:{user.pk}:{user_version}:{session_version}"
+
+
+def _version_key(user):
+    return f"finmentor:snapshot:v:{user.pk}"
+
+
+def _new_version():
+    # Random start, so a version lost to eviction never reuses old keys
+    return secrets.randbits(48)
+
+
+def _user_version(user):
+    cache, key = _cache(), _version_key(user)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+async def _auser_version(user):
+    cache, key = _cache(), _version_key(user)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def build_snapshot(user):
+    return UserSnapshot.from_rows(
+        FinanceRecord.objects.latest_for(user),
+        CategorySummary.objects.filter(user=user).first(),
+        list(ExpenseCategory.objects.filter(user=user)),
+        list(SavingsGoal.objects.filter(user=user)),
+    )
+
+
+async def abuild_snapshot(user):
+    return UserSnapshot.from_rows(
+        await FinanceRecord.objects.alatest_for(user),
+        await CategorySummary.objects.filter(user=user).afirst(),
+        [c async for c in ExpenseCategory.objects.filter(user=user)],
+        [g async for g in SavingsGoal.objects.filter(user=user)],
+    )
+
+
+def get_snapshot(request):
+    """The requesting user's snapshot, built and cached on a miss."""
+    version = request.session.get(SESSION_VERSION_KEY)
+    if version is None:
+        version = request.session[SESSION_VERSION_KEY] = secrets.token_hex(8)
+
+    key = _key(request.user, _user_version(request.user), version)
+    snapshot = _cache().get(key)
+    CACHE_REQUESTS.inc(cache="snapshot", result="miss" if snapshot is None else "hit")
+
+    if snapshot is None:
+        snapshot = build_snapshot(request.user)
+        _cache().set(key, snapshot, settings.FINMENTOR_SNAPSHOT_TTL)
+    return snapshot
+
+
+async def aget_snapshot(request, user):
+    version = await request.session.aget(SESSION_VERSION_KEY)
+    if version is None:
+        version = secrets.token_hex(8)
+        await request.session.aset(SESSION_VERSION_KEY, version)
+
+    key = _key(user, await _auser_version(user), version)
+    snapshot = await _cache().aget(key)
+    CACHE_REQUESTS.inc(cache="snapshot", result="miss" if snapshot is None else "hit")
+
+    if snapshot is None:
+        snapshot = await abuild_snapshot(user)
+        await _cache().aset(key, snapshot, settings.FINMENTOR_SNAPSHOT_TTL)
+    return snapshot
+
+
+def invalidate_snapshot(request):
+    """
+    Drop the user's snapshots after a write, in this and their other
+    sessions; the next page rebuilds them.
+    """
+    cache, key = _cache(), _version_key(request.user)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted: any version but the lost one will do
+        cache.set(key, _new_version(), None)
+    request.session[SESSION_VERSION_KEY] = secrets.token_hex(8)
+
+
+def invalidate_all_snapshots():
+    """
+    Drop every user's snapshot after a bulk write, by clearing the snapshot
+    cache alias (the CRF features cached there are rebuilt on demand). A
+    per-process cache such as locmem can only be cleared in this process;
+    other processes' copies expire after FINMENTOR_SNAPSHOT_TTL.
+    """
+    _cache().clear()
@@ -1,3 +1,610 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import numpy as np
+
+from fintechsnap import metrics
+from ml_models.crf.predict import feature_dicts, tag_rows
+from ml_models.ensemble import NOT_AVAILABLE, PERSONA_MAP, REASON_DISTILLED, REASON_PRIMARY, prediction_cache
+from ml_models.features import build_features, scale_features
+from ml_models.manager import registry
+
+from .models import (
+    CategorySummary, ExpenseCategory, FinanceRecord, FinanceRollup, FinanceSnapshot,
+    FinanceTrajectory, SavingsGoal,
+)
+from . import trajectory as trajectory_module
+from .projections import project_goals, refresh_projections, timeline
+from .trajectory import advance_trajectory, decode_all, rebuild_all, tag_all, tag_history
+from .trends import trend
+from .views import EXPENSE_CATEGORIES, save_profile
+
+RECORD_FIELDS = {
+    "income": 80000,
+    "expenses": 42000,
+    "fixed_obligations": 6000,
+    "net_balance": 32000,
+    "savings_rate": 40.0,
+    "score": 72,
+    "persona": "Financially Stable",
+    "savings_behaviour": "Good Saver",
+    "spending_behaviour": "Moderate",
+    "emi_status": "Normal EMI",
+}
+
+AMOUNTS = {
+    "rent": 18000, "groceries": 8000, "transport": 4000, "utilities": 3000,
+    "healthcare": 1000, "education": 0, "dining_out": 3000, "shopping": 4000,
+    "entertainment": 1000,
+}
+
+
+class SaveProfileTests(TestCase):
+    # Upserts of the record, the summary and both rollup periods, DELETE
+    # and one bulk INSERT of the categories and the history INSERT, for a
+    # first submission as for later ones. Savepoints are not counted: how
+    # many there are depends on the transaction the caller is already in.
+    STATEMENT_BUDGET = 6
+
+    def setUp(self):
+        self.user = User.objects.create_user("saver", password="pw-123456")
+
+    def assertStatementBudget(self, budget, func, *args):
+        with CaptureQueriesContext(connection) as queries:
+            result = func(*args)
+        statements = [
+            q["sql"] for q in queries.captured_queries
+            if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+        ]
+        self.assertEqual(len(statements), budget, "\n".join(statements))
+        return result
+
+    def test_first_submission_creates_record_and_categories(self):
+        self.assertStatementBudget(
+            self.STATEMENT_BUDGET, save_profile, self.user, RECORD_FIELDS, AMOUNTS
+        )
+
+        self.assertEqual(FinanceRecord.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            dict(ExpenseCategory.objects.filter(user=self.user).values_list("name", "amount")),
+            {name: AMOUNTS[field] for field, name, _ in EXPENSE_CATEGORIES},
+        )
+
+    def test_resubmission_updates_in_place(self):
+        first = save_profile(self.user, RECORD_FIELDS, AMOUNTS)
+
+        second = self.assertStatementBudget(
+            self.STATEMENT_BUDGET, save_profile, self.user, dict(RECORD_FIELDS, income=90000), AMOUNTS
+        )
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(FinanceRecord.objects.get(user=self.user).income, 90000)
+        self.assertEqual(ExpenseCategory.objects.filter(user=self.user).count(), len(EXPENSE_CATEGORIES))
+
+    def test_summary_follows_the_categories(self):
+        save_profile(self.user, RECORD_FIELDS, AMOUNTS)
+        save_profile(self.user, RECORD_FIELDS, dict(AMOUNTS, shopping=20000))
+
+        summary = CategorySummary.objects.get(user=self.user)
+        self.assertEqual(summary.total, sum(AMOUNTS.values()) - 4000 + 20000)
+        self.assertEqual(summary.essential_total, 34000)
+        self.assertEqual(summary.discretionary_total, 24000)
+        self.assertEqual((summary.top_category, summary.top_amount), ("Shopping", 20000))
+        self.assertEqual(summary.category_count, len(EXPENSE_CATEGORIES))
+
+    def test_one_record_per_user(self):
+        save_profile(self.user, RECORD_FIELDS, AMOUNTS)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            FinanceRecord.objects.create(user=self.user, **RECORD_FIELDS)
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("trender", password="pw-123456")
+
+    def submit(self, day, score, income):
+        with patch("django.utils.timezone.now", return_value=datetime(*day, 12, tzinfo=dt_timezone.utc)):
+            save_profile(self.user, dict(RECORD_FIELDS, score=score, income=income), AMOUNTS)
+
+    def test_every_submission_is_kept_and_rolled_up(self):
+        self.submit((2025, 1, 5), 60, 50000)
+        self.submit((2025, 1, 20), 80, 70000)
+        self.submit((2025, 3, 2), 70, 60000)
+
+        self.assertEqual(FinanceSnapshot.objects.filter(user=self.user).count(), 3)
+        january = FinanceRollup.objects.get(user=self.user, period="month", period_start=date(2025, 1, 1))
+        self.assertEqual((january.count, january.score_sum, january.income_sum), (2, 140, 120000))
+        year = FinanceRollup.objects.get(user=self.user, period="year", period_start=date(2025, 1, 1))
+        self.assertEqual((year.count, year.score_sum), (3, 210))
+
+    def test_snapshots_are_append_only(self):
+        self.submit((2025, 1, 5), 60, 50000)
+        snapshot = FinanceSnapshot.objects.get(user=self.user)
+
+        with self.assertRaises(ValueError):
+            snapshot.save()
+
+    def test_trend_downsamples_exactly(self):
+        for month, score in [(1, 60), (2, 80), (3, 70), (4, 90)]:
+            self.submit((2025, month, 10), score, 50000)
+
+        points = trend(self.user, date(2025, 1, 1), date(2025, 4, 30), points=2)
+
+        self.assertEqual(
+            [(p["start"], p["end"], p["count"], p["avg_score"]) for p in points],
+            [("2025-01-01", "2025-02-01", 2, 70.0), ("2025-03-01", "2025-04-01", 2, 80.0)],
+        )
+
+
+class TrendViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("charter", password="pw-123456")
+        self.client.force_login(self.user)
+
+    def test_serves_the_rollups(self):
+        save_profile(self.user, RECORD_FIELDS, AMOUNTS)
+
+        response = self.client.get(reverse("finance_trend"), {"points": "6"})
+
+        self.assertEqual(response.status_code, 200)
+        [point] = response.json()["points"]
+        self.assertEqual((point["count"], point["avg_score"]), (1, RECORD_FIELDS["score"]))
+
+    def test_rejects_a_bad_range(self):
+        response = self.client.get(reverse("finance_trend"), {"start": "2025-05-01", "end": "2025-01-01"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_bad_points(self):
+        for points in ("abc", "0", "121", "2.5"):
+            with self.subTest(points=points):
+                response = self.client.get(reverse("finance_trend"), {"points": points})
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["error"], "points must be an integer between 1 and 120.")
+
+
+class ScoreProfilesTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("scorer", password="pw-123456"))
+
+    def post(self, profiles):
+        return self.client.post(
+            reverse("score_profiles"), json.dumps({"profiles": profiles}), content_type="application/json",
+        )
+
+    def test_scores_in_input_order(self):
+        response = self.post([{"income": 80000, "fixed": 6000, **AMOUNTS}, {"income": 50000}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_rejects_amounts_that_are_not_finite(self):
+        response = self.post([
+            {"income": 80000},
+            {"income": "inf"},
+            {"income": 80000, "fixed": "nan"},
+            {"income": 80000, "rent": "-Infinity"},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["invalid_rows"], [1, 2, 3])
+
+    def test_rejects_a_zero_income(self):
+        response = self.post([{"income": 80000}, {"income": 0}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["invalid_rows"], [1])
+
+
+class LatestForTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("historian", password="pw-123456")
+
+    def test_newest_row_wins(self):
+        for name in ("first", "second", "third"):
+            SavingsGoal.objects.create(user=self.user, name=name, target_amount=1000)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(SavingsGoal.objects.latest_for(self.user).name, "third")
+
+    def test_no_rows(self):
+        self.assertIsNone(FinanceRecord.objects.latest_for(self.user))
+
+
+class TrajectoryTests(TestCase):
+    # (income, expenses, fixed) per submission, oldest first
+    HISTORY = [(80000, 42000, 6000), (80000, 70000, 30000), (60000, 58000, 25000), (90000, 30000, 0)]
+
+    def setUp(self):
+        self.user = User.objects.create_user("drifter", password="pw-123456")
+        self.scaler, self.hmm = registry.get_many("scaler", "hmm")
+
+    def submit(self, user, income, expenses, fixed):
+        fields = dict(RECORD_FIELDS, income=income, expenses=expenses, fixed_obligations=fixed)
+        # In compute_health's order: the state advances before the snapshot is saved
+        with transaction.atomic():
+            trajectory = advance_trajectory(user, income, expenses, fixed)
+            save_profile(user, fields, AMOUNTS)
+        return trajectory
+
+    def scaled(self, history):
+        return scale_features(build_features(*zip(*history)), self.scaler)
+
+    def test_online_state_matches_the_whole_history(self):
+        for row in self.HISTORY:
+            trajectory = self.submit(self.user, *row)
+
+        posterior = self.hmm.predict_proba(self.scaled(self.HISTORY))
+        np.testing.assert_allclose(np.exp(trajectory.log_alpha), posterior[-1], atol=1e-9)
+        self.assertEqual(trajectory.steps, len(self.HISTORY))
+        self.assertEqual(trajectory.previous_state, int(np.argmax(posterior[-2])))
+
+    def test_stale_model_rebuilds_from_history(self):
+        for row in self.HISTORY[:2]:
+            self.submit(self.user, *row)
+        FinanceTrajectory.objects.filter(user=self.user).update(model_key="retrained", log_alpha=[0, 0, 0])
+
+        trajectory = self.submit(self.user, *self.HISTORY[2])
+
+        posterior = self.hmm.predict_proba(self.scaled(self.HISTORY[:3]))
+        np.testing.assert_allclose(np.exp(trajectory.log_alpha), posterior[-1], atol=1e-9)
+        self.assertEqual(trajectory.steps, 3)
+
+    def test_batch_decode_and_rebuild(self):
+        other = User.objects.create_user("steady", password="pw-123456")
+        for row in self.HISTORY:
+            self.submit(self.user, *row)
+        self.submit(other, *self.HISTORY[0])
+        online = {t.user_id: t.log_alpha for t in FinanceTrajectory.objects.all()}
+
+        decoded = decode_all()
+        self.assertEqual(decoded[self.user.pk]["states"], self.hmm.predict(self.scaled(self.HISTORY)).tolist())
+        self.assertEqual(len(decoded[other.pk]["states"]), 1)
+
+        self.assertEqual(rebuild_all(), 2)
+        for t in FinanceTrajectory.objects.all():
+            np.testing.assert_allclose(t.log_alpha, online[t.user_id], atol=1e-9)
+
+
+class CrfHistoryTests(TestCase):
+    HISTORY = TrajectoryTests.HISTORY
+
+    def setUp(self):
+        caches[settings.FINMENTOR_SNAPSHOT_CACHE].clear()
+        self.user = User.objects.create_user("tagger", password="pw-123456")
+        self.scaler, self.crf = registry.get_many("scaler", "crf")
+
+    def save(self, income, expenses, fixed):
+        fields = dict(RECORD_FIELDS, income=income, expenses=expenses, fixed_obligations=fixed)
+        save_profile(self.user, fields, AMOUNTS)
+
+    def test_new_submissions_only_build_their_own_features(self):
+        for row in self.HISTORY[:-1]:
+            tag_history(self.user, *row)
+            self.save(*row)
+
+        with patch.object(trajectory_module, "feature_dicts", wraps=feature_dicts) as built:
+            tags = tag_history(self.user, *self.HISTORY[-1])
+
+        # Only the new one: the last saved one kept its features when tagged
+        self.assertEqual([len(call.args[0]) for call in built.call_args_list], [1])
+        self.assertEqual(len(tags), len(self.HISTORY))
+
+    def test_kept_features_only_stand_for_the_same_submission(self):
+        first, second, third = self.HISTORY[:3]
+        tag_history(self.user, *first)
+        self.save(*second)
+
+        tags = tag_history(self.user, *third)
+
+        items = feature_dicts(scale_features(build_features(*zip(second, third)), self.scaler))
+        self.assertEqual(tags, [int(label) for label in self.crf.predict([items])[0]])
+
+    def test_batch_tags_match_the_sequence_tags(self):
+        for row in self.HISTORY:
+            self.save(*row)
+
+        tags = tag_all()[self.user.pk]
+
+        items = feature_dicts(scale_features(build_features(*zip(*self.HISTORY)), self.scaler))
+        self.assertEqual(tags, [int(label) for label in self.crf.predict([items])[0]])
+        self.assertEqual(tag_history(self.user, *self.HISTORY[0])[:-1], tags)
+        self.assertEqual(len(tag_rows(self.crf, items)), len(items))
+
+
+class ComputeHealthTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("submitter", password="pw-123456")
+        self.client.force_login(self.user)
+
+    def test_submission_saves_profile(self):
+        response = self.client.post(reverse("compute_health"), dict(AMOUNTS, income=80000, fixed=6000))
+
+        self.assertRedirects(response, reverse("dashboard"), fetch_redirect_response=False)
+        record = FinanceRecord.objects.get(user=self.user)
+        self.assertEqual(record.expenses, sum(AMOUNTS.values()))
+        self.assertEqual(ExpenseCategory.objects.filter(user=self.user).count(), len(EXPENSE_CATEGORIES))
+
+    def test_hmm_votes_with_the_history(self):
+        for _ in range(2):
+            self.client.post(reverse("compute_health"), dict(AMOUNTS, income=80000, fixed=6000))
+
+        trajectory = FinanceTrajectory.objects.get(user=self.user)
+        self.assertEqual(trajectory.steps, 2)
+        self.assertEqual(self.client.session["hmm_output"], PERSONA_MAP[trajectory.state])
+
+    def test_hmm_timeout_still_advances_the_history(self):
+        self.client.post(reverse("compute_health"), dict(AMOUNTS, income=80000, fixed=6000))
+        timed_out = {"svm": 1, "hmm": NOT_AVAILABLE, "crf": NOT_AVAILABLE, "final": 1, "reason": REASON_PRIMARY}
+        with patch("financeapp.views.predict_persona", return_value=timed_out):
+            self.client.post(reverse("compute_health"), dict(AMOUNTS, income=60000, fixed=6000))
+
+        trajectory = FinanceTrajectory.objects.get(user=self.user)
+        self.assertEqual(trajectory.steps, FinanceSnapshot.objects.filter(user=self.user).count())
+        self.assertEqual(self.client.session["hmm_output"], PERSONA_MAP[trajectory.state])
+
+    def test_sequence_models_only_vote_over_the_history(self):
+        prediction_cache.clear()
+        self.addCleanup(prediction_cache.clear)
+        with patch("ml_models.ensemble.predict_rows") as hmm_rows, \
+                patch("ml_models.ensemble.tag_rows") as crf_rows:
+            self.client.post(reverse("compute_health"), dict(AMOUNTS, income=80000, fixed=6000))
+
+        hmm_rows.assert_not_called()
+        crf_rows.assert_not_called()
+        [crf_tag] = tag_all()[self.user.pk]
+        self.assertEqual(self.client.session["crf_output"], PERSONA_MAP[crf_tag])
+
+    @override_settings(FINMENTOR_PERSONA_ENGINE="distilled")
+    def test_distilled_persona_is_not_revoted(self):
+        prediction_cache.clear()
+        self.addCleanup(prediction_cache.clear)
+        rows = [(80000, 6000), (30000, 6000), (60000, 20000)]
+        for income, fixed in rows:
+            self.client.post(reverse("compute_health"), dict(AMOUNTS, income=income, fixed=fixed))
+
+            X = build_features([income], [sum(AMOUNTS.values())], [fixed])
+            tree = int(registry.get("distilled").predict(X)[0])
+            record = FinanceRecord.objects.get(user=self.user)
+            self.assertEqual(record.persona, PERSONA_MAP[tree])
+            self.assertEqual(self.client.session["selection_reason"], REASON_DISTILLED)
+
+        # The forward state still follows every submission
+        self.assertEqual(FinanceTrajectory.objects.get(user=self.user).steps, len(rows))
+
+
+class ProjectionTests(TestCase):
+    def test_over_allocated_goals_share_the_savings(self):
+        projection = project_goals(
+            target=[90000, 50000, 10000], saved=[0, 50000, 2000],
+            allocation_percent=[50, 30, 40], monthly_savings=12000,
+        )
+
+        np.testing.assert_allclose(projection.monthly, [5000, 3000, 4000])
+        self.assertEqual(projection.months.tolist(), [18, 0, 2])
+        self.assertEqual(projection.progress.tolist(), [0, 100, 20])
+        self.assertEqual(projection.allocation_total.tolist(), [120])
+        self.assertEqual(projection.over_allocated.tolist(), [True])
+
+    def test_batch_matches_one_user_at_a_time(self):
+        goals = {
+            0: ([90000, 20000], [10000, 0], [60, 40], 15000),
+            1: ([40000], [0], [30], -2000),
+            2: ([25000, 5000], [0, 0], [80, 50], 9000),
+        }
+        owners = [user for user, (target, _, _, _) in goals.items() for _ in target]
+        columns = [sum((goals[user][i] for user in goals), []) for i in range(3)]
+
+        batch = project_goals(*columns, [goals[user][3] for user in goals], owners)
+
+        for user, (target, saved, allocation, savings) in goals.items():
+            one = project_goals(target, saved, allocation, savings)
+            mine = np.array(owners) == user
+            np.testing.assert_array_equal(batch.months[mine], one.months)
+            self.assertEqual(batch.over_allocated[user], one.over_allocated[0])
+        # Negative savings fund nothing
+        self.assertTrue(np.isnan(batch.months[2]))
+
+    def test_etas_out_of_range_are_stored_as_never(self):
+        user = User.objects.create_user("dreamer", password="pw-123456")
+        goal = SavingsGoal.objects.create(user=user, name="Island", target_amount=1e15, allocation_percent=1)
+
+        refresh_projections([user], {user.pk: 100.0})  # 1e15 / 1 a month
+
+        goal.refresh_from_db()
+        self.assertIsNone(goal.eta_months)
+
+    def test_timeline_stops_at_the_target(self):
+        balances = timeline([10000, 5000], [0, 4000], [4000, 500], months=3)
+
+        self.assertEqual(balances.tolist(), [[0, 4000], [4000, 4500], [8000, 5000], [10000, 5000]])
+
+    def test_etas_follow_goal_and_savings_changes(self):
+        user = User.objects.create_user("planner", password="pw-123456")
+        self.client.force_login(user)
+        save_profile(user, RECORD_FIELDS, AMOUNTS)  # net balance 32000
+
+        self.client.post(reverse("add_goal"), {
+            "name": "Car", "target_amount": "160000", "allocation_percent": "50",
+        })
+        goal = SavingsGoal.objects.get(user=user)
+        self.assertEqual(goal.eta_months, 10)
+
+        self.client.post(reverse("compute_health"), dict(AMOUNTS, income=60000, fixed=6000))
+        goal.refresh_from_db()
+        self.assertEqual(goal.eta_months, 27)  # 160000 / (50% of 12000)
+
+        self.assertEqual(refresh_projections(), set())
+        response = self.client.get(reverse("savings"))
+        self.assertContains(response, "reached in 27 months")
+        self.assertEqual(len(response.context["timeline"]), 27)
+
+
+class SnapshotTests(TestCase):
+    PAGES = ["dashboard", "spending", "savings", "loans_emi", "action_plan", "input"]
+
+    def setUp(self):
+        caches[settings.FINMENTOR_SNAPSHOT_CACHE].clear()
+        self.user = User.objects.create_user("navigator", password="pw-123456")
+        save_profile(self.user, RECORD_FIELDS, AMOUNTS)
+        self.client.force_login(self.user)
+
+    def finance_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [q["sql"] for q in queries.captured_queries if "financeapp_" in q["sql"]]
+
+    def test_navigation_reads_the_cached_snapshot(self):
+        self.client.get(reverse("dashboard"))
+
+        for page in self.PAGES:
+            self.assertEqual(self.finance_queries(reverse(page)), [], page)
+
+    def test_goal_write_invalidates(self):
+        self.client.get(reverse("savings"))
+        self.client.post(reverse("add_goal"), {
+            "name": "Holiday", "target_amount": "90000", "allocation_percent": "25",
+        })
+
+        response = self.client.get(reverse("savings"))
+        self.assertEqual([g.name for g in response.context["goals"]], ["Holiday"])
+
+    def test_write_invalidates_the_users_other_sessions(self):
+        other = self.client_class()
+        other.force_login(self.user)
+        other.get(reverse("savings"))
+
+        self.client.post(reverse("add_goal"), {
+            "name": "Holiday", "target_amount": "90000", "allocation_percent": "25",
+        })
+
+        response = other.get(reverse("savings"))
+        self.assertEqual([g.name for g in response.context["goals"]], ["Holiday"])
+
+    def test_nightly_projection_invalidates(self):
+        SavingsGoal.objects.create(user=self.user, name="Car", target_amount=160000, allocation_percent=50)
+        self.client.get(reverse("savings"))
+
+        call_command("project_goals", stdout=StringIO())
+
+        response = self.client.get(reverse("savings"))
+        self.assertEqual([g.eta_months for g in response.context["goals"]], [10])
+        self.assertContains(response, "reached in 10 months")
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("timer", password="pw-123456")
+        save_profile(self.user, RECORD_FIELDS, AMOUNTS)
+        self.client.force_login(self.user)
+
+    @override_settings(FINMENTOR_SERVER_TIMING=True)
+    def test_phases_in_header_and_log(self):
+        with self.assertLogs("fintechsnap.timing", "INFO") as logs:
+            response = self.client.get(reverse("spending"))
+
+        phases = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+        self.assertEqual(phases, ["db", "session", "template", "total"])
+        [line] = logs.records
+        record = json.loads(line.getMessage())
+        self.assertEqual((record["path"], record["status"]), (reverse("spending"), 200))
+        self.assertGreater(record["phases"]["db"]["count"], 0)
+
+    def test_off_by_default(self):
+        response = self.client.get(reverse("spending"))
+
+        self.assertNotIn("Server-Timing", response)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+        patcher = patch.object(metrics, "registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_render(self):
+        requests = metrics.Counter("test_requests_total", "Requests.", ["path"])
+        latency = metrics.Histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        requests.inc(path="/a")
+        requests.inc(2, path="/a")
+        latency.observe(0.05)
+        latency.observe(0.5)
+
+        self.assertEqual(self.registry.render().splitlines(), [
+            "# HELP test_requests_total Requests.",
+            "# TYPE test_requests_total counter",
+            'test_requests_total{path="/a"} 3',
+            "# HELP test_latency_seconds Latency.",
+            "# TYPE test_latency_seconds histogram",
+            'test_latency_seconds_bucket{le="0.1"} 1',
+            'test_latency_seconds_bucket{le="1.0"} 2',
+            'test_latency_seconds_bucket{le="+Inf"} 2',
+            "test_latency_seconds_sum 0.55",
+            "test_latency_seconds_count 2",
+        ])
+
+    def test_scrape_sums_every_worker(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        directory = tmp.name
+        requests = metrics.Counter("test_requests_total", "Requests.")
+        workers = metrics.Gauge("test_workers", "Workers.")
+
+        with override_settings(FINMENTOR_METRICS_DIR=directory):
+            requests.inc()
+            workers.set(1)
+            # Another worker's files
+            metrics._MmapValues(os.path.join(directory, "total_1.db")).add(requests._key("", {}), 2)
+            metrics._MmapValues(os.path.join(directory, "live_1.db")).set(workers._key("", {}), 1)
+
+            self.assertIn("test_requests_total 3", self.registry.render())
+            self.assertIn("test_workers 2", self.registry.render())
+
+            # Counters outlive a worker, gauges do not
+            metrics.mark_process_dead(1, directory)
+            self.assertIn("test_requests_total 3", self.registry.render())
+            self.assertIn("test_workers 1", self.registry.render())
+
+
+class MetricsViewTests(TestCase):
+    def test_anonymous_scrapes_are_refused(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+    def test_staff_sessions_are_allowed(self):
+        self.client.force_login(User.objects.create_user("ops", password="pw-123456", is_staff=True))
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE finmentor_model_timeouts_total counter", response.content.decode())
+
+    @override_settings(FINMENTOR_METRICS_TOKEN="s3cret")
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+        self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+    def test_loopback_is_not_trusted_by_default(self):
+        self.assertEqual(self.client.get(reverse("metrics"), REMOTE_ADDR="127.0.0.1").status_code, 403)
+
+    @override_settings(FINMENTOR_METRICS_ALLOWED_NETWORKS=["10.0.0.0/8"])
+    def test_allowed_networks(self):
+        self.assertEqual(self.client.get(reverse("metrics"), REMOTE_ADDR="10.1.2.3").status_code, 200)
+        self.assertEqual(self.client.get(reverse("metrics"), REMOTE_ADDR="192.168.1.1").status_code, 403)
 
-# Create your tests here.
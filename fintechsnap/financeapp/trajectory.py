@@ -0,0 +1,204 @@
+# financeapp/trajectory.py
+#
+# Financial-state trajectories from the FinanceSnapshot history with the
+# persona HMM and CRF. Each user's HMM forward state (FinanceTrajectory) is
+# advanced by compute_health in O(K²) per submission instead of decoding
+# the whole history again; it is rebuilt from the history only when there
+# is none yet or the HMM was retrained since. The CRF tags the history and
+# the new submission as one sequence, from feature dicts cached per user
+# so only submissions not seen yet are turned into features, and a tagged
+# submission's are kept for when its snapshot is read back. decode_all(),
+# tag_all() and rebuild_all() run over every user's history at once (see
+# the rebuild_trajectories command).
+
+import hashlib
+from itertools import groupby
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from ml_models.crf.predict import feature_dicts, predict_crf, tag_sequences
+from ml_models.features import build_features, scale_features
+from ml_models.hmm.predict import (
+    emission_log_likelihood, forward_batch, forward_filter, forward_step,
+    model_key, trend_label, viterbi_batch,
+)
+from ml_models.manager import registry
+
+from .models import FinanceSnapshot, FinanceTrajectory
+
+# log 0 stand-in: JSON has no -Infinity, and exp() of this is still 0
+MIN_LOG_PROB = -1e4
+
+
+def _scaled(rows, scaler):
+    """Scaled feature rows of (income, expenses, fixed_obligations) tuples."""
+    if not rows:
+        return np.empty((0, len(scaler.mean_)))
+    income, expenses, fixed = zip(*rows)
+    return scale_features(build_features(income, expenses, fixed), scaler)
+
+
+def _history_rows(users=None):
+    snapshots = FinanceSnapshot.objects.order_by("user_id", "created_at", "id")
+    if users is not None:
+        snapshots = snapshots.filter(user__in=users)
+    return snapshots.values_list("user_id", "income", "expenses", "fixed_obligations")
+
+
+def _store(trajectory, log_alpha, key, steps):
+    log_alpha = np.maximum(log_alpha, MIN_LOG_PROB)
+    state = int(np.argmax(log_alpha))
+    trajectory.previous_state = trajectory.state if trajectory.steps else None
+    trajectory.state = state
+    trajectory.log_alpha = log_alpha.tolist()
+    trajectory.model_key = key
+    trajectory.steps = steps
+
+
+def advance_trajectory(user, income, expenses, fixed):
+    """
+    Fold a new submission into `user`'s forward state and save it; call
+    inside the transaction that stores the submission. Returns the
+    FinanceTrajectory, whose `state` is the HMM's view of the user now.
+
+    The row is locked for the update, so concurrent submissions of one
+    user advance the state one after the other.
+    """
+    scaler, hmm_model = registry.get_many("scaler", "hmm")
+    key = model_key(hmm_model)
+    log_emission = emission_log_likelihood(hmm_model, _scaled([(income, expenses, fixed)], scaler))[0]
+
+    trajectory = FinanceTrajectory.objects.select_for_update().filter(user=user).first()
+    if trajectory is None:
+        trajectory = FinanceTrajectory(user=user)
+
+    if trajectory.steps and trajectory.model_key == key:
+        log_alpha = forward_step(hmm_model, trajectory.log_alpha, log_emission)
+        steps = trajectory.steps + 1
+    else:
+        # First submission, or an HMM the state was not computed with
+        history = [row[1:] for row in _history_rows([user])]
+        log_alpha = forward_step(hmm_model, forward_filter(hmm_model, _scaled(history, scaler)), log_emission)
+        steps = len(history) + 1
+
+    _store(trajectory, log_alpha, key, steps)
+    trajectory.save()
+    return trajectory
+
+
+def _features_key(user, scaler):
+    # Feature dicts hold scaled values, so a retrained scaler starts afresh
+    digest = hashlib.sha1(np.concatenate([scaler.mean_, scaler.scale_]).tobytes()).hexdigest()
+    return f"finmentor:crf_features:{user.pk}:{digest}"
+
+
+def _history_features(user, scaler):
+    """
+    The cache entry of `user`'s CRF feature dicts, one per saved
+    submission, oldest first ("items"), and the cache and key it is stored
+    under. Only snapshots newer than the cached ones are read and turned
+    into features; the caller stores the entry back.
+    """
+    cache = caches[settings.FINMENTOR_SNAPSHOT_CACHE]
+    key = _features_key(user, scaler)
+    cached = cache.get(key) or {"last_id": 0, "items": []}
+
+    rows = list(
+        FinanceSnapshot.objects.filter(user=user, id__gt=cached["last_id"])
+        .order_by("created_at", "id")
+        .values_list("id", "income", "expenses", "fixed_obligations")
+    )
+    if rows:
+        new = rows
+        pending = cached.pop("pending", None)
+        if pending is not None and rows[0][1:] == pending[0]:
+            # The submission tag_history saw last, saved since
+            cached["items"].append(pending[1])
+            new = rows[1:]
+        if new:
+            cached["items"] += feature_dicts(_scaled([row[1:] for row in new], scaler))
+        cached["last_id"] = rows[-1][0]
+    return cache, key, cached
+
+
+def tag_history(user, income, expenses, fixed):
+    """
+    CRF persona tags of `user`'s history followed by a new submission,
+    decoded as one sequence; the last tag is the CRF's vote for the
+    submission.
+
+    The submission's features are cached with the history's as pending,
+    so once it is saved its snapshot's are not built again.
+    """
+    scaler, crf_model = registry.get_many("scaler", "crf")
+    cache, key, cached = _history_features(user, scaler)
+    current = feature_dicts(_scaled([(income, expenses, fixed)], scaler))
+    cached["pending"] = ((income, expenses, fixed), current[0])
+    cache.set(key, cached, settings.FINMENTOR_CRF_FEATURE_TTL)
+    return predict_crf(cached["items"] + current, crf_model)
+
+
+def _sequences(users=None):
+    scaler = registry.get("scaler")
+    user_ids, sequences = [], []
+    for user_id, rows in groupby(_history_rows(users), key=lambda row: row[0]):
+        user_ids.append(user_id)
+        sequences.append(_scaled([row[1:] for row in rows], scaler))
+    return user_ids, sequences
+
+
+def decode_all(users=None):
+    """
+    Viterbi state path and trend of every user's history (or of `users`),
+    decoded in one batch: {user_id: {"states": [...], "trend": ...}}.
+    """
+    user_ids, sequences = _sequences(users)
+    paths = viterbi_batch(registry.get("hmm"), sequences)
+    return {
+        user_id: {
+            "states": path.tolist(),
+            "trend": trend_label(int(path[-2]) if len(path) > 1 else None, int(path[-1])),
+        }
+        for user_id, path in zip(user_ids, paths)
+    }
+
+
+def tag_all(users=None):
+    """
+    CRF tags of every user's history (or of `users`), tagged in one batch
+    with one tagger: {user_id: [...]}.
+    """
+    user_ids, sequences = _sequences(users)
+    tags = tag_sequences(registry.get("crf"), [feature_dicts(s) for s in sequences])
+    return dict(zip(user_ids, tags))
+
+
+def rebuild_all(batch_size=1000):
+    """
+    Recompute every user's FinanceTrajectory from their history with the
+    current HMM (after retraining): one batched forward pass, then bulk
+    upserts. Returns the number of trajectories written.
+    """
+    hmm_model = registry.get("hmm")
+    key = model_key(hmm_model)
+    user_ids, sequences = _sequences()
+    log_alphas = forward_batch(hmm_model, sequences)
+
+    # The state before the newest submission, for the trend
+    previous = forward_batch(hmm_model, [s[:-1] for s in sequences])
+
+    trajectories = []
+    for user_id, sequence, log_alpha, before in zip(user_ids, sequences, log_alphas, previous):
+        trajectory = FinanceTrajectory(user_id=user_id)
+        if len(sequence) > 1:
+            trajectory.state, trajectory.steps = int(np.argmax(before)), len(sequence) - 1
+        _store(trajectory, log_alpha, key, len(sequence))
+        trajectories.append(trajectory)
+
+    FinanceTrajectory.objects.bulk_create(
+        trajectories, batch_size=batch_size, update_conflicts=True, unique_fields=["user"],
+        update_fields=["log_alpha", "state", "previous_state", "steps", "model_key", "updated_at"],
+    )
+    return len(trajectories)
@@ -0,0 +1,63 @@
+# financeapp/trends.py
+#
+# Trend series for the charts, read from FinanceRollup rather than the
+# FinanceSnapshot history: a date range costs one index range scan over at
+# most one row per month, however many submissions it covers.
+
+from .models import FinanceRollup
+
+DEFAULT_POINTS = 24
+MAX_POINTS = 120
+
+
+def _period_index(day, period):
+    """Months (or years) since year 0, so ranges can be split evenly."""
+    return day.year * 12 + day.month - 1 if period == FinanceRollup.MONTH else day.year
+
+
+def trend(user, start, end, period=FinanceRollup.MONTH, points=DEFAULT_POINTS):
+    """
+    Average score, income and savings rate of `user`'s submissions between
+    `start` and `end` (dates), as at most `points` points.
+
+    The range is cut into `points` equal spans of periods and the rollup
+    rows in each span are merged. Rows hold sums and counts, so a merged
+    point is the exact average of every submission in its span. Spans with
+    no submissions are left out.
+    """
+    first = FinanceRollup.period_starts(start)[period]
+    rows = (
+        FinanceRollup.objects
+        .filter(user=user, period=period, period_start__gte=first, period_start__lte=end)
+        .order_by("period_start")
+        .values_list("period_start", "count", "score_sum", "income_sum", "savings_rate_sum")
+    )
+
+    offset = _period_index(first, period)
+    span = _period_index(end, period) - offset + 1
+    points = max(1, min(points, span))
+
+    buckets = {}
+    for period_start, count, score_sum, income_sum, savings_rate_sum in rows:
+        bucket = buckets.setdefault(
+            (_period_index(period_start, period) - offset) * points // span,
+            {"start": period_start, "end": period_start, "count": 0,
+             "score": 0.0, "income": 0.0, "savings_rate": 0.0},
+        )
+        bucket["end"] = period_start
+        bucket["count"] += count
+        bucket["score"] += score_sum
+        bucket["income"] += income_sum
+        bucket["savings_rate"] += savings_rate_sum
+
+    return [
+        {
+            "start": b["start"].isoformat(),
+            "end": b["end"].isoformat(),
+            "count": b["count"],
+            "avg_score": round(b["score"] / b["count"], 2),
+            "avg_income": round(b["income"] / b["count"], 2),
+            "avg_savings_rate": round(b["savings_rate"] / b["count"], 2),
+        }
+        for _, b in sorted(buckets.items())
+    ]
@@ -1,23 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from django.urls import reverse_lazy
-from . import views
+from . import async_views, views
+
+# Read-only pages are served by their async versions under the ASGI profile
+pages = async_views if settings.FINMENTOR_ASYNC_VIEWS else views
 
 urlpatterns = [
     path('', views.landing, name='landing'),
     path('input/', views.input_page, name='input'),
     path('compute/', views.compute_health, name='compute_health'),
-    path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/', pages.dashboard, name='dashboard'),
     path('about/', views.about, name='about'),
+    path('health/models/', views.model_readiness, name='model_readiness'),
+    path('metrics/', views.metrics_view, name='metrics'),
 
     # Dashboard routes
-    path('spending/', views.spending_insights, name='spending'),
-    path('loans-emi/', views.loans_emi, name='loans_emi'),
-    path('action-plan/', views.action_plan, name='action_plan'),
+    path('spending/', pages.spending_insights, name='spending'),
+    path('loans-emi/', pages.loans_emi, name='loans_emi'),
+    path('action-plan/', pages.action_plan, name='action_plan'),
     path('action-plan/predict/', views.action_plan_predict, name='action_plan_predict'),
+    path('api/score/', views.score_profiles, name='score_profiles'),
+    path('api/trend/', views.finance_trend, name='finance_trend'),
 
     path('expenses/edit/', views.edit_expenses, name='edit_expenses'),
-    path('savings/', views.savings_goals, name='savings'),
+    path('savings/', pages.savings_goals, name='savings'),
     path('savings/goals/add/', views.add_goal, name='add_goal'),
     path('savings/goals/<int:goal_id>/edit/', views.edit_goal, name='edit_goal'),
     path('savings/goals/<int:goal_id>/delete/', views.delete_goal, name='delete_goal'),
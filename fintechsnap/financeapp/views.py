@@ -13,26 +13,69 @@ from django.conf import settings
 from django.core.mail import send_mail
 from django.utils import timezone
 import numpy as np
-from .models import FinanceRecord, ExpenseCategory, SavingsGoal
+from .models import (
+    CategorySummary, ExpenseCategory, FinanceRecord, FinanceRollup, FinanceSnapshot, SavingsGoal,
+)
+from .trends import DEFAULT_POINTS, MAX_POINTS, trend
+from .contexts import DASHBOARD_SESSION_KEYS, dashboard_context
+from .projections import refresh_projections
+from .snapshots import get_snapshot, invalidate_snapshot
+from .trajectory import advance_trajectory, tag_history
 from .forms import RegistrationForm
 import pandas as pd
 import json
 import os
-import joblib
 import secrets
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from datetime import timedelta
+import ipaddress
 import logging
-from django.utils.dateparse import parse_datetime
-
-PERSONA_MAP = {
-    0: "Financially Moderate",
-    1: "Financially Stable",
-    2: "Financially Stressed"
-}
+import time
+from django.db import DatabaseError, connection, transaction
+from django.utils.dateparse import parse_date, parse_datetime
+from fintechsnap import metrics
+from fintechsnap.metrics import Counter, Gauge
+from ml_models.manager import ModelLoadError, registry
+from ml_models.ensemble import (
+    OVERRIDE_RULES, PERSONA_MAP, REASON_DISTILLED,
+    model_pool, predict_persona, predict_personas, prediction_cache, vote,
+)
+from ml_models.hmm.predict import trend_label
+from ml_models.features import (
+    EMI_RATIO, EXPENSE_RATIO, NET_BALANCE, SAVINGS_RATE,
+    behaviour_labels, build_features, health_score,
+)
 
 logger = logging.getLogger(__name__)
+
+PERSONAS_PREDICTED = Counter(
+    "finmentor_personas_predicted_total", "Personas served, by persona and endpoint.",
+    ["persona", "endpoint"],
+)
+VOTE_OVERRIDES = Counter(
+    "finmentor_vote_overrides_total",
+    "compute_health predictions decided by an override rule instead of a majority.",
+    ["rule"],
+)
+DB_PING = Gauge(
+    "finmentor_db_ping_seconds",
+    "Round trip of SELECT 1 from the worker answering the scrape (NaN if the database is down).",
+)
+
+# (form field, category name, category type) for the expense breakdown
+EXPENSE_CATEGORIES = [
+    ("rent", "Rent", "Essential"),
+    ("groceries", "Groceries", "Essential"),
+    ("transport", "Transport", "Essential"),
+    ("utilities", "Utilities", "Essential"),
+    ("healthcare", "Healthcare", "Essential"),
+    ("education", "Education", "Essential"),
+    ("dining_out", "Dining Out", "Discretionary"),
+    ("shopping", "Shopping", "Discretionary"),
+    ("entertainment", "Entertainment", "Discretionary"),
+]
+
 # ------------------------------------------------------------------
 # LANDING
 # ------------------------------------------------------------------
@@ -40,7 +83,7 @@ def landing(request):
     context = {}
 
     if request.user.is_authenticated:
-        record = FinanceRecord.objects.filter(user=request.user).first()
+        record = get_snapshot(request).record
         context["has_data"] = bool(record)
 
         if record:
@@ -54,85 +97,29 @@ def landing(request):
 
     return render(request, "landing.html", context)
 
+
 @login_required
 def dashboard(request):
-    record = FinanceRecord.objects.filter(
-        user=request.user
-    ).order_by("-created_at").first()
+    record = get_snapshot(request).record
 
     if not record:
         messages.info(request, "Please fill in your financial details.")
         return redirect("input")
 
-    user_name = request.user.first_name or request.user.username
-    score = record.score or 0
-    
-
-    # ---------------- RISK LEVEL ----------------
-    if score < 40:
-        risk = "High Risk"
-    elif score < 70:
-        risk = "Moderate Risk"
-    else:
-        risk = "Low Risk"
-    
-
     # ---------------- USE STORED PREDICTIONS ----------------
-    svm_output = request.session.get("svm_output", "Not Available")
-    crf_output = request.session.get("crf_output", "Not Available")
-    hmm_output = request.session.get("hmm_output", "Not Available")
-
-    selection_reason = request.session.get("selection_reason", "")
-    # Final persona should ALWAYS match what was saved
-    final_output = record.persona
-    
-
-    # ---------------- CONTEXT ----------------
-    context = {
-        "user_name": user_name,
-        "risk": risk,
-        "persona": final_output,
-        "score": score,
-        "spending_behaviour": record.spending_behaviour,
-        "savings_behaviour": record.savings_behaviour,
-        "emi_status": record.emi_status,
-        "expense_ratio": round((record.expenses / record.income) * 100, 1)
-            if record.income > 0 else 0,
-        "emi_ratio": round((record.fixed_obligations / record.income) * 100, 1)
-            if record.income > 0 else 0,
-        "disposable_income": record.net_balance,
-        "savings_rate": round(record.savings_rate, 1),
-        "svm_output": svm_output,
-        "crf_output": crf_output,
-        "hmm_output": hmm_output,
-        "final_output": final_output,
-        "selection_reason": selection_reason,
+    outputs = {
+        key: request.session.get(key, default)
+        for key, default in DASHBOARD_SESSION_KEYS.items()
     }
 
-    return render(request, "dashboard.html", context)
+    return render(request, "dashboard.html", dashboard_context(request.user, record, outputs))
+
 
 @login_required
 def loans_emi(request):
-    record = FinanceRecord.objects.filter(
-        user=request.user
-    ).order_by("-created_at").first()
-
-    emi_ratio = 0
-    income = 0
-    existing_emis = 0
-
-    if record and record.income > 0:
-        income = record.income
-        existing_emis = record.fixed_obligations  # your total_emi
-        emi_ratio = round((existing_emis / income) * 100, 1)
-
-    context = {
-        "income": income,
-        "existing_emis": existing_emis,
-        "emi_ratio": emi_ratio,
-    }
+    snapshot = get_snapshot(request)
 
-    return render(request, "loans_emi.html", context)
+    return render(request, "loans_emi.html", snapshot.contexts["loans_emi"])
 
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
@@ -141,61 +128,13 @@ import json
 
 @login_required
 def action_plan(request):
-    record = FinanceRecord.objects.filter(
-        user=request.user
-    ).order_by("-created_at").first()
+    snapshot = get_snapshot(request)
 
-    if not record:
+    if not snapshot.record:
         messages.info(request, "Please fill in your financial details.")
         return redirect("input")
 
-    score = record.score or 0
-    savings_rate = record.savings_rate or 0  # already stored as %
-    emi_ratio = (record.fixed_obligations / record.income) * 100 if record.income > 0 else 0
-    expense_ratio = (record.expenses / record.income) * 100 if record.income > 0 else 0
-
-    # -------- RISK LABEL --------
-    if score < 40:
-        health_label = "High Risk"
-    elif score < 70:
-        health_label = "Moderate Risk"
-    else:
-        health_label = "Low Risk"
-
-    # -------- DYNAMIC ACTION PLAN --------
-    action_points = []
-
-    if savings_rate < 20:
-        action_points.append("Increase savings rate to at least 20% of income.")
-
-    if emi_ratio > 35:
-        action_points.append("Reduce EMI burden below 35% of income.")
-
-    if expense_ratio > 60:
-        action_points.append("Optimize discretionary spending to reduce expense ratio.")
-
-    if savings_rate >= 30:
-        action_points.append(
-            "Maintain your strong savings discipline and consider building a 6-month emergency fund."
-        )
-
-    if not action_points:
-        action_points.append(
-            "Your financial profile appears balanced. Continue maintaining your current savings and spending habits."
-        )
-    context = {
-        "score": score,
-        "health_label": health_label,
-        "savings_rate": round(savings_rate, 1),
-        "emi_to_income_pct": round(emi_ratio, 1),
-        "monthly_income": record.income,
-        "monthly_savings": record.net_balance,
-        "monthly_expenses": record.expenses,
-        "total_emi": record.fixed_obligations,
-        "action_points": action_points
-    }
-
-    return render(request, "action_plan.html", context)
+    return render(request, "action_plan.html", snapshot.contexts["action_plan"])
 
 
 @csrf_exempt
@@ -214,18 +153,13 @@ def action_plan_predict(request):
             return JsonResponse({"error": "Income must be greater than zero."})
 
         # -------- DERIVED METRICS --------
-        expense_ratio = expense / income
-        emi_ratio = emi / income
-        savings_rate = savings / income
+        X = build_features([income], [expense], [emi], savings=[savings])
+        expense_ratio = float(X[0, EXPENSE_RATIO])
+        emi_ratio = float(X[0, EMI_RATIO])
+        savings_rate = float(X[0, SAVINGS_RATE])
 
         # -------- SCORE FORMULA --------
-        score = (
-            (1 - expense_ratio) * 35 +
-            (1 - emi_ratio) * 25 +
-            savings_rate * 40
-        )
-
-        score = max(0, min(100, round(score, 1)))
+        score = float(health_score(X)[0])
 
         # -------- RISK LABEL --------
         if score < 40:
@@ -266,6 +200,8 @@ def add_goal(request):
             target_amount=float(target_amount),
             allocation_percent=float(allocation_percent),
         )
+        refresh_projections([request.user])
+        invalidate_snapshot(request)
 
         return redirect("savings")
 
@@ -279,6 +215,8 @@ def edit_goal(request, goal_id):
         goal.target_amount = request.POST.get("target_amount")
         goal.allocation_percent = request.POST.get("allocation_percent") or 0
         goal.save()
+        refresh_projections([request.user])
+        invalidate_snapshot(request)
 
         return redirect("savings")
 
@@ -289,114 +227,46 @@ def edit_goal(request, goal_id):
 def delete_goal(request, goal_id):
     goal = SavingsGoal.objects.get(id=goal_id, user=request.user)
     goal.delete()
+    refresh_projections([request.user])
+    invalidate_snapshot(request)
 
     return redirect("savings")
 
 
 @login_required
 def spending_insights(request):
-    record = FinanceRecord.objects.filter(user=request.user).order_by("-created_at").first()
+    snapshot = get_snapshot(request)
 
-    if not record:
+    if not snapshot.record:
         messages.info(request, "Please fill in your financial details to view spending insights.")
         return redirect("input")
-    expense_income_ratio = round(
-        (record.expenses / record.income) * 100, 1
-    ) if record.income > 0 else 0
-
-    categories = ExpenseCategory.objects.filter(user=request.user)
-    total_expenses = sum(c.amount for c in categories) if categories else 0
-
-    cat_data = []
-    for c in categories:
-        percent = round((c.amount / total_expenses) * 100, 1) if total_expenses > 0 else 0
-        cat_data.append({
-            "name": c.name,
-            "amount": c.amount,
-            "percent": percent,
-            "type": c.type,
-        })
-
-    top_category_name = None
-    top_category_pct = None
-    if cat_data:
-        top = max(cat_data, key=lambda x: x["amount"])
-        top_category_name = top["name"]
-        top_category_pct = top["percent"]
-
-    essentials_total = sum(c["amount"] for c in cat_data if c["type"] == "Essential")
-    discretionary_total = sum(c["amount"] for c in cat_data if c["type"] == "Discretionary")
-
-    essentials_pct = round((essentials_total / total_expenses) * 100, 1) if total_expenses > 0 else 0
-    discretionary_pct = round((discretionary_total / total_expenses) * 100, 1) if total_expenses > 0 else 0
-    
-    chart_labels = [c["name"] for c in cat_data]
-    chart_values = [c["amount"] for c in cat_data]
-
-    
-    context = {
-        "monthly_expenses": record.expenses,
-        "categories": cat_data,
-        "top_category_name": top_category_name,
-        "top_category_pct": top_category_pct,
-        "essentials_pct": essentials_pct,
-        "discretionary_pct": discretionary_pct,
-        "persona": record.persona,                
-        "spending_behaviour": record.spending_behaviour, 
-        "expense_income_ratio": expense_income_ratio, 
-        "chart_labels": chart_labels,
-        "chart_values": chart_values,
-        "monthly_income": record.income,
-    }
 
-    return render(request, "spending.html", context)
+    return render(request, "spending.html", snapshot.contexts["spending"])
 
 
 # ------------------------------------------------------------------
 # SAVINGS
 # ------------------------------------------------------------------
+
+
 @login_required
 def savings_goals(request):
-    record = FinanceRecord.objects.filter(user=request.user).order_by("-created_at").first()
+    snapshot = get_snapshot(request)
 
-    if not record:
+    if not snapshot.record:
         messages.info(request, "Please fill in your financial details.")
         return redirect("input")
 
-    savings_rate = record.savings_rate or 0
-
-    if savings_rate >= 30:
-        savings_health_label = "Strong"
-    elif savings_rate >= 15:
-        savings_health_label = "Moderate"
-    else:
-        savings_health_label = "Needs Improvement"
-
-    coverage_months = 0
-    if record.expenses > 0:
-        coverage_months = round(record.net_balance / record.expenses, 1)
-
-    goals = SavingsGoal.objects.filter(user=request.user)
-
-    context = {
-        "monthly_savings": record.net_balance,
-        "savings_rate": round(savings_rate, 1),
-        "coverage_months": coverage_months,
-        "savings_health_label": savings_health_label,
-        "goals": goals,
-        "persona": record.persona,
-    }
-
-    return render(request, "savings.html", context)
+    return render(request, "savings.html", snapshot.contexts["savings"])
 
 @login_required
 def input_page(request):
-    record = FinanceRecord.objects.filter(user=request.user).order_by("-created_at").first()
-    categories = ExpenseCategory.objects.filter(user=request.user)
+    snapshot = get_snapshot(request)
+    record = snapshot.record
 
     category_dict = {}
 
-    for cat in categories:
+    for cat in snapshot.categories:
         key = cat.name.replace(" ", "_")
         category_dict[key] = cat.amount
 
@@ -413,213 +283,342 @@ def compute_health(request):
     # ---------------- USER INPUT ----------------
     income = float(request.POST.get("income", 0) or 0)
     fixed = float(request.POST.get("fixed", 0) or 0)
-
-    rent = float(request.POST.get("rent", 0) or 0)
-    groceries = float(request.POST.get("groceries", 0) or 0)
-    transport = float(request.POST.get("transport", 0) or 0)
-    utilities = float(request.POST.get("utilities", 0) or 0)
-    dining_out = float(request.POST.get("dining_out", 0) or 0)
-    shopping = float(request.POST.get("shopping", 0) or 0)
-    entertainment = float(request.POST.get("entertainment", 0) or 0)
-    healthcare = float(request.POST.get("healthcare", 0) or 0)
-    education = float(request.POST.get("education", 0) or 0)
+    amounts = {
+        field: float(request.POST.get(field, 0) or 0) for field, _, _ in EXPENSE_CATEGORIES
+    }
 
     if income <= 0:
         messages.error(request, "Income must be greater than zero.")
         return redirect("input")
 
     # ---------------- CALCULATE TOTAL EXPENSES ----------------
-    expenses = (
-        rent + groceries + transport + utilities +
-        dining_out + shopping + entertainment +
-        healthcare + education
-    )
-
-    # ---------------- DERIVED METRICS ----------------
-    net_balance = income - expenses - fixed
-    savings_rate = net_balance / income if income > 0 else 0
-    emi_ratio = fixed / income if income > 0 else 0
-    expense_ratio = expenses / income if income > 0 else 0
+    expenses = sum(amounts.values())
 
-    # ---------------- NUMERIC ENCODING (FOR ML) ----------------
-    savings_numeric = 0 if savings_rate >= 0.2 else 1
-    spending_numeric = 0 if expense_ratio < 0.6 else 1
-    emi_numeric = 1 if emi_ratio < 0.4 else 0
+    # ---------------- FEATURES (SHARED WITH TRAINING) ----------------
+    X_raw = build_features([income], [expenses], [fixed])
+    net_balance = float(X_raw[0, NET_BALANCE])
+    savings_rate = float(X_raw[0, SAVINGS_RATE])
 
     # ---------------- LABELS (FOR DASHBOARD DISPLAY) ----------------
-    savings_label = "Good Saver" if savings_numeric == 0 else "Low Saver"
-    spending_label = "Moderate Spender" if spending_numeric == 0 else "High Spender"
-    emi_label = "Normal EMI" if emi_numeric == 1 else "High EMI Burden"
+    savings_labels, spending_labels, emi_labels = behaviour_labels(X_raw)
+    savings_label = savings_labels[0]
+    spending_label = spending_labels[0]
+    emi_label = emi_labels[0]
 
-    # ---------------- BUILD FEATURE VECTOR FOR ML ----------------
-    X_raw = [[
-        income,
-        expenses,
-        fixed,
-        emi_ratio,
-        expense_ratio,
-        savings_numeric,
-        emi_numeric,
-        spending_numeric,
-        net_balance,
-        savings_rate
-    ]]
-    
+    # ---------------- HYBRID ENSEMBLE PREDICTION ----------------
+    try:
+        # The HMM and CRF vote below, over the history
+        result = predict_persona(income, expenses, fixed, sequence_models=False)
+    except Exception as e:
+        logger.exception("Prediction failed")
+        messages.error(request, f"Prediction failed: {e}")
+        return redirect("input")
 
+    svm_pred = result["svm"]
+    hmm_pred = result["hmm"]
+    crf_pred = result["crf"]
+    final_pred = result["final"]
+    selection_reason = result["reason"]
+    hmm_trend = ""
 
-    from pathlib import Path
+    # ---------------- FINANCIAL HEALTH SCORE (0–100) ----------------
+    score = float(health_score(X_raw)[0])
+
+    with transaction.atomic():
+        # ---------------- HMM AND CRF OVER THE SUBMISSION HISTORY ----------------
+        # The (cached) SVM saw this submission on its own; the HMM and CRF
+        # vote with every submission so far, and the persona is voted again
+        # with them. If they cannot be loaded the SVM's vote stands.
+        # The distilled engine's persona comes from its tree alone (no SVM
+        # vote to side with), so it is never re-voted; its forward state
+        # still takes every submission, for the trend.
+        distilled = result["reason"] == REASON_DISTILLED
+        try:
+            trajectory = advance_trajectory(request.user, income, expenses, fixed)
+            hmm_trend = trend_label(trajectory.previous_state, trajectory.state)
+            if not distilled:
+                hmm_pred = trajectory.state
+                crf_pred = tag_history(request.user, income, expenses, fixed)[-1]
+        except ModelLoadError:
+            logger.exception("History models unavailable; keeping the SVM's vote")
+
+        if not distilled and (hmm_pred, crf_pred) != (result["hmm"], result["crf"]):
+            final, reasons = vote(
+                np.array([svm_pred]), np.array([hmm_pred]), np.array([crf_pred]), X_raw
+            )
+            final_pred, selection_reason = int(final[0]), reasons[0]
+
+        # ---------------- MAP FINAL PERSONA ----------------
+        persona = PERSONA_MAP.get(final_pred, "Unknown")
+
+        # ---------------- SAVE TO DATABASE ----------------
+        save_profile(request.user, {
+            "income": income,
+            "expenses": expenses,
+            "fixed_obligations": fixed,
+            "net_balance": net_balance,
+            "savings_rate": savings_rate * 100,
+            "score": score,
+            "persona": persona,
+            "savings_behaviour": savings_label,
+            "spending_behaviour": spending_label,
+            "emi_status": emi_label,
+        }, amounts)
+
+        # Goal ETAs follow the new monthly savings
+        refresh_projections([request.user], {request.user.pk: net_balance})
+    invalidate_snapshot(request)
+
+    PERSONAS_PREDICTED.inc(persona=persona, endpoint="compute_health")
+    if selection_reason in OVERRIDE_RULES:
+        VOTE_OVERRIDES.inc(rule=OVERRIDE_RULES[selection_reason])
+    request.session["selection_reason"] = selection_reason
 
-    MODEL_DIR = Path(__file__).resolve().parent.parent / "ml_models"
+    logger.debug("Ensemble: svm=%s hmm=%s crf=%s final=%s", svm_pred, hmm_pred, crf_pred, final_pred)
 
-    import logging
-    logger = logging.getLogger(__name__)
+    messages.success(request, "Your financial profile has been updated successfully.")
+    request.session["svm_output"] = PERSONA_MAP.get(svm_pred, "Not Available")
+    request.session["crf_output"] = PERSONA_MAP.get(crf_pred, "Not Available")
+    request.session["hmm_output"] = PERSONA_MAP.get(hmm_pred, "Not Available")
+    request.session["hmm_trend"] = hmm_trend
+    request.session["final_output"] = persona
+    return redirect("dashboard")
 
-    try:
-        svm_model = joblib.load(MODEL_DIR / "svm_model.pkl")
-        hmm_model = joblib.load(MODEL_DIR / "hmm_model.pkl")
-        crf_model = joblib.load(MODEL_DIR / "crf_model.pkl")
-        scaler = joblib.load(MODEL_DIR / "scaler.pkl")
-    except Exception as e:
-        logger.exception("Model loading failed")
-        messages.error(request, f"Model loading failed: {e}")
-        return redirect("input")
-    # Scale input
-    try:
-        X_scaled = scaler.transform(X_raw)
 
-        svm_pred = int(svm_model.predict(X_scaled)[0])
-        hmm_pred = int(hmm_model.predict(X_scaled)[0])
-    except Exception as e:
-        logger.exception("Prediction failed")
-        messages.error(request, f"Prediction failed: {e}")
-        return redirect("input")
+def save_profile(user, record_fields, amounts):
+    """
+    Store a submission as the user's FinanceRecord plus its expense
+    breakdown in one transaction of six statements, the same for a first
+    submission as for later ones: an upsert of the record (the unique
+    constraint on user settles concurrent first submissions), a DELETE and
+    one bulk INSERT of the EXPENSE_CATEGORIES rows, `amounts` keyed by form
+    field, an upsert of the CategorySummary computed from those rows, the
+    FinanceSnapshot INSERT and one upsert of its FinanceRollup rows.
+
+    The categories have no natural key to upsert on, and the snapshot is
+    needed (its created_at) before it can be rolled up, so those stay
+    separate statements.
+    """
+    record = FinanceRecord(user=user, **record_fields)
+    categories = [
+        ExpenseCategory(user=user, name=name, amount=amounts.get(field, 0.0), type=kind)
+        for field, name, kind in EXPENSE_CATEGORIES
+    ]
+    with transaction.atomic():
+        FinanceRecord.objects.bulk_create(
+            [record], update_conflicts=True, unique_fields=["user"], update_fields=list(record_fields),
+        )
+        ExpenseCategory.objects.filter(user=user).delete()
+        ExpenseCategory.objects.bulk_create(categories)
+        CategorySummary.objects.refresh_for(user, categories)
+
+        snapshot = FinanceSnapshot.objects.create(user=user, **{
+            name: record_fields[name] for name in (
+                "income", "expenses", "fixed_obligations", "net_balance",
+                "savings_rate", "score", "persona",
+            )
+        })
+        FinanceRollup.objects.add(snapshot)
+    return record
 
-    # CRF prediction
-    X_crf = [[{
-        "monthly_income": income,
-        "total_expense": expenses,
-        "total_emi": fixed,
-        "emi_ratio": emi_ratio,
-        "expense_ratio": expense_ratio,
-        "savings_behaviour": savings_numeric,
-        "emi_status": emi_numeric,
-        "spending_behaviour": spending_numeric,
-        "net_balance": net_balance,
-        "savings_rate": savings_rate
-    }]]
 
+# ------------------------------------------------------------------
+# BATCH SCORING API
+# ------------------------------------------------------------------
+@csrf_exempt
+@login_required
+@require_POST
+def score_profiles(request):
+    """
+    Score many profiles in one request.
+
+    Body: {"profiles": [{"income": ..., "fixed": ..., "rent": ..., ...}]}
+    (a bare list is accepted too). The ensemble runs once over the whole
+    batch; results come back in input order.
+    """
     try:
-        crf_raw = crf_model.predict(X_crf)[0][0]
-        crf_pred = int(crf_raw)
-    except Exception as e:
-        logger.exception("CRF prediction failed")
-        messages.error(request, f"CRF prediction failed: {e}")
-        return redirect("input")
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON body."}, status=400)
 
-    # ---------------- HYBRID ENSEMBLE VOTING ----------------
-    from collections import Counter
+    profiles = data.get("profiles") if isinstance(data, dict) else data
 
-    predictions = [svm_pred, crf_pred, hmm_pred]
-    counter = Counter(predictions)
+    if not isinstance(profiles, list) or not profiles:
+        return JsonResponse({"error": "Expected a non-empty list of profiles."}, status=400)
 
-    most_common_label, count = counter.most_common(1)[0]
+    max_batch = settings.FINMENTOR_MAX_BATCH_SIZE
+    if len(profiles) > max_batch:
+        return JsonResponse(
+            {"error": f"At most {max_batch} profiles can be scored per request."},
+            status=400,
+        )
 
-    if count >= 2:
-        agreeing_models = []
-        if svm_pred == most_common_label:
-            agreeing_models.append("SVM")
-        if crf_pred == most_common_label:
-            agreeing_models.append("CRF")
-        if hmm_pred == most_common_label:
-            agreeing_models.append("HMM")
+    fields = ["income", "fixed"] + [field for field, _, _ in EXPENSE_CATEGORIES]
 
-        final_pred = most_common_label
-        selection_reason = (
-            "Selected based on majority agreement between "
-            + " and ".join(agreeing_models) + "."
+    try:
+        values = np.array(
+            [[float(p.get(field, 0) or 0) for field in fields] for p in profiles],
+            dtype=np.float64,
         )
-    else:
-        # override logic
-        if savings_rate >= 0.4 and emi_ratio <= 0.1 and expense_ratio <= 0.5:
-            final_pred = 1
-            selection_reason = "Selected based on financial consistency override."
-        elif savings_rate <= 0.1 or emi_ratio >= 0.5:
-            final_pred = 2
-            selection_reason = "Selected based on financial stress override."
-        else:
-            final_pred = svm_pred
-            selection_reason = "Selected based on primary model (SVM)."
-    # ---------------- MAP FINAL PERSONA ----------------
-    persona = PERSONA_MAP.get(final_pred, "Unknown")
-    # 🔥 MOVE THIS OUTSIDE
-    request.session["selection_reason"] = selection_reason
-    # ---------------- FINANCIAL HEALTH SCORE (0–100) ----------------
-    score = (
-        (1 - expense_ratio) * 35 +
-        (1 - emi_ratio) * 25 +
-        savings_rate * 40
+    except (AttributeError, TypeError, ValueError):
+        return JsonResponse({"error": "Invalid input data."}, status=400)
+
+    income = values[:, 0]
+    fixed = values[:, 1]
+    expenses = values[:, 2:].sum(axis=1)
+
+    invalid_rows = np.flatnonzero(~np.isfinite(values).all(axis=1))
+    if invalid_rows.size:
+        return JsonResponse(
+            {
+                "error": "Amounts must be finite numbers.",
+                "invalid_rows": invalid_rows.tolist(),
+            },
+            status=400,
+        )
+
+    invalid_rows = np.flatnonzero(~(income > 0))
+    if invalid_rows.size:
+        return JsonResponse(
+            {
+                "error": "Income must be greater than zero.",
+                "invalid_rows": invalid_rows.tolist(),
+            },
+            status=400,
+        )
+
+    try:
+        result = predict_personas(build_features(income, expenses, fixed))
+    except Exception:
+        logger.exception("Batch prediction failed")
+        return JsonResponse({"error": "Prediction failed."}, status=500)
+
+    # NOT_AVAILABLE (-1, model not run by the distilled engine) indexes the last label
+    personas = np.array(
+        [PERSONA_MAP[k] for k in sorted(PERSONA_MAP)] + ["Not Available"], dtype=object
     )
 
-    score = max(0, min(100, round(score, 1)))
-
-    # ---------------- SAVE TO DATABASE ----------------
-    record = FinanceRecord.objects.filter(user=request.user).first()
-
-    if record:
-        # update existing record
-        record.income = income
-        record.expenses = expenses
-        record.fixed_obligations = fixed
-        record.net_balance = net_balance
-        record.savings_rate = savings_rate * 100
-        record.score = score
-        record.persona = persona
-        record.savings_behaviour = savings_label
-        record.spending_behaviour = spending_label
-        record.emi_status = emi_label
-    else:
-        # create new record
-        record = FinanceRecord.objects.create(
-            user=request.user,
-            income=income,
-            expenses=expenses,
-            fixed_obligations=fixed,
-            net_balance=net_balance,
-            savings_rate=savings_rate * 100,
-            score=score,
-            persona=persona,
-            savings_behaviour=savings_label,
-            spending_behaviour=spending_label,
-            emi_status=emi_label,
+    labels, counts = np.unique(result["final"], return_counts=True)
+    for label, count in zip(personas[labels].tolist(), counts.tolist()):
+        PERSONAS_PREDICTED.inc(count, persona=label, endpoint="score_profiles")
+
+    results = [
+        {
+            "persona": persona,
+            "score": score,
+            "svm_output": svm,
+            "hmm_output": hmm,
+            "crf_output": crf,
+            "selection_reason": reason,
+        }
+        for persona, score, svm, hmm, crf, reason in zip(
+            personas[result["final"]].tolist(),
+            result["score"].tolist(),
+            personas[result["svm"]].tolist(),
+            personas[result["hmm"]].tolist(),
+            personas[result["crf"]].tolist(),
+            result["reasons"],
         )
+    ]
 
-    record.save()
+    return JsonResponse({"count": len(results), "results": results})
 
-    print("SVM:", svm_pred)
-    print("HMM:", hmm_pred)
-    print("CRF:", crf_pred)
-    print("FINAL:", final_pred)
 
-    # ---------------- SAVE CATEGORY BREAKDOWN ----------------
-    ExpenseCategory.objects.filter(user=request.user).delete()
+# ------------------------------------------------------------------
+# TREND API
+# ------------------------------------------------------------------
+@login_required
+def finance_trend(request):
+    """
+    Score, income and savings-rate trend of the user's submissions.
+
+    Query: start/end (YYYY-MM-DD; default the 24 months up to today),
+    period ("month" or "year") and points (at most this many points,
+    default 24, up to 120). Served from the rollups.
+    """
+    today = timezone.localdate()
+    period = request.GET.get("period", FinanceRollup.MONTH)
+    if period not in dict(FinanceRollup.PERIODS):
+        return JsonResponse({"error": "period must be 'month' or 'year'."}, status=400)
 
-    ExpenseCategory.objects.create(user=request.user, name="Rent", amount=rent, type="Essential")
-    ExpenseCategory.objects.create(user=request.user, name="Groceries", amount=groceries, type="Essential")
-    ExpenseCategory.objects.create(user=request.user, name="Transport", amount=transport, type="Essential")
-    ExpenseCategory.objects.create(user=request.user, name="Utilities", amount=utilities, type="Essential")
-    ExpenseCategory.objects.create(user=request.user, name="Healthcare", amount=healthcare, type="Essential")
-    ExpenseCategory.objects.create(user=request.user, name="Education", amount=education, type="Essential")
+    try:
+        end = parse_date(request.GET["end"]) if "end" in request.GET else today
+        start = (
+            parse_date(request.GET["start"]) if "start" in request.GET
+            else end.replace(year=end.year - 2, day=1)
+        )
+    except ValueError:
+        start = end = None
+    if start is None or end is None or start > end:
+        return JsonResponse({"error": "Expected start <= end as YYYY-MM-DD."}, status=400)
 
-    ExpenseCategory.objects.create(user=request.user, name="Dining Out", amount=dining_out, type="Discretionary")
-    ExpenseCategory.objects.create(user=request.user, name="Shopping", amount=shopping, type="Discretionary")
-    ExpenseCategory.objects.create(user=request.user, name="Entertainment", amount=entertainment, type="Discretionary")
+    try:
+        points = int(request.GET.get("points", DEFAULT_POINTS))
+    except ValueError:
+        points = None
+    if points is None or not 1 <= points <= MAX_POINTS:
+        return JsonResponse({"error": f"points must be an integer between 1 and {MAX_POINTS}."}, status=400)
+
+    return JsonResponse({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "period": period,
+        "points": trend(request.user, start, end, period, points),
+    })
 
-    messages.success(request, "Your financial profile has been updated successfully.")
-    request.session["svm_output"] = PERSONA_MAP.get(svm_pred, "Unknown")
-    request.session["crf_output"] = PERSONA_MAP.get(crf_pred, "Unknown")
-    request.session["hmm_output"] = PERSONA_MAP.get(hmm_pred, "Unknown")
-    request.session["final_output"] = persona
-    return redirect("dashboard")
+
+# ------------------------------------------------------------------
+# MODEL READINESS
+# ------------------------------------------------------------------
+def model_readiness(request):
+    report = registry.readiness()
+    report["prediction_cache"] = prediction_cache.stats()
+    report["model_pool"] = model_pool.stats()
+    return JsonResponse(report, status=200 if report["ready"] else 503)
+
+
+# ------------------------------------------------------------------
+# METRICS
+# ------------------------------------------------------------------
+def _db_ping():
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        logger.exception("Database ping failed")
+        return float("nan")
+    return time.perf_counter() - started
+
+
+DB_PING.set_function(_db_ping)
+
+
+def _metrics_allowed(request):
+    if request.user.is_staff:
+        return True
+    token = settings.FINMENTOR_METRICS_TOKEN
+    if token and secrets.compare_digest(
+        request.META.get("HTTP_AUTHORIZATION", "").encode(), f"Bearer {token}".encode()
+    ):
+        return True
+    if not settings.FINMENTOR_METRICS_ALLOWED_NETWORKS:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.FINMENTOR_METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request):
+    """Prometheus text exposition of fintechsnap.metrics (staff, token or allowlisted scrapers only)."""
+    if not _metrics_allowed(request):
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
 
 
 # ------------------------------------------------------------------
@@ -0,0 +1,336 @@
+# fintechsnap/metrics.py
+#
+# In-process metrics: counters, gauges and fixed-bucket histograms,
+# rendered in the Prometheus text format by the /metrics/ view.
+#
+# Without FINMENTOR_METRICS_DIR the values live in this process only
+# (runserver, management commands, benchmarks). With it (the gunicorn
+# profiles set it) every process writes its values to its own mmap-backed
+# file in that directory and a scrape sums the files of all processes, so
+# whichever worker answers reports the whole server. Gauge files of exited
+# workers are removed by mark_process_dead() (gunicorn child_exit hook);
+# counter and histogram files stay so totals never go backwards.
+
+import bisect
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+_HEADER = struct.Struct("<I4x")  # bytes in use, padded to 8
+_KEY_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+_INITIAL_SIZE = 1 << 16
+
+# Gauges only describe live processes; counters and histograms accumulate
+LIVE, TOTAL = "live", "total"
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_dir():
+    from django.conf import settings
+
+    return getattr(settings, "FINMENTOR_METRICS_DIR", "") if settings.configured else ""
+
+
+# ---------------- VALUE STORES ----------------
+def _entry_size(encoded_key):
+    # key length + key padded to 8 bytes, then the double
+    return (_KEY_LENGTH.size + len(encoded_key) + 7) // 8 * 8 + _VALUE.size
+
+
+def _read_entries(data, used):
+    """(key, value, value offset) for every entry in a metrics file."""
+    pos = _HEADER.size
+    while pos < used:
+        (length,) = _KEY_LENGTH.unpack_from(data, pos)
+        key = bytes(data[pos + _KEY_LENGTH.size:pos + _KEY_LENGTH.size + length]).decode()
+        value_pos = pos + _entry_size(key.encode()) - _VALUE.size
+        yield key, _VALUE.unpack_from(data, value_pos)[0], value_pos
+        pos = value_pos + _VALUE.size
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return []
+    (used,) = _HEADER.unpack_from(data, 0)
+    return [(key, value) for key, value, _ in _read_entries(data, used)]
+
+
+class _MemoryValues:
+    def __init__(self):
+        self._values = {}
+
+    def add(self, key, amount):
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def items(self):
+        return list(self._values.items())
+
+
+class _MmapValues:
+    """
+    Float values by key in a file only this process writes. New keys are
+    appended (the file doubles when full); the used-bytes header is written
+    last, so a reader never sees a half-written entry.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size < _INITIAL_SIZE:
+            self._file.truncate(_INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        self._positions = {key: pos for key, _, pos in _read_entries(self._map, self._used)}
+
+    def _position(self, key):
+        pos = self._positions.get(key)
+        if pos is not None:
+            return pos
+
+        encoded = key.encode()
+        size = _entry_size(encoded)
+        if self._used + size > len(self._map):
+            capacity = len(self._map)
+            while self._used + size > capacity:
+                capacity *= 2
+            self._map.close()
+            self._file.truncate(capacity)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+
+        _KEY_LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _KEY_LENGTH.size:self._used + _KEY_LENGTH.size + len(encoded)] = encoded
+        pos = self._used + size - _VALUE.size
+        _VALUE.pack_into(self._map, pos, 0.0)
+        self._used += size
+        _HEADER.pack_into(self._map, 0, self._used)
+
+        self._positions[key] = pos
+        return pos
+
+    def add(self, key, amount):
+        pos = self._position(key)
+        _VALUE.pack_into(self._map, pos, _VALUE.unpack_from(self._map, pos)[0] + amount)
+
+    def set(self, key, value):
+        _VALUE.pack_into(self._map, self._position(key), value)
+
+    def items(self):
+        return [(key, _VALUE.unpack_from(self._map, pos)[0]) for key, pos in self._positions.items()]
+
+
+def mark_process_dead(pid, directory=None):
+    """Drop the gauges of an exited worker (gunicorn child_exit hook)."""
+    directory = directory or os.environ.get("FINMENTOR_METRICS_DIR", "")
+    if directory:
+        try:
+            os.remove(os.path.join(directory, f"{LIVE}_{pid}.db"))
+        except FileNotFoundError:
+            pass
+
+
+# ---------------- REGISTRY ----------------
+class MetricsRegistry:
+    """Every metric of the process and the store its values go to."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._stores = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _store(self, kind):
+        # A forked worker starts its own files instead of writing the parent's
+        if self._pid != os.getpid():
+            self._stores = {}
+            self._pid = os.getpid()
+
+        store = self._stores.get(kind)
+        if store is None:
+            directory = metrics_dir()
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+                store = _MmapValues(os.path.join(directory, f"{kind}_{self._pid}.db"))
+            else:
+                store = _MemoryValues()
+            self._stores[kind] = store
+        return store
+
+    def add(self, kind, updates):
+        with self._lock:
+            store = self._store(kind)
+            for key, amount in updates:
+                store.add(key, amount)
+
+    def set(self, kind, key, value):
+        with self._lock:
+            self._store(kind).set(key, value)
+
+    def collect(self):
+        """{key: value} summed over every process (or this one)."""
+        totals = defaultdict(float)
+        directory = metrics_dir()
+        if directory:
+            for path in glob.glob(os.path.join(directory, "*.db")):
+                for key, value in _read_file(path):
+                    totals[key] += value
+        else:
+            with self._lock:
+                for kind in (LIVE, TOTAL):
+                    for key, value in self._store(kind).items():
+                        totals[key] += value
+        return totals
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        samples = defaultdict(list)
+        for key, value in self.collect().items():
+            name, suffix, labels = json.loads(key)
+            samples[name].append((suffix, dict(labels), value))
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for suffix, labels, value in metric.expose(samples.get(name, [])):
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"'))
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+registry = MetricsRegistry()
+
+
+# ---------------- METRIC TYPES ----------------
+class _Metric:
+    kind = None
+    store = TOTAL
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        registry.register(self)
+
+    def _key(self, suffix, labels, extra=()):
+        cache_key = (suffix, tuple(labels.get(n) for n in self.labelnames), extra)
+        key = self._keys.get(cache_key)
+        if key is None:
+            if set(labels) != set(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+            items = [[n, str(labels[n])] for n in self.labelnames] + [list(e) for e in extra]
+            key = self._keys[cache_key] = json.dumps([self.name, suffix, items])
+        return key
+
+    def expose(self, samples):
+        return sorted(samples, key=lambda s: (s[0], sorted(s[1].items())))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        registry.add(self.store, [(self._key("", labels), amount)])
+
+
+class Gauge(_Metric):
+    """
+    Summed over live workers. A gauge with set_function() is evaluated by
+    the process answering the scrape instead of being stored.
+    """
+
+    kind = "gauge"
+    store = LIVE
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        registry.set(self.store, self._key("", labels), value)
+
+    def inc(self, amount=1, **labels):
+        registry.add(self.store, [(self._key("", labels), amount)])
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        self._function = function
+
+    def expose(self, samples):
+        if self._function is not None:
+            return [("", {}, float(self._function()))]
+        return super().expose(samples)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets)) + (math.inf,)
+        self._bounds = [_format_value(b) if math.isinf(b) else repr(b) for b in self.buckets]
+
+    def observe(self, value, **labels):
+        bound = self._bounds[bisect.bisect_left(self.buckets, value)]
+        registry.add(self.store, [
+            (self._key("_bucket", labels, (("le", bound),)), 1),
+            (self._key("_sum", labels), value),
+        ])
+
+    def expose(self, samples):
+        series = defaultdict(lambda: {"buckets": defaultdict(float), "sum": 0.0})
+        for suffix, labels, value in samples:
+            le = labels.pop("le", None)
+            entry = series[tuple(sorted(labels.items()))]
+            if suffix == "_bucket":
+                entry["buckets"][le] += value
+            else:
+                entry["sum"] += value
+
+        exposed = []
+        for labels, entry in sorted(series.items()):
+            cumulative = 0.0
+            for bound in self._bounds:
+                cumulative += entry["buckets"].get(bound, 0.0)
+                exposed.append(("_bucket", dict(labels, le=bound), cumulative))
+            exposed.append(("_sum", dict(labels), entry["sum"]))
+            exposed.append(("_count", dict(labels), cumulative))
+        return exposed
@@ -32,7 +32,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'financeapp.middleware.ServerTimingMiddleware',
+    'financeapp.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -49,7 +50,8 @@ ROOT_URLCONF = 'fintechsnap.urls'
 # ---------------------------
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render time reported to ServerTimingMiddleware
+        'BACKEND': 'fintechsnap.timing.TimedDjangoTemplates',
         'DIRS': [
             BASE_DIR / "fintechsnap" / "templates",   # main templates folder
             BASE_DIR / "templates",                   # optional project-level templates folder
@@ -143,6 +145,111 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ---------------------------
+#        ML MODELS
+# ---------------------------
+# Load the persona models at startup (set FINMENTOR_PRELOAD_MODELS=false
+# to skip it, e.g. for one-off management commands).
+FINMENTOR_PRELOAD_MODELS = os.environ.get('FINMENTOR_PRELOAD_MODELS', 'true').lower() == 'true'
+
+# SVM engine served by the model registry: "exact" (RBF SVC) or "approx"
+# (Nystroem feature map + linear SVM, see train_models' svm_approx report).
+FINMENTOR_SVM_ENGINE = os.environ.get('FINMENTOR_SVM_ENGINE', 'exact')
+
+# Persona engine: "ensemble" (SVM + HMM + CRF vote) or "distilled" (one
+# decision tree fitted to the ensemble, see train_models --distill).
+FINMENTOR_PERSONA_ENGINE = os.environ.get('FINMENTOR_PERSONA_ENGINE', 'ensemble')
+
+# LRU/TTL cache in front of the ensemble for single-profile predictions;
+# amounts are quantized to FINMENTOR_PREDICTION_CACHE_QUANTUM before lookup.
+FINMENTOR_PREDICTION_CACHE_SIZE = int(os.environ.get('FINMENTOR_PREDICTION_CACHE_SIZE', 4096))
+FINMENTOR_PREDICTION_CACHE_TTL = float(os.environ.get('FINMENTOR_PREDICTION_CACHE_TTL', 600))
+FINMENTOR_PREDICTION_CACHE_QUANTUM = float(os.environ.get('FINMENTOR_PREDICTION_CACHE_QUANTUM', 10))
+
+# Thread pool shared by all requests for running SVM/HMM/CRF concurrently,
+# and the per-model deadline in seconds (counted from when the model starts
+# running). 0, the default, runs them one after another in the request
+# thread without a deadline: for single profiles that is faster than the
+# pool (see the model_pool stats on /health/models/).
+FINMENTOR_MODEL_POOL_SIZE = int(os.environ.get('FINMENTOR_MODEL_POOL_SIZE', 0))
+FINMENTOR_MODEL_TIMEOUT = float(os.environ.get('FINMENTOR_MODEL_TIMEOUT', 2.0))
+
+# Reference dataset behind the nearest-profile lookup in analysis/.
+FINMENTOR_DATASET_PATH = Path(os.environ.get(
+    'FINMENTOR_DATASET_PATH', BASE_DIR / 'data' / 'Finmentor_Data_REDESIGNED.xlsx'
+))
+
+# Memory-mappable columnar copy of the dataset (manage.py build_dataset_cache).
+FINMENTOR_DATASET_CACHE_DIR = Path(os.environ.get(
+    'FINMENTOR_DATASET_CACHE_DIR', BASE_DIR / 'data' / 'cache'
+))
+
+# Build the nearest-profile index at startup instead of on first request.
+FINMENTOR_PRELOAD_INDEX = os.environ.get('FINMENTOR_PRELOAD_INDEX', 'false').lower() == 'true'
+
+# Upper bound on profiles accepted by the batch scoring endpoint.
+FINMENTOR_MAX_BATCH_SIZE = int(os.environ.get('FINMENTOR_MAX_BATCH_SIZE', 10000))
+
+# Serve the read-only pages (dashboard, spending, savings, loans, action
+# plan) from financeapp.async_views; enable together with an ASGI server
+# (see deploy/gunicorn_asgi.py).
+FINMENTOR_ASYNC_VIEWS = os.environ.get('FINMENTOR_ASYNC_VIEWS', 'false').lower() == 'true'
+
+# Per-request phase timings (db, session, model, template, total) as a
+# Server-Timing header and a JSON log line on the fintechsnap.timing logger.
+FINMENTOR_SERVER_TIMING = os.environ.get('FINMENTOR_SERVER_TIMING', 'false').lower() == 'true'
+
+SESSION_ENGINE = 'financeapp.sessions'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('FINMENTOR_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('FINMENTOR_CACHE_LOCATION', 'fintechsnap'),
+    }
+}
+
+# Per-user dashboard snapshots (financeapp.snapshots): cache alias and
+# lifetime in seconds. Writes invalidate them, so the TTL only bounds how
+# long an idle snapshot occupies the cache.
+FINMENTOR_SNAPSHOT_CACHE = os.environ.get('FINMENTOR_SNAPSHOT_CACHE', 'default')
+FINMENTOR_SNAPSHOT_TTL = int(os.environ.get('FINMENTOR_SNAPSHOT_TTL', 900))
+
+# CRF feature dicts of users' past submissions (financeapp.trajectory), in
+# the snapshot cache. Only rows newer than the cached ones are rebuilt, so
+# an expired entry just costs one rebuild of that user's history.
+FINMENTOR_CRF_FEATURE_TTL = int(os.environ.get('FINMENTOR_CRF_FEATURE_TTL', 86400))
+
+# Longest month-by-month savings timeline shown on /savings/; ETAs past it
+# are still computed (manage.py project_goals stores them nightly).
+FINMENTOR_PROJECTION_HORIZON = int(os.environ.get('FINMENTOR_PROJECTION_HORIZON', 120))
+
+# Metrics (fintechsnap.metrics) served at /metrics/. With a directory set,
+# every worker writes its values to a file there and a scrape sums them;
+# the gunicorn profiles set one. Scrapes are allowed from staff sessions,
+# with "Authorization: Bearer <FINMENTOR_METRICS_TOKEN>", and from the
+# networks listed (only where REMOTE_ADDR is the scraper's own address,
+# not a proxy's). Both are off unless set.
+FINMENTOR_METRICS_DIR = os.environ.get('FINMENTOR_METRICS_DIR', '')
+FINMENTOR_METRICS_TOKEN = os.environ.get('FINMENTOR_METRICS_TOKEN', '')
+FINMENTOR_METRICS_ALLOWED_NETWORKS = [
+    n.strip() for n in os.environ.get('FINMENTOR_METRICS_ALLOWED_NETWORKS', '').split(',')
+    if n.strip()
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'fintechsnap.timing': {'handlers': ['timing'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'landing'
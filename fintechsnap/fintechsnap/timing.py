@@ -0,0 +1,98 @@
+# fintechsnap/timing.py
+#
+# Per-request phase timings (SQL, model inference, template rendering,
+# session I/O) collected by financeapp.middleware.ServerTimingMiddleware.
+#
+# Code anywhere in the request wraps a phase in `with phase("model"):`.
+# Outside a timed request (middleware off, management commands, benchmarks)
+# that is a single ContextVar lookup.
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.template.backends.django import DjangoTemplates
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Accumulated duration (seconds) and count per phase for one request."""
+
+    def __init__(self):
+        self.durations = {}
+        self.counts = {}
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    # connection.execute_wrapper hook: every SQL statement counts as "db"
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - started)
+
+    def as_dict(self):
+        return {
+            name: {"ms": round(seconds * 1000, 3), "count": self.counts[name]}
+            for name, seconds in self.durations.items()
+        }
+
+    def header(self, total_seconds):
+        """Server-Timing value, e.g. 'db;dur=2.1;desc="3 queries", total;dur=9.8'."""
+        entries = []
+        for name, seconds in self.durations.items():
+            entry = f"{name};dur={seconds * 1000:.2f}"
+            if name == "db":
+                entry += f';desc="{self.counts[name]} queries"'
+            entries.append(entry)
+        entries.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def activate(timings):
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def phase(name):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+# ---------------- TEMPLATES ----------------
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with phase("template"):
+            return self.template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend whose templates time render() as "template"."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
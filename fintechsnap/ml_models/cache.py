@@ -0,0 +1,120 @@
+# ml_models/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from fintechsnap.metrics import Counter, Gauge
+
+CACHE_REQUESTS = Counter(
+    "finmentor_cache_requests_total",
+    "Cache lookups by result (hit, miss, coalesced onto an in-flight miss).",
+    ["cache", "result"],
+)
+CACHE_ENTRIES = Gauge("finmentor_cache_entries", "Entries held by the cache.", ["cache"])
+
+
+class _Pending:
+    """An in-flight computation other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with a TTL and single-flight computation.
+
+    Keys are (model version, quantized inputs). When the model version
+    changes (registry.reload()), every entry is dropped. Concurrent misses
+    for the same key run the computation once; the other callers wait for
+    its result. `cacheable` can veto storing a computed value (it is still
+    returned to every waiting caller). Lookups are counted in the
+    finmentor_cache_* metrics under `name`.
+    """
+
+    def __init__(self, maxsize=4096, ttl=600.0, name="prediction"):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        CACHE_ENTRIES.set(0, cache=self.name)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def get_or_compute(self, version, key, compute, cacheable=None):
+        now = time.monotonic()
+
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                result = "hit"
+            else:
+                pending = self._pending.get(key)
+                if pending is not None:
+                    self.coalesced += 1
+                    result = "coalesced"
+                else:
+                    self.misses += 1
+                    pending = self._pending[key] = _Pending()
+                    result = "miss"
+
+        CACHE_REQUESTS.inc(cache=self.name, result=result)
+
+        if result == "hit":
+            return entry[1]
+
+        if result == "coalesced":
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = compute()
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+                if (pending.error is None and version == self._version
+                        and (cacheable is None or cacheable(pending.value))):
+                    self._entries[key] = (time.monotonic() + self.ttl, pending.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                size = len(self._entries)
+            pending.done.set()
+            CACHE_ENTRIES.set(size, cache=self.name)
+
+        return pending.value
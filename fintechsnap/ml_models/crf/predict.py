@@ -1,2 +1,63 @@
-def predict_crf(user_data):
-    return ["Necessary"]
+import threading
+import weakref
+
+import pycrfsuite
+
+from ml_models.features import FEATURES
+
+_local = threading.local()
+
+
+def feature_dicts(X_scaled):
+    # The CRF was trained on scaled features, like the SVM and HMM
+    return [dict(zip(FEATURES, row)) for row in X_scaled.tolist()]
+
+
+def tagger(crf_model):
+    """
+    The calling thread's pycrfsuite tagger for crf_model, opened on first
+    use and reused afterwards. A Tagger holds the sequence being tagged,
+    so the model pool's threads each get their own rather than sharing
+    crf_model.tagger_.
+    """
+    taggers = getattr(_local, "taggers", None)
+    if taggers is None:
+        taggers = _local.taggers = weakref.WeakKeyDictionary()
+
+    opened = taggers.get(crf_model)
+    if opened is None:
+        opened = taggers[crf_model] = pycrfsuite.Tagger()
+        opened.open(crf_model.modelfile.name)
+    return opened
+
+
+def tag_rows(crf_model, feature_dicts):
+    """
+    Tag every feature dict as its own length-1 sequence, reusing the
+    thread's compiled pycrfsuite tagger.
+    """
+    tag = tagger(crf_model).tag
+    return [tag([features])[0] for features in feature_dicts]
+
+
+def tag_sequences(crf_model, sequences):
+    """
+    Tag many sequences of feature dicts (one per user, oldest first) with
+    one tagger; labels come back as ints, one list per sequence.
+    """
+    tag = tagger(crf_model).tag
+    return [[int(label) for label in tag(items)] if items else [] for items in sequences]
+
+
+def predict_crf(items, crf_model=None):
+    """
+    Persona label of every item of one user's feature-dict sequence,
+    decoded jointly so the CRF's transition weights between consecutive
+    submissions apply.
+    """
+    if crf_model is None:
+        from ml_models.manager import registry
+
+        crf_model = registry.get("crf")
+    [tags] = tag_sequences(crf_model, [items])
+    return tags
@@ -0,0 +1,173 @@
+# ml_models/dataset.py
+#
+# Columnar cache of the Finmentor workbook. The .xlsx is parsed once into
+# one .npy file per column plus a manifest keyed on the workbook's SHA-256;
+# every consumer memory-maps those files instead of re-reading Excel.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DEFAULT_DATASET = DATA_DIR / "Finmentor_Data_REDESIGNED.xlsx"
+DEFAULT_CACHE_DIR = DATA_DIR / "cache"
+
+MANIFEST = "manifest.json"
+CACHE_FORMAT = 1
+
+
+def _setting(name, default):
+    from django.conf import settings
+
+    if settings.configured:
+        return Path(getattr(settings, name, default))
+    return Path(default)
+
+
+def default_source():
+    return _setting("FINMENTOR_DATASET_PATH", DEFAULT_DATASET)
+
+
+def cache_dir_for(source, cache_root=None):
+    root = Path(cache_root) if cache_root else _setting("FINMENTOR_DATASET_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return root / Path(source).stem
+
+
+# ---------------- HASHING ----------------
+_hashes = {}
+
+
+def source_hash(source):
+    """SHA-256 of the source file, memoised per (path, size, mtime)."""
+    source = Path(source)
+    stat = source.stat()
+    key = (str(source), stat.st_size, stat.st_mtime_ns)
+
+    digest = _hashes.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _hashes[key] = digest
+    return digest
+
+
+def read_manifest(cache_dir):
+    try:
+        with open(Path(cache_dir) / MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(source, cache_dir):
+    manifest = read_manifest(cache_dir)
+    return (
+        manifest is not None
+        and manifest.get("format") == CACHE_FORMAT
+        and manifest.get("sha256") == source_hash(source)
+    )
+
+
+# ---------------- BUILD ----------------
+def _column_array(column):
+    if is_numeric_dtype(column):
+        return column.to_numpy()
+    # Fixed-width unicode keeps text columns memory-mappable
+    return column.astype(str).to_numpy().astype(np.str_)
+
+
+def _atomic_save(path, array):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(tmp, path)
+
+
+def build_cache(source=None, cache_dir=None):
+    """
+    Parse the workbook and write the columnar cache. Columns are replaced
+    atomically and the manifest is written last, so concurrent readers see
+    either the old or the new cache.
+    """
+    source = Path(source or default_source())
+    cache_dir = Path(cache_dir or cache_dir_for(source))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    df = pd.read_excel(source)
+
+    columns = {}
+    for name in df.columns:
+        array = _column_array(df[name])
+        _atomic_save(cache_dir / f"{name}.npy", array)
+        columns[str(name)] = array.dtype.str
+
+    manifest = {
+        "format": CACHE_FORMAT,
+        "source": str(source),
+        "sha256": source_hash(source),
+        "rows": len(df),
+        "columns": columns,
+    }
+
+    tmp = cache_dir / f".{MANIFEST}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, cache_dir / MANIFEST)
+
+    logger.info(
+        "Cached %s (%d rows) in %.2fs", source.name, len(df), time.perf_counter() - started
+    )
+    return manifest
+
+
+# ---------------- LOAD ----------------
+_build_lock = threading.Lock()
+
+
+def load_columns(source=None, columns=None, cache_dir=None, rebuild=True):
+    """
+    Memory-mapped column arrays of the dataset, keyed by column name.
+
+    If the cache is missing or its hash does not match the source file it
+    is rebuilt first (unless rebuild=False, which raises instead).
+    """
+    source = Path(source or default_source())
+    cache_dir = Path(cache_dir or cache_dir_for(source))
+
+    if not is_fresh(source, cache_dir):
+        if not rebuild:
+            raise FileNotFoundError(
+                f"No up-to-date dataset cache for {source} in {cache_dir}; "
+                "run `python manage.py build_dataset_cache`."
+            )
+        with _build_lock:
+            if not is_fresh(source, cache_dir):
+                logger.warning("Dataset cache for %s is stale, rebuilding", source.name)
+                build_cache(source, cache_dir)
+
+    manifest = read_manifest(cache_dir)
+    names = columns or list(manifest["columns"])
+
+    return {
+        name: np.load(cache_dir / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+        for name in names
+    }
+
+
+def load_frame(source=None, columns=None, cache_dir=None, rebuild=True):
+    """load_columns() wrapped in a DataFrame, for pandas-based consumers."""
+    return pd.DataFrame(load_columns(source, columns, cache_dir, rebuild))
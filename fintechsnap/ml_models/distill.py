@@ -0,0 +1,179 @@
+# ml_models/distill.py
+#
+# Distil the SVM + HMM + CRF ensemble (majority vote + override rules) into
+# one decision tree: label a synthetic sweep of the input space with the
+# full ensemble, fit a tree on the raw feature matrix, and serve it as
+# plain NumPy arrays.
+
+import math
+import time
+
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from ml_models.features import build_features
+
+DEFAULT_SAMPLES = 200_000
+DEFAULT_MAX_DEPTH = 14
+
+# Batches up to this size are walked row by row in Python
+SMALL_BATCH = 16
+
+# Sweep ranges (monthly amounts in the dataset's currency, ratios of income)
+INCOME_RANGE = (5_000.0, 500_000.0)
+EXPENSE_RATIO_RANGE = (0.0, 1.6)
+EMI_RATIO_RANGE = (0.0, 0.9)
+
+# Share of the sweep drawn around the anchor profiles, and their spread
+# (log-normal sigma applied to each amount independently)
+ANCHOR_SHARE = 0.5
+ANCHOR_JITTER = 0.15
+
+
+class CompiledTree:
+    """
+    Serving form of a fitted DecisionTreeClassifier.
+
+    The tree is flattened into arrays and evaluated level by level for all
+    rows at once, without sklearn's per-call input validation.
+    """
+
+    def __init__(self, tree):
+        t = tree.tree_
+        leaf = t.children_left == -1
+
+        self.feature = np.where(leaf, 0, t.feature).astype(np.intp)
+        self.threshold = np.where(leaf, np.inf, t.threshold)
+        self.left = np.where(leaf, np.arange(t.node_count), t.children_left).astype(np.intp)
+        self.right = np.where(leaf, np.arange(t.node_count), t.children_right).astype(np.intp)
+        self.depth = int(tree.get_depth())
+        self.leaf_class = tree.classes_[np.argmax(t.value[:, 0, :], axis=1)]
+        self.classes_ = tree.classes_
+
+        # Plain-list copy for walking a handful of rows without NumPy overhead
+        self._nodes = list(zip(
+            self.feature.tolist(), self.threshold.tolist(),
+            self.left.tolist(), self.right.tolist(), (~leaf).tolist(),
+        ))
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.shape[0] <= SMALL_BATCH:
+            return self.leaf_class[[self._walk(row) for row in X.tolist()]]
+
+        rows = np.arange(X.shape[0])
+        node = np.zeros(X.shape[0], dtype=np.intp)
+
+        # Leaves point at themselves, so running `depth` steps is enough
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return self.leaf_class[node]
+
+    def _walk(self, row):
+        nodes = self._nodes
+        node = 0
+        feature, threshold, left, right, internal = nodes[0]
+        while internal:
+            node = left if row[feature] <= threshold else right
+            feature, threshold, left, right, internal = nodes[node]
+        return node
+
+
+def synthetic_sweep(n_samples=DEFAULT_SAMPLES, seed=42, anchors=None):
+    """
+    Raw feature matrix covering the input space: log-uniform incomes with
+    uniform expense and EMI ratios, a slice of round-number profiles (no
+    EMI, incomes in thousands) that users commonly submit and, if given,
+    jittered copies of `anchors` (income, expenses, fixed arrays, e.g. the
+    training rows) so the tree is densest where real users are.
+    """
+    rng = np.random.default_rng(seed)
+
+    income = np.exp(rng.uniform(*np.log(INCOME_RANGE), n_samples))
+    expenses = income * rng.uniform(*EXPENSE_RATIO_RANGE, n_samples)
+    fixed = income * rng.uniform(*EMI_RATIO_RANGE, n_samples)
+
+    round_rows = rng.random(n_samples) < 0.1
+    income[round_rows] = np.round(income[round_rows], -3)
+    fixed[round_rows] = 0.0
+
+    if anchors is not None:
+        near = rng.random(n_samples) < ANCHOR_SHARE
+        picks = rng.integers(0, len(anchors[0]), int(near.sum()))
+        for column, anchor in zip((income, expenses, fixed), anchors):
+            column[near] = np.asarray(anchor, dtype=np.float64)[picks] * rng.lognormal(
+                0.0, ANCHOR_JITTER, picks.shape[0]
+            )
+
+    return build_features(income, expenses, fixed)
+
+
+def distill(models, n_samples=DEFAULT_SAMPLES, max_depth=DEFAULT_MAX_DEPTH,
+            seed=42, anchors=None, X_reference=None):
+    """
+    Fit a decision tree to the ensemble's labels on a synthetic sweep.
+
+    `models` is (scaler, svm, hmm, crf). Returns (CompiledTree, report);
+    the report holds fidelity on a held-out part of the sweep (and on
+    X_reference, e.g. the real test profiles, if given) and the per-row
+    latency of both paths.
+    """
+    from ml_models.ensemble import predict_personas
+
+    X = synthetic_sweep(n_samples, seed, anchors)
+
+    started = time.perf_counter()
+    y = predict_personas(X, models=models, timeout=math.inf)["final"]
+    label_seconds = time.perf_counter() - started
+
+    n_train = int(len(X) * 0.8)
+
+    started = time.perf_counter()
+    tree = DecisionTreeClassifier(max_depth=max_depth, random_state=seed)
+    tree.fit(X[:n_train], y[:n_train])
+    fit_seconds = time.perf_counter() - started
+
+    compiled = CompiledTree(tree)
+    X_held_out, y_held_out = X[n_train:], y[n_train:]
+
+    report = {
+        "samples": int(n_samples),
+        "max_depth": compiled.depth,
+        "leaves": int(tree.get_n_leaves()),
+        "label_seconds": round(label_seconds, 3),
+        "fit_seconds": round(fit_seconds, 3),
+        "fidelity": float((compiled.predict(X_held_out) == y_held_out).mean()),
+    }
+
+    if X_reference is not None:
+        y_reference = predict_personas(X_reference, models=models, timeout=math.inf)["final"]
+        report["reference_fidelity"] = float(
+            (compiled.predict(X_reference) == y_reference).mean()
+        )
+
+    report.update(_latency(models, compiled, X_held_out))
+    return compiled, report
+
+
+def _latency(models, compiled, X, n_single=200):
+    from ml_models.ensemble import predict_personas
+
+    rows = X[:n_single]
+
+    started = time.perf_counter()
+    for i in range(rows.shape[0]):
+        predict_personas(rows[i:i + 1], models=models, timeout=math.inf)
+    ensemble_us = (time.perf_counter() - started) / rows.shape[0] * 1e6
+
+    started = time.perf_counter()
+    for i in range(rows.shape[0]):
+        compiled.predict(rows[i:i + 1])
+    distilled_us = (time.perf_counter() - started) / rows.shape[0] * 1e6
+
+    return {
+        "ensemble_single_row_us": round(ensemble_us, 2),
+        "distilled_single_row_us": round(distilled_us, 2),
+        "speedup": round(ensemble_us / distilled_us, 1),
+    }
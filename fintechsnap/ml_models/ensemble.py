@@ -0,0 +1,241 @@
+# ml_models/ensemble.py
+
+import time
+
+import numpy as np
+
+from fintechsnap.metrics import Counter
+from fintechsnap.timing import phase
+from ml_models.cache import PredictionCache
+from ml_models.crf.predict import feature_dicts, tag_rows
+from ml_models.features import (
+    EMI_RATIO, EXPENSE_RATIO, SAVINGS_RATE,
+    build_features, health_score, scale_features,
+)
+from ml_models.hmm.predict import predict_rows
+from ml_models.manager import persona_engine, registry
+from ml_models.pool import MODEL_LATENCY, ModelPool, ModelTimeout
+
+PERSONA_MAP = {
+    0: "Financially Moderate",
+    1: "Financially Stable",
+    2: "Financially Stressed"
+}
+
+REASON_MAJORITY = "Selected based on majority agreement between {}."
+REASON_CONSISTENCY = "Selected based on financial consistency override."
+REASON_STRESS = "Selected based on financial stress override."
+REASON_PRIMARY = "Selected based on primary model (SVM)."
+REASON_DISTILLED = "Selected by the distilled ensemble model."
+
+# Component output when a model did not run (distilled engine)
+NOT_AVAILABLE = -1
+
+# Reason lookup indexed by a code: bits 0-2 flag which of SVM/CRF/HMM agree
+# with the majority, 8-10 are the override branches.
+REASONS = np.empty(11, dtype=object)
+for _code in range(8):
+    _agreeing = [m for bit, m in enumerate(("SVM", "CRF", "HMM")) if _code & (1 << bit)]
+    REASONS[_code] = REASON_MAJORITY.format(" and ".join(_agreeing))
+REASONS[8] = REASON_CONSISTENCY
+REASONS[9] = REASON_STRESS
+REASONS[10] = REASON_PRIMARY
+
+# Rule-based branches of vote(), by the reason they report
+OVERRIDE_RULES = {
+    REASON_CONSISTENCY: "consistency",
+    REASON_STRESS: "stress",
+    REASON_PRIMARY: "primary",
+}
+
+ENSEMBLE_VOTES = Counter(
+    "finmentor_ensemble_votes_total", "Profiles voted on by the SVM + HMM + CRF ensemble.",
+)
+ENSEMBLE_DISAGREEMENTS = Counter(
+    "finmentor_ensemble_disagreements_total",
+    "Ensemble votes where the models that answered did not all agree.",
+)
+
+
+def _setting(name, default):
+    from django.conf import settings
+
+    return getattr(settings, name, default) if settings.configured else default
+
+
+# SVM, HMM and CRF of one prediction run side by side on this pool
+model_pool = ModelPool(
+    max_workers=_setting("FINMENTOR_MODEL_POOL_SIZE", 0),
+    timeout=_setting("FINMENTOR_MODEL_TIMEOUT", 2.0),
+)
+
+
+def vote(svm_pred, hmm_pred, crf_pred, X):
+    """
+    Majority vote over the three models with the rule-based overrides
+    used when all three disagree. Returns (final_pred, reasons).
+    """
+    savings_rate = X[:, SAVINGS_RATE]
+    emi_ratio = X[:, EMI_RATIO]
+    expense_ratio = X[:, EXPENSE_RATIO]
+
+    # A model that did not answer (NOT_AVAILABLE) agrees with nothing,
+    # so two timeouts never outvote the SVM
+    hmm_answered = hmm_pred != NOT_AVAILABLE
+    crf_answered = crf_pred != NOT_AVAILABLE
+    svm_crf = (svm_pred == crf_pred) & crf_answered
+    svm_hmm = (svm_pred == hmm_pred) & hmm_answered
+    crf_hmm = (crf_pred == hmm_pred) & crf_answered & hmm_answered
+    majority = svm_crf | svm_hmm | crf_hmm
+
+    consistent = (savings_rate >= 0.4) & (emi_ratio <= 0.1) & (expense_ratio <= 0.5)
+    stressed = (savings_rate <= 0.1) | (emi_ratio >= 0.5)
+
+    # With only the SVM answering there is nothing to override
+    svm_alone = ~hmm_answered & ~crf_answered
+    consistent &= ~svm_alone
+    stressed &= ~svm_alone
+
+    final_pred = np.where(
+        svm_crf | svm_hmm, svm_pred,
+        np.where(crf_hmm, crf_pred,
+                 np.where(consistent, 1, np.where(stressed, 2, svm_pred)))
+    )
+
+    code = np.where(
+        majority,
+        (svm_pred == final_pred) * 1 + (crf_pred == final_pred) * 2 + (hmm_pred == final_pred) * 4,
+        np.where(consistent, 8, np.where(stressed, 9, 10))
+    )
+    reasons = REASONS[code].tolist()
+
+    return final_pred, reasons
+
+
+def predict_personas(X, models=None, timeout=None, sequence_models=True):
+    """
+    Score a raw feature matrix (see ml_models.features) with the
+    SVM + HMM + CRF ensemble.
+
+    Each model runs once over the whole matrix; the result holds one entry
+    per row for every model, the voted persona and the health score.
+    `models` overrides the registry with a (scaler, svm, hmm, crf) tuple,
+    e.g. freshly trained models during distillation.
+
+    The three models run concurrently on model_pool. The SVM is the
+    primary model and must answer; if the HMM or CRF misses the timeout
+    (FINMENTOR_MODEL_TIMEOUT unless given; math.inf for offline batches)
+    its output is NOT_AVAILABLE and the vote goes ahead without it.
+
+    With sequence_models=False the HMM and CRF are not run and their
+    outputs are NOT_AVAILABLE, for callers that take those votes over the
+    user's history instead (compute_health).
+
+    With FINMENTOR_PERSONA_ENGINE = "distilled" the persona comes from the
+    distilled tree alone and the per-model outputs are NOT_AVAILABLE.
+    """
+    if models is None and persona_engine() == "distilled":
+        return _predict_distilled(X)
+
+    scaler, svm_model, hmm_model, crf_model = models or registry.get_many(
+        "scaler", "svm", "hmm", "crf"
+    )
+
+    with phase("model"):
+        X_scaled = scale_features(X, scaler)
+        tasks = {"svm": lambda: svm_model.predict(X_scaled)}
+        if sequence_models:
+            tasks["hmm"] = lambda: predict_rows(hmm_model, X_scaled)
+            tasks["crf"] = lambda: tag_rows(crf_model, feature_dicts(X_scaled))
+        outputs = model_pool.run(tasks, timeout=timeout)
+
+    if "svm" not in outputs:
+        raise ModelTimeout("SVM prediction timed out")
+
+    missing = np.full(X.shape[0], NOT_AVAILABLE)
+    svm_pred = np.asarray(outputs["svm"]).astype(int)
+    hmm_pred = np.asarray(outputs.get("hmm", missing)).astype(int)
+    crf_pred = np.asarray(outputs.get("crf", missing), dtype=int)
+
+    final_pred, reasons = vote(svm_pred, hmm_pred, crf_pred, X)
+
+    # A model that did not answer does not count as disagreeing
+    agree = ((hmm_pred == svm_pred) | (hmm_pred == NOT_AVAILABLE)) & \
+            ((crf_pred == svm_pred) | (crf_pred == NOT_AVAILABLE))
+    ENSEMBLE_VOTES.inc(X.shape[0])
+    ENSEMBLE_DISAGREEMENTS.inc(int(X.shape[0] - np.count_nonzero(agree)))
+
+    return {
+        "svm": svm_pred,
+        "hmm": hmm_pred,
+        "crf": crf_pred,
+        "final": final_pred,
+        "reasons": reasons,
+        "score": health_score(X),
+    }
+
+
+def _predict_distilled(X):
+    started = time.perf_counter()
+    with phase("model"):
+        final_pred = registry.get("distilled").predict(X).astype(int)
+    MODEL_LATENCY.observe(time.perf_counter() - started, model="distilled")
+    missing = np.full(final_pred.shape, NOT_AVAILABLE)
+
+    return {
+        "svm": missing,
+        "hmm": missing,
+        "crf": missing,
+        "final": final_pred,
+        "reasons": [REASON_DISTILLED] * final_pred.shape[0],
+        "score": health_score(X),
+    }
+
+
+# ---------------- CACHED SINGLE-PROFILE PREDICTION ----------------
+prediction_cache = PredictionCache(
+    maxsize=_setting("FINMENTOR_PREDICTION_CACHE_SIZE", 4096),
+    ttl=_setting("FINMENTOR_PREDICTION_CACHE_TTL", 600),
+    name="prediction",
+)
+
+# Amounts are snapped to this grid for the cache key, so near-identical
+# profiles (and resubmissions) share one cache entry.
+AMOUNT_QUANTUM = _setting("FINMENTOR_PREDICTION_CACHE_QUANTUM", 10.0)
+
+
+def predict_persona(income, expenses, fixed, sequence_models=True):
+    """
+    Ensemble prediction for one profile, served from the prediction cache.
+
+    The feature vector is a pure function of (income, expenses, fixed), so
+    the cache key is those amounts quantized to AMOUNT_QUANTUM: profiles
+    within one quantum share the persona of whichever of them was computed
+    first. The models always run on the exact amounts (a small income
+    quantizes to 0, which has no ratios). Entries are dropped when the
+    registry reloads. `sequence_models` is passed on to predict_personas
+    and is part of the key.
+    """
+    key = (
+        round(income / AMOUNT_QUANTUM),
+        round(expenses / AMOUNT_QUANTUM),
+        round(fixed / AMOUNT_QUANTUM),
+        sequence_models,
+    )
+
+    def compute():
+        X = build_features([income], [expenses], [fixed])
+        result = predict_personas(X, sequence_models=sequence_models)
+        return {
+            "svm": int(result["svm"][0]),
+            "hmm": int(result["hmm"][0]),
+            "crf": int(result["crf"][0]),
+            "final": int(result["final"][0]),
+            "reason": result["reasons"][0],
+        }
+
+    # A vote taken without a timed-out model is served but not cached
+    return prediction_cache.get_or_compute(
+        registry.version, key, compute,
+        cacheable=lambda value: not sequence_models or NOT_AVAILABLE not in (value["hmm"], value["crf"]),
+    )
@@ -0,0 +1,138 @@
+# ml_models/features.py
+#
+# Single source of truth for the ten-feature vector the persona models were
+# trained on. Every scoring path (compute_health, the batch API, the
+# predictor app, action_plan_predict) and svm/train.py build features here.
+
+import numpy as np
+from pandas.api.types import is_numeric_dtype
+
+FEATURES = [
+    "monthly_income",
+    "total_expense",
+    "total_emi",
+    "emi_ratio",
+    "expense_ratio",
+    "savings_behaviour",
+    "emi_status",
+    "spending_behaviour",
+    "net_balance",
+    "savings_rate"
+]
+
+# Column positions, so callers never hard-code indices
+INCOME, EXPENSES, EMI, EMI_RATIO, EXPENSE_RATIO, SAVINGS_BEHAVIOUR, \
+    EMI_STATUS, SPENDING_BEHAVIOUR, NET_BALANCE, SAVINGS_RATE = range(len(FEATURES))
+
+# ---------------- CATEGORICAL ENCODINGS (MATCH TRAINING) ----------------
+SAVINGS_BEHAVIOUR_CODES = {"Good Saver": 0, "Low Saver": 1}
+SPENDING_BEHAVIOUR_CODES = {"Moderate Spender": 0, "High Spender": 1}
+EMI_STATUS_CODES = {"Normal EMI": 1, "High EMI Burden": 0}
+
+# ---------------- BEHAVIOUR THRESHOLDS ----------------
+GOOD_SAVER_RATE = 0.2
+HIGH_SPENDER_RATIO = 0.6
+HIGH_EMI_RATIO = 0.4
+
+
+def build_features(income, expenses, fixed, savings=None):
+    """
+    Build the (n, 10) raw feature matrix from arrays (or Series) of monthly
+    income, total expenses and fixed obligations (EMI).
+
+    savings_rate is net_balance / income unless an explicit savings amount
+    is passed. Income must be > 0 for every row.
+    """
+    income = np.asarray(income, dtype=np.float64).reshape(-1)
+    expenses = np.asarray(expenses, dtype=np.float64).reshape(-1)
+    fixed = np.asarray(fixed, dtype=np.float64).reshape(-1)
+
+    X = np.empty((income.shape[0], len(FEATURES)), dtype=np.float64)
+    X[:, INCOME] = income
+    X[:, EXPENSES] = expenses
+    X[:, EMI] = fixed
+
+    net_balance = X[:, NET_BALANCE]
+    np.subtract(income, expenses, out=net_balance)
+    net_balance -= fixed
+
+    np.divide(fixed, income, out=X[:, EMI_RATIO])
+    np.divide(expenses, income, out=X[:, EXPENSE_RATIO])
+
+    if savings is None:
+        np.divide(net_balance, income, out=X[:, SAVINGS_RATE])
+    else:
+        savings = np.asarray(savings, dtype=np.float64).reshape(-1)
+        np.divide(savings, income, out=X[:, SAVINGS_RATE])
+
+    np.less(X[:, SAVINGS_RATE], GOOD_SAVER_RATE, out=X[:, SAVINGS_BEHAVIOUR])
+    np.less(X[:, EMI_RATIO], HIGH_EMI_RATIO, out=X[:, EMI_STATUS])
+    np.greater_equal(X[:, EXPENSE_RATIO], HIGH_SPENDER_RATIO, out=X[:, SPENDING_BEHAVIOUR])
+    return X
+
+
+def frame_features(df, income="income", expenses="expenses", fixed="fixed", savings=None):
+    """
+    build_features() for a DataFrame of raw inputs; column names are
+    configurable.
+    """
+    return build_features(
+        df[income].to_numpy(),
+        df[expenses].to_numpy(),
+        df[fixed].to_numpy(),
+        None if savings is None else df[savings].to_numpy(),
+    )
+
+
+def dataset_features(df):
+    """
+    Feature matrix for the labelled Finmentor dataset, whose behaviour
+    columns hold text labels ("Good Saver", ...) rather than raw amounts.
+    """
+    encodings = {
+        "savings_behaviour": SAVINGS_BEHAVIOUR_CODES,
+        "spending_behaviour": SPENDING_BEHAVIOUR_CODES,
+        "emi_status": EMI_STATUS_CODES,
+    }
+
+    X = np.empty((len(df), len(FEATURES)), dtype=np.float64)
+    for i, name in enumerate(FEATURES):
+        column = df[name]
+        if name in encodings and not is_numeric_dtype(column):
+            column = column.map(encodings[name])
+        X[:, i] = column.to_numpy(dtype=np.float64)
+    return X
+
+
+def scale_features(X, scaler):
+    """
+    Scale a raw feature matrix with a fitted StandardScaler in a single
+    vectorized pass; returns a new array and leaves X untouched.
+    """
+    X_scaled = X - scaler.mean_
+    X_scaled /= scaler.scale_
+    return X_scaled
+
+
+def transform(income, expenses, fixed, scaler, savings=None):
+    """Raw inputs -> (raw feature matrix, scaled feature matrix)."""
+    X = build_features(income, expenses, fixed, savings)
+    return X, scale_features(X, scaler)
+
+
+def behaviour_labels(X):
+    """Display labels (savings, spending, EMI) for every row of X."""
+    savings = np.where(X[:, SAVINGS_BEHAVIOUR] == 0, "Good Saver", "Low Saver")
+    spending = np.where(X[:, SPENDING_BEHAVIOUR] == 0, "Moderate Spender", "High Spender")
+    emi = np.where(X[:, EMI_STATUS] == 1, "Normal EMI", "High EMI Burden")
+    return savings.tolist(), spending.tolist(), emi.tolist()
+
+
+def health_score(X):
+    """Financial health score (0-100) for every row of X."""
+    score = (
+        (1 - X[:, EXPENSE_RATIO]) * 35 +
+        (1 - X[:, EMI_RATIO]) * 25 +
+        X[:, SAVINGS_RATE] * 40
+    )
+    return np.clip(np.round(score, 1), 0, 100)
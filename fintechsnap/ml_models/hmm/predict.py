@@ -1,2 +1,168 @@
-def predict_hmm(user_data):
-    return "Stable"
+import hashlib
+import weakref
+
+import numpy as np
+from scipy.special import logsumexp
+
+# States are aligned to persona labels (svm/train.py align_hmm_states):
+# 0 Moderate, 1 Stable, 2 Stressed. Healthier states rank higher.
+HEALTH_RANK = {2: 0, 0: 1, 1: 2}
+
+IMPROVING, STABLE, DECLINING = "Improving", "Stable", "Declining"
+
+_model_keys = weakref.WeakKeyDictionary()
+
+
+def emission_log_likelihood(hmm_model, X_scaled):
+    # (n, n_components) log p(x | state); hmmlearn's own vectorized routine
+    return hmm_model._compute_log_likelihood(X_scaled)
+
+
+def predict_rows(hmm_model, X_scaled):
+    """
+    Most likely hidden state for every row treated as its own length-1
+    sequence, i.e. what hmm_model.predict(row) returns one row at a time.
+    """
+    log_prob = emission_log_likelihood(hmm_model, X_scaled)
+    with np.errstate(divide="ignore"):
+        log_prob += np.log(hmm_model.startprob_)
+    return np.argmax(log_prob, axis=1)
+
+
+def model_key(hmm_model):
+    """
+    Fingerprint of the fitted parameters. A forward state stored under
+    another key came from a different model and has to be rebuilt.
+    """
+    key = _model_keys.get(hmm_model)
+    if key is None:
+        digest = hashlib.sha1()
+        for array in (hmm_model.startprob_, hmm_model.transmat_, hmm_model.means_, hmm_model._covars_):
+            digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        key = _model_keys[hmm_model] = digest.hexdigest()
+    return key
+
+
+def _log(probabilities):
+    with np.errstate(divide="ignore"):
+        return np.log(probabilities)
+
+
+# ---------------- FORWARD ALGORITHM (ONLINE) ----------------
+def forward_step(hmm_model, log_alpha, log_emission):
+    """
+    One step of the forward algorithm in log space: the filtered state
+    distribution log p(s_t | x_1..t) from that of t - 1 (None for the
+    first observation) and the new row's emission log-likelihoods.
+
+    O(K²) whatever the length of the history. Leading axes broadcast, so
+    (n, K) inputs advance n users at once. The result is normalized, so
+    it neither underflows nor grows with the sequence.
+    """
+    if log_alpha is None:
+        log_alpha = _log(hmm_model.startprob_) + log_emission
+    else:
+        log_alpha = logsumexp(
+            np.asarray(log_alpha)[..., :, None] + _log(hmm_model.transmat_), axis=-2
+        ) + log_emission
+    return log_alpha - logsumexp(log_alpha, axis=-1, keepdims=True)
+
+
+def forward_filter(hmm_model, X_scaled, log_alpha=None):
+    """Filtered state distribution after the rows of X_scaled (one sequence)."""
+    for log_emission in emission_log_likelihood(hmm_model, X_scaled):
+        log_alpha = forward_step(hmm_model, log_alpha, log_emission)
+    return log_alpha
+
+
+def _padded(hmm_model, sequences):
+    """(n, T, K) emission log-likelihoods of ragged sequences and their lengths."""
+    lengths = np.array([len(s) for s in sequences])
+    log_emission = np.zeros((len(sequences), lengths.max(initial=0), hmm_model.n_components))
+    if lengths.sum():
+        rows = emission_log_likelihood(hmm_model, np.concatenate([s for s in sequences if len(s)]))
+        mask = np.arange(log_emission.shape[1]) < lengths[:, None]
+        log_emission[mask] = rows
+    return log_emission, lengths
+
+
+def forward_batch(hmm_model, sequences):
+    """
+    forward_filter() for many users' sequences (scaled feature matrices)
+    in one pass: the sequences are padded to the longest and every step
+    advances all users at once. Returns (n, K) log_alpha; a user without
+    rows gets NaN.
+    """
+    log_emission, lengths = _padded(hmm_model, sequences)
+    log_alpha = np.full((len(sequences), hmm_model.n_components), np.nan)
+    if not log_emission.shape[1]:
+        return log_alpha
+
+    current = forward_step(hmm_model, None, log_emission[:, 0])
+    for t in range(1, log_emission.shape[1]):
+        # Users whose sequence has ended keep their last state
+        current = np.where((t < lengths)[:, None], forward_step(hmm_model, current, log_emission[:, t]), current)
+    log_alpha[lengths > 0] = current[lengths > 0]
+    return log_alpha
+
+
+# ---------------- VITERBI (BATCH) ----------------
+def viterbi_batch(hmm_model, sequences):
+    """
+    Most likely state path of every sequence, decoded together: padded to
+    the longest sequence, one (n, K, K) max-product step per time step and
+    a vectorized backtrack. Equivalent to hmm_model.predict(sequence) for
+    each sequence on its own. Returns a list of state arrays.
+    """
+    log_emission, lengths = _padded(hmm_model, sequences)
+    n, T, K = log_emission.shape
+    if not T:
+        return [np.empty(0, dtype=int) for _ in sequences]
+
+    log_transmat = _log(hmm_model.transmat_)
+    backpointers = np.zeros((T, n, K), dtype=np.intp)
+    delta = _log(hmm_model.startprob_) + log_emission[:, 0]
+    for t in range(1, T):
+        candidates = delta[:, :, None] + log_transmat
+        backpointers[t] = np.argmax(candidates, axis=1)
+        step = np.max(candidates, axis=1) + log_emission[:, t]
+        # Ended sequences carry their final scores through the padding
+        delta = np.where((t < lengths)[:, None], step, delta)
+
+    paths = np.zeros((n, T), dtype=np.intp)
+    users = np.arange(n)
+    final = np.argmax(delta, axis=1)
+    state = final
+    for t in range(T - 1, -1, -1):
+        # A path is traced back from its best final state at its own last step
+        state = np.where(t == lengths - 1, final, state)
+        paths[:, t] = state
+        state = np.where(t < lengths, backpointers[t, users, state], state)
+    return [paths[i, :length] for i, length in enumerate(lengths)]
+
+
+# ---------------- TRENDS ----------------
+def trend_label(previous, current):
+    """Improving / Stable / Declining from one state to the next."""
+    if previous is None or previous == current:
+        return STABLE
+    return IMPROVING if HEALTH_RANK.get(current, 0) > HEALTH_RANK.get(previous, 0) else DECLINING
+
+
+def predict_hmm(X_scaled, hmm_model=None):
+    """
+    Financial-state trajectory of one user's history (scaled feature rows,
+    oldest first): the Viterbi path, the current state and its trend.
+    """
+    if hmm_model is None:
+        from ml_models.manager import registry
+
+        hmm_model = registry.get("hmm")
+
+    [states] = viterbi_batch(hmm_model, [np.asarray(X_scaled, dtype=np.float64)])
+    states = states.tolist()
+    return {
+        "states": states,
+        "current": states[-1] if states else None,
+        "trend": trend_label(states[-2] if len(states) > 1 else None, states[-1]) if states else STABLE,
+    }
@@ -1,20 +1,234 @@
+# ml_models/manager.py
+
+import logging
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from ml_models.features import FEATURES, scale_features
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = Path(__file__).resolve().parent
+
 USE_SVM = True
-USE_HMM = False
-USE_CRF = False
+USE_HMM = True
+USE_CRF = True
+
+
+class ModelLoadError(RuntimeError):
+    pass
+
+
+MODEL_FILES = {
+    "scaler": "scaler.pkl",
+    "svm": "svm_model.pkl",
+    "hmm": "hmm_model.pkl",
+    "crf": "crf_model.pkl",
+    "svm_approx": "svm_approx_model.pkl",
+    "distilled": "persona_distilled.pkl",
+}
+
+# settings.FINMENTOR_SVM_ENGINE -> artifact served as "svm"
+SVM_ENGINES = {
+    "exact": "svm",
+    "approx": "svm_approx",
+}
+
+
+def svm_engine():
+    from django.conf import settings
+
+    engine = "exact"
+    if settings.configured:
+        engine = getattr(settings, "FINMENTOR_SVM_ENGINE", engine)
+    if engine not in SVM_ENGINES:
+        raise ModelLoadError(f"Unknown SVM engine {engine!r}; expected one of {list(SVM_ENGINES)}")
+    return engine
+
+
+# settings.FINMENTOR_PERSONA_ENGINE: the full SVM + HMM + CRF vote, or the
+# decision tree distilled from it (train_models --distill)
+PERSONA_ENGINES = ("ensemble", "distilled")
+
+
+def persona_engine():
+    from django.conf import settings
+
+    engine = "ensemble"
+    if settings.configured:
+        engine = getattr(settings, "FINMENTOR_PERSONA_ENGINE", engine)
+    if engine not in PERSONA_ENGINES:
+        raise ModelLoadError(f"Unknown persona engine {engine!r}; expected one of {list(PERSONA_ENGINES)}")
+    return engine
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of the trained persona models.
+
+    Every enabled model is unpickled once per process and kept in memory;
+    views ask the registry for ready-to-use objects instead of calling
+    joblib.load themselves.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR):
+        self.model_dir = Path(model_dir)
+        self.version = 0
+        self._models = {}
+        self._status = {}
+        self._lock = threading.Lock()
+
+    def enabled(self):
+        names = ["scaler"]
+        if USE_SVM:
+            names.append(SVM_ENGINES[svm_engine()])
+        if USE_HMM:
+            names.append("hmm")
+        if USE_CRF:
+            names.append("crf")
+        if persona_engine() == "distilled":
+            names.append("distilled")
+        return names
+
+    # ---------------- LOADING ----------------
+    def _load_one(self, name):
+        path = self.model_dir / MODEL_FILES[name]
+        started = time.perf_counter()
+        try:
+            model = joblib.load(path)
+        except Exception as e:
+            self._status[name] = {
+                "status": "failed",
+                "path": str(path),
+                "load_ms": round((time.perf_counter() - started) * 1000, 2),
+                "error": str(e),
+            }
+            logger.exception("Loading %s from %s failed", name, path)
+            return
+
+        self._models[name] = model
+        self._status[name] = {
+            "status": "loaded",
+            "path": str(path),
+            "load_ms": round((time.perf_counter() - started) * 1000, 2),
+            "error": None,
+        }
+
+    def load(self, force=False):
+        with self._lock:
+            for name in self.enabled():
+                if force or name not in self._models:
+                    self._load_one(name)
+
+    def reload(self):
+        with self._lock:
+            self._models = {}
+            self._status = {}
+            for name in self.enabled():
+                self._load_one(name)
+            self.version += 1
+        self.warm_up()
+
+    def get(self, name):
+        # "svm" is whichever engine FINMENTOR_SVM_ENGINE selects
+        if name == "svm":
+            name = SVM_ENGINES[svm_engine()]
+
+        model = self._models.get(name)
+        if model is None:
+            self.load()
+            model = self._models.get(name)
+        if model is None:
+            error = self._status.get(name, {}).get("error") or "model is disabled"
+            raise ModelLoadError(f"{name} model is not available: {error}")
+        return model
+
+    def get_many(self, *names):
+        return tuple(self.get(name) for name in names)
+
+    # ---------------- WARM-UP ----------------
+    def warm_up(self):
+        """
+        Run one dummy inference through every loaded model so that lazy
+        state (e.g. the CRF tagger) is built before the first request.
+        """
+        self.load()
+
+        scaler = self._models.get("scaler")
+        if scaler is None:
+            return
+
+        X_scaled = scaler.transform(np.zeros((1, len(FEATURES))))
+
+        for name in self.enabled():
+            if name == "scaler" or name not in self._models:
+                continue
+
+            started = time.perf_counter()
+            try:
+                if name == "crf":
+                    self._models[name].predict([[{"warm_up": 0.0}]])
+                else:
+                    self._models[name].predict(X_scaled)
+            except Exception as e:
+                self._status[name].update(status="failed", error=str(e))
+                logger.exception("Warm-up of %s failed", name)
+                continue
+
+            self._status[name].update(
+                status="ready",
+                warm_up_ms=round((time.perf_counter() - started) * 1000, 2),
+            )
+
+        if "scaler" in self._status:
+            self._status["scaler"]["status"] = "ready"
+
+    # ---------------- READINESS ----------------
+    def readiness(self):
+        models = {}
+        for name in self.enabled():
+            models[name] = dict(self._status.get(name, {"status": "not_loaded"}))
+
+        return {
+            "ready": all(m["status"] == "ready" for m in models.values()),
+            "version": self.version,
+            "svm_engine": svm_engine(),
+            "persona_engine": persona_engine(),
+            "models": models,
+        }
+
+
+registry = ModelRegistry()
+
+
+def get_model(name):
+    return registry.get(name)
+
 
 def run_models(user_data):
+    """
+    Run the enabled models over `user_data`, a raw feature matrix (see
+    ml_models.features) holding one user's history, oldest first.
+    """
     results = {}
+    scaler = registry.get("scaler")
+    X_scaled = scale_features(np.asarray(user_data, dtype=np.float64), scaler)
 
     if USE_SVM:
-        from ml_models.svm.predict import predict_svm
-        results["health"] = predict_svm(user_data)
+        # The newest row is the user's current situation
+        results["health"] = int(registry.get("svm").predict(X_scaled[-1:])[0])
 
     if USE_HMM:
         from ml_models.hmm.predict import predict_hmm
-        results["trend"] = predict_hmm(user_data)
+        # user_data rows are the user's history, oldest first
+        results["trend"] = predict_hmm(X_scaled)["trend"]
 
     if USE_CRF:
-        from ml_models.crf.predict import predict_crf
-        results["context"] = predict_crf(user_data)
+        from ml_models.crf.predict import feature_dicts, predict_crf
+        results["context"] = predict_crf(feature_dicts(X_scaled))
 
     return results
@@ -0,0 +1,189 @@
+# ml_models/pool.py
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from fintechsnap.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+MODEL_LATENCY = Histogram(
+    "finmentor_model_latency_seconds", "Time one persona model took for one batch.", ["model"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+)
+MODEL_TIMEOUTS = Counter(
+    "finmentor_model_timeouts_total", "Persona model runs that missed the pool deadline.", ["model"],
+)
+
+
+class ModelTimeout(RuntimeError):
+    pass
+
+
+class _Latency:
+    """Running count / total / max of one model's latency in milliseconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.timeouts = 0
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.last_ms = ms
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+            "timeouts": self.timeouts,
+        }
+
+
+class ModelPool:
+    """
+    Shared, bounded thread pool that runs the persona models of one
+    prediction side by side.
+
+    Each call to run() submits one job per model and waits for each of them
+    for `timeout` seconds from the moment it starts running, so time spent
+    queued behind other requests' jobs does not count against a model; a
+    job still queued `timeout` seconds after submission is cancelled
+    instead. Per-model latency is recorded, together with the wall time of
+    each run and the sum of its model latencies, so the stats show how much
+    the overlap actually saves. With max_workers=0 (the default setting)
+    the jobs run one after another in the calling thread (no timeout),
+    which gives the serial baseline with the same bookkeeping.
+    """
+
+    def __init__(self, max_workers=3, timeout=2.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.runs = 0
+        self.wall_ms = 0.0
+        self.serial_ms = 0.0
+        self._latency = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="persona-model"
+                    )
+        return self._executor
+
+    def _timed(self, job, started_event=None):
+        started = time.perf_counter()
+        if started_event is not None:
+            started_event.started_at = started
+            started_event.set()
+        value = job()
+        return value, (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _wait(future, started_event, submitted, timeout):
+        """
+        Result of one pooled job, waiting for it to start (at most `timeout`
+        after submission) and then at most `timeout` after it started.
+        Raises FutureTimeout, after cancelling the job if it never started.
+        """
+        if math.isinf(timeout):
+            return future.result()
+        if not started_event.wait(max(submitted + timeout - time.perf_counter(), 0)):
+            if future.cancel():
+                raise FutureTimeout()
+            # Picked up by a worker just now
+            started_event.wait()
+        remaining = started_event.started_at + timeout - time.perf_counter()
+        return future.result(timeout=max(remaining, 0))
+
+    def run(self, jobs, timeout=None):
+        """
+        Run {name: callable} concurrently and return {name: result}.
+
+        A job that runs past its deadline is left to finish in the
+        background (running threads cannot be cancelled) and is missing
+        from the result, as is one that never got a worker; the caller
+        decides whether it can vote without it. Exceptions raised by a job
+        propagate. timeout=math.inf waits for every job (offline batches).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+
+        if not self.max_workers:
+            results, latencies = {}, {}
+            for name, job in jobs.items():
+                results[name], latencies[name] = self._timed(job)
+            self._record(started, latencies, [])
+            return results
+
+        executor = self._get_executor()
+        futures = {}
+        for name, job in jobs.items():
+            started_event = threading.Event()
+            futures[name] = executor.submit(self._timed, job, started_event), started_event
+
+        results, latencies, timed_out = {}, {}, []
+        for name, (future, started_event) in futures.items():
+            try:
+                value, ms = self._wait(future, started_event, started, timeout)
+            except FutureTimeout:
+                timed_out.append(name)
+                continue
+            results[name] = value
+            latencies[name] = ms
+
+        self._record(started, latencies, timed_out)
+
+        if timed_out:
+            logger.warning("Persona models timed out after %.0f ms: %s",
+                           timeout * 1000, ", ".join(timed_out))
+
+        return results
+
+    def _record(self, started, latencies, timed_out):
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.runs += 1
+            self.wall_ms += wall_ms
+            self.serial_ms += sum(latencies.values())
+            for name, ms in latencies.items():
+                self._latency.setdefault(name, _Latency()).add(ms)
+            for name in timed_out:
+                self._latency.setdefault(name, _Latency()).timeouts += 1
+
+        for name, ms in latencies.items():
+            MODEL_LATENCY.observe(ms / 1000, model=name)
+        for name in timed_out:
+            MODEL_TIMEOUTS.inc(model=name)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "timeout_s": self.timeout,
+                "runs": self.runs,
+                "mean_wall_ms": round(self.wall_ms / self.runs, 3) if self.runs else 0.0,
+                "mean_serial_ms": round(self.serial_ms / self.runs, 3) if self.runs else 0.0,
+                "models": {name: stat.as_dict() for name, stat in self._latency.items()},
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -0,0 +1,40 @@
+# ml_models/svm/approx.py
+
+import numpy as np
+
+
+class ApproxKernelSVM:
+    """
+    Serving form of a fitted Nystroem(rbf) -> LinearSVC pipeline.
+
+    The Nystroem normalisation and the linear weights are folded into one
+    (n_components, n_classes) matrix, so predict() is a distance matmul, an
+    exp and a small matmul in plain NumPy, with no per-call sklearn
+    validation overhead.
+    """
+
+    def __init__(self, pipeline):
+        nystroem, linear = (step for _, step in pipeline.steps)
+
+        self.gamma = float(nystroem.gamma)
+        self.components = np.ascontiguousarray(nystroem.components_, dtype=np.float64)
+        self.components_sq = (self.components ** 2).sum(axis=1)
+        self.weights = nystroem.normalization_.T @ linear.coef_.T
+        self.intercept = linear.intercept_.astype(np.float64)
+        self.classes_ = linear.classes_
+
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float64)
+
+        sq_dist = X @ self.components.T
+        sq_dist *= -2
+        sq_dist += (X ** 2).sum(axis=1)[:, None]
+        sq_dist += self.components_sq
+        np.maximum(sq_dist, 0, out=sq_dist)
+
+        sq_dist *= -self.gamma
+        kernel = np.exp(sq_dist, out=sq_dist)
+        return kernel @ self.weights + self.intercept
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.decision_function(X), axis=1)]
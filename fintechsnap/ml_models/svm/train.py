@@ -1,159 +1,440 @@
-import pandas as pd
-import numpy as np
-import joblib
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
 
-from sklearn.model_selection import train_test_split
+from scipy.optimize import linear_sum_assignment
+from sklearn.kernel_approximation import Nystroem
+from sklearn.model_selection import GroupShuffleSplit
+from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.svm import SVC
-from sklearn.metrics import accuracy_score, classification_report
-from scipy.stats import mode
+from sklearn.svm import SVC, LinearSVC
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
 import sklearn_crfsuite
 from hmmlearn import hmm
 
-# ---------------- LOAD DATA ----------------
-df = pd.read_excel(r"D:\riya\Finmentor_Data_REDESIGNED.xlsx")
-
-features = [
-    "monthly_income",
-    "total_expense",
-    "total_emi",
-    "emi_ratio",
-    "expense_ratio",
-    "savings_behaviour",
-    "emi_status",
-    "spending_behaviour",
-    "net_balance",
-    "savings_rate"
-]
+from ml_models.dataset import load_frame
+from ml_models.svm.approx import ApproxKernelSVM
+from ml_models.features import FEATURES, dataset_features
 
-TARGET = "persona"
-
-# ---------------- ENCODE CATEGORICAL ----------------
-df["savings_behaviour"] = df["savings_behaviour"].map({
-    "Good Saver": 0,
-    "Low Saver": 1
-})
+features = FEATURES
 
-df["spending_behaviour"] = df["spending_behaviour"].map({
-    "Moderate Spender": 0,
-    "High Spender": 1
-})
+TARGET = "persona"
+USER = "user_id"
+MONTH = "month"
 
-df["emi_status"] = df["emi_status"].map({
-    "Normal EMI": 1,
-    "High EMI Burden": 0
-})
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
-# Encode target
-label_encoder = LabelEncoder()
-df[TARGET] = label_encoder.fit_transform(df[TARGET])
+DEFAULT_SEED = 42
+DEFAULT_HMM_RESTARTS = 4
+DEFAULT_APPROX_COMPONENTS = 300
 
-X = df[features].values
-y = df[TARGET].values
 
-# ---------------- TRAIN-TEST SPLIT (STRATIFIED) ----------------
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
+# =========================================================
+# ====================== DATA =============================
+# =========================================================
+def load_training_data(source=None):
+    """
+    (X, y, label_encoder, groups) with the rows ordered by user and, within
+    a user, by month: every user's rows form one sequence, oldest first,
+    like the submission histories the HMM and CRF see. `groups` holds the
+    user id of every row.
+    """
+    # Memory-mapped columnar cache of the workbook (see ml_models/dataset.py)
+    df = load_frame(source)
+
+    # Stable sort: repeated months of a user keep their workbook order
+    month = df[MONTH].map({name: i for i, name in enumerate(MONTHS)}).to_numpy()
+    df = df.iloc[np.lexsort((month, df[USER].to_numpy()))].reset_index(drop=True)
+
+    # Same encodings as every scoring path (ml_models/features.py)
+    X = dataset_features(df)
+
+    # Encode target
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(df[TARGET].astype(str))
+
+    return X, y, label_encoder, df[USER].to_numpy()
+
+
+def sequence_lengths(groups):
+    """Lengths of the runs of equal user ids, i.e. of each user's sequence."""
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1], True])
+    return np.diff(starts)
+
+
+def sequences(rows, lengths):
+    """Split per-row values into one chunk per user sequence."""
+    return np.split(rows, np.cumsum(lengths)[:-1])
+
+
+def split_and_scale(X, y, groups, test_size=0.2, seed=DEFAULT_SEED):
+    # ---------------- TRAIN-TEST SPLIT (BY USER) ----------------
+    # A user's months all land on one side, so no sequence is cut in two
+    # and no test user was seen in training; rows keep their order
+    train, test = next(
+        GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=seed).split(X, y, groups)
+    )
+    X_train, X_test, y_train, y_test = X[train], X[test], y[train], y[test]
+
+    # ---------------- SCALE (NO DATA LEAKAGE) ----------------
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    return {
+        "X_train": X_train,
+        "X_test": X_test,
+        "X_train_scaled": X_train_scaled,
+        "X_test_scaled": X_test_scaled,
+        "y_train": y_train,
+        "y_test": y_test,
+        "lengths_train": sequence_lengths(groups[train]),
+        "lengths_test": sequence_lengths(groups[test]),
+        "scaler": scaler,
+    }
+
+
+def _report(y_test, y_pred, fit_seconds, **extra):
+    report = {
+        "accuracy": float(accuracy_score(y_test, y_pred)),
+        "fit_seconds": round(fit_seconds, 3),
+        "classification_report": classification_report(
+            y_test, y_pred, output_dict=True, zero_division=0
+        ),
+    }
+    report.update(extra)
+    return report
 
-# ---------------- SCALE (NO DATA LEAKAGE) ----------------
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
 
 # =========================================================
 # ====================== SVM ==============================
 # =========================================================
-svm_model = SVC(
-    kernel="rbf",
-    probability=True,
-    class_weight="balanced"
-)
+def train_svm(X_train, y_train, X_test, y_test, seed=DEFAULT_SEED):
+    started = time.perf_counter()
 
-svm_model.fit(X_train_scaled, y_train)
-svm_pred = svm_model.predict(X_test_scaled)
+    svm_model = SVC(
+        kernel="rbf",
+        probability=True,
+        class_weight="balanced",
+        random_state=seed
+    )
+    svm_model.fit(X_train, y_train)
 
-print("\n----- SVM Results -----")
-print("Accuracy:", accuracy_score(y_test, svm_pred))
-print(classification_report(y_test, svm_pred))
+    fit_seconds = time.perf_counter() - started
+    svm_pred = svm_model.predict(X_test)
+
+    return svm_model, svm_pred, _report(y_test, svm_pred, fit_seconds)
 
 
 # =========================================================
-# ====================== HMM ==============================
-# (Unsupervised - kept for comparison only)
+# ================ APPROXIMATE-KERNEL SVM =================
+# (Nystroem RBF feature map + linear SVM: inference cost is
+#  fixed by n_components instead of the support-vector count)
 # =========================================================
-hmm_model = hmm.GaussianHMM(
-    n_components=len(np.unique(y)),
-    covariance_type="diag",
-    n_iter=100
-)
+def train_svm_approx(X_train, y_train, X_test, y_test, seed=DEFAULT_SEED,
+                     n_components=DEFAULT_APPROX_COMPONENTS):
+    started = time.perf_counter()
+
+    approx_model = make_pipeline(
+        Nystroem(
+            kernel="rbf",
+            # same width as SVC(gamma="scale")
+            gamma=1.0 / (X_train.shape[1] * X_train.var()),
+            n_components=min(n_components, X_train.shape[0]),
+            random_state=seed
+        ),
+        LinearSVC(class_weight="balanced", random_state=seed)
+    )
+    approx_model.fit(X_train, y_train)
+
+    pipeline_pred = approx_model.predict(X_test)
+    approx_model = ApproxKernelSVM(approx_model)
+
+    fit_seconds = time.perf_counter() - started
+    approx_pred = approx_model.predict(X_test)
+
+    return approx_model, approx_pred, _report(
+        y_test, approx_pred, fit_seconds,
+        n_components=n_components,
+        # sanity check of the folded NumPy form against the sklearn pipeline
+        pipeline_agreement=float((approx_pred == pipeline_pred).mean()),
+    )
+
+
+def compare_svm_engines(svm_model, svm_pred, approx_model, approx_pred, X_test):
+    """Agreement with the exact SVC and inference speedup of the approximation."""
+    from ml_models.svm.select import measure_latency
+
+    exact = measure_latency(svm_model, X_test)
+    approx = measure_latency(approx_model, X_test)
+
+    return {
+        "agreement_with_svc": float((svm_pred == approx_pred).mean()),
+        "exact_latency": exact,
+        "approx_latency": approx,
+        "single_row_speedup": round(exact["single_row_us"] / approx["single_row_us"], 2),
+        "batch_speedup": round(exact["batch_row_us"] / approx["batch_row_us"], 2),
+    }
 
-hmm_model.fit(X_train_scaled)
-hmm_pred = hmm_model.predict(X_test_scaled)
 
-print("\n----- HMM Results (Unsupervised) -----")
-print("Accuracy:", accuracy_score(y_test, hmm_pred))
-print(classification_report(y_test, hmm_pred))
+# =========================================================
+# ====================== HMM ==============================
+# (Unsupervised - states are aligned to persona labels)
+# =========================================================
+def train_hmm_restart(X_train, lengths_train, n_components, seed):
+    """
+    One HMM fit from one random initialisation, over the users' month
+    sequences so transmat_ holds real month-to-month transitions.
+    """
+    started = time.perf_counter()
+
+    hmm_model = hmm.GaussianHMM(
+        n_components=n_components,
+        covariance_type="diag",
+        n_iter=100,
+        random_state=seed
+    )
+    hmm_model.fit(X_train, lengths_train)
+
+    return (
+        hmm_model, float(hmm_model.score(X_train, lengths_train)), time.perf_counter() - started
+    )
+
+
+def align_hmm_states(hmm_model, X_train, y_train, lengths_train):
+    """
+    Permute the hidden states so that state k best matches persona label k;
+    compute_health votes with the HMM's state index as a persona label.
+    """
+    states = hmm_model.predict(X_train, lengths_train)
+    labels = np.arange(hmm_model.n_components)
+    overlap = confusion_matrix(y_train, states, labels=labels)
+    _, order = linear_sum_assignment(-overlap)
+
+    hmm_model.startprob_ = hmm_model.startprob_[order]
+    hmm_model.transmat_ = hmm_model.transmat_[np.ix_(order, order)]
+    hmm_model.means_ = hmm_model.means_[order]
+    hmm_model.covars_ = hmm_model._covars_[order]
+    return hmm_model
+
+
+def pick_best_hmm(restarts, X_train, y_train, lengths_train, X_test, y_test, lengths_test):
+    """Keep the restart with the best training log-likelihood."""
+    hmm_model, log_likelihood, _ = max(restarts, key=lambda r: r[1])
+
+    if hmm_model.n_components == len(np.unique(y_train)):
+        align_hmm_states(hmm_model, X_train, y_train, lengths_train)
+
+    # Each test user's history decoded as one sequence, as the app does
+    hmm_pred = hmm_model.predict(X_test, lengths_test)
+
+    return hmm_model, hmm_pred, _report(
+        y_test, hmm_pred,
+        fit_seconds=sum(r[2] for r in restarts),
+        log_likelihood=log_likelihood,
+        restarts=len(restarts),
+        restart_log_likelihoods=[r[1] for r in restarts],
+    )
 
 
 # =========================================================
 # ====================== CRF ==============================
 # =========================================================
-
 def row_to_features(row):
     return {features[i]: row[i] for i in range(len(features))}
 
-# Use SAME train-test split as SVM
-X_train_crf = [[row_to_features(row)] for row in X_train_scaled]
-X_test_crf  = [[row_to_features(row)] for row in X_test_scaled]
 
-y_train_crf = [[str(label)] for label in y_train]
-y_test_crf  = [[str(label)] for label in y_test]
+def train_crf(X_train, y_train, lengths_train, X_test, y_test, lengths_test):
+    started = time.perf_counter()
+
+    # Use SAME train-test split as SVM, one sequence per user so the
+    # transition weights between consecutive months are learnt
+    X_train_crf = [[row_to_features(row) for row in rows] for rows in sequences(X_train, lengths_train)]
+    X_test_crf = [[row_to_features(row) for row in rows] for rows in sequences(X_test, lengths_test)]
 
-crf_model = sklearn_crfsuite.CRF(
-    algorithm='lbfgs',
-    max_iterations=100,
-    all_possible_transitions=True
-)
+    y_train_crf = [[str(label) for label in labels] for labels in sequences(y_train, lengths_train)]
 
-crf_model.fit(X_train_crf, y_train_crf)
+    crf_model = sklearn_crfsuite.CRF(
+        algorithm='lbfgs',
+        max_iterations=100,
+        all_possible_transitions=True
+    )
+    crf_model.fit(X_train_crf, y_train_crf)
 
-y_pred_crf = crf_model.predict(X_test_crf)
-y_pred_crf_flat = np.array([int(label[0]) for label in y_pred_crf])
+    fit_seconds = time.perf_counter() - started
+    y_pred_crf = crf_model.predict(X_test_crf)
+    y_pred_crf_flat = np.array([int(label) for labels in y_pred_crf for label in labels])
 
-print("\n----- CRF Results -----")
-print("Accuracy:", accuracy_score(y_test, y_pred_crf_flat))
-print(classification_report(y_test, y_pred_crf_flat))
+    return crf_model, y_pred_crf_flat, _report(y_test, y_pred_crf_flat, fit_seconds)
 
 
 # =========================================================
 # ====================== ENSEMBLE =========================
-# (SVM + CRF HARD VOTING)
+# (same vote + overrides as compute_health)
 # =========================================================
+def evaluate_ensemble(svm_pred, hmm_pred, crf_pred, X_test, y_test):
+    from ml_models.ensemble import vote
 
-all_preds = np.vstack((svm_pred, y_pred_crf_flat))
-ensemble_pred = mode(all_preds, axis=0)[0].flatten()
-
-print("\n===== FINAL ENSEMBLE RESULTS =====")
-print("Accuracy:", accuracy_score(y_test, ensemble_pred))
-print(classification_report(y_test, ensemble_pred))
+    ensemble_pred, _ = vote(svm_pred, hmm_pred, crf_pred, X_test)
+    return _report(y_test, ensemble_pred, 0.0)
 
 
 # =========================================================
 # ================= SAVE MODELS ===========================
 # =========================================================
+def save_models(models, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
 
-save_path = r"D:\riya\FinMentor\fintechsnap\ml_models"
-os.makedirs(save_path, exist_ok=True)
+    for name, model in models.items():
+        joblib.dump(model, os.path.join(output_dir, f"{name}.pkl"))
 
-joblib.dump(svm_model, os.path.join(save_path, "svm_model.pkl"))
-joblib.dump(hmm_model, os.path.join(save_path, "hmm_model.pkl"))
-joblib.dump(crf_model, os.path.join(save_path, "crf_model.pkl"))
-joblib.dump(scaler, os.path.join(save_path, "scaler.pkl"))
 
-print("\nAll models saved successfully.")
\ No newline at end of file
+# =========================================================
+# ================= PIPELINE ==============================
+# =========================================================
+def train_all(source=None, output_dir=None, seed=DEFAULT_SEED,
+              hmm_restarts=DEFAULT_HMM_RESTARTS, workers=None, test_size=0.2,
+              svm_selection=None, approx_components=DEFAULT_APPROX_COMPONENTS,
+              distill=None):
+    """
+    Train SVM, HMM (several random restarts) and CRF concurrently in a
+    process pool, then evaluate the voting ensemble and save everything.
+    Returns the per-model timing/accuracy report.
+
+    With svm_selection (kwargs for ml_models.svm.select.select_svm, e.g.
+    {"latency_budget_us": 300}) the fixed RBF SVC is replaced by the most
+    accurate candidate that fits the latency budget.
+
+    The approximate-kernel engine (svm_approx_model.pkl) is trained
+    alongside; approx_components=0 skips it.
+
+    With distill (kwargs for ml_models.distill.distill, e.g.
+    {"n_samples": 200000, "max_depth": 14}) the trained ensemble is also
+    distilled into persona_distilled.pkl.
+    """
+    started = time.perf_counter()
+
+    X, y, label_encoder, groups = load_training_data(source)
+    data = split_and_scale(X, y, groups, test_size=test_size, seed=seed)
+
+    X_train, X_test = data["X_train_scaled"], data["X_test_scaled"]
+    y_train, y_test = data["y_train"], data["y_test"]
+    lengths_train, lengths_test = data["lengths_train"], data["lengths_test"]
+    n_components = len(np.unique(y))
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        svm_job = None
+        if svm_selection is None:
+            svm_job = pool.submit(train_svm, X_train, y_train, X_test, y_test, seed)
+        crf_job = pool.submit(train_crf, X_train, y_train, lengths_train, X_test, y_test, lengths_test)
+        approx_job = None
+        if approx_components:
+            approx_job = pool.submit(
+                train_svm_approx, X_train, y_train, X_test, y_test, seed, approx_components
+            )
+        hmm_jobs = [
+            pool.submit(train_hmm_restart, X_train, lengths_train, n_components, seed + i)
+            for i in range(hmm_restarts)
+        ]
+
+        if svm_job is not None:
+            svm_model, svm_pred, svm_report = svm_job.result()
+        crf_model, crf_pred, crf_report = crf_job.result()
+        restarts = [job.result() for job in hmm_jobs]
+        if approx_job is not None:
+            approx_model, approx_pred, approx_report = approx_job.result()
+
+    hmm_model, hmm_pred, hmm_report = pick_best_hmm(
+        restarts, X_train, y_train, lengths_train, X_test, y_test, lengths_test
+    )
+
+    # Selection runs after the pool has drained so latency timings are clean
+    selection_report = None
+    if svm_selection is not None:
+        from ml_models.svm.select import select_svm
+
+        svm_model, selection_report = select_svm(
+            X_train, y_train, X_test, y_test, seed=seed, **svm_selection
+        )
+        svm_pred = svm_model.predict(X_test)
+        svm_report = _report(
+            y_test, svm_pred, selection_report["selected"]["fit_seconds"],
+            params=selection_report["selected"]["params"],
+        )
+
+    report = {
+        "seed": seed,
+        "test_size": test_size,
+        "rows": int(len(y)),
+        "users": {"train": len(lengths_train), "test": len(lengths_test)},
+        "classes": [str(c) for c in label_encoder.classes_],
+        "models": {
+            "svm": svm_report,
+            "hmm": hmm_report,
+            "crf": crf_report,
+            "ensemble": evaluate_ensemble(
+                svm_pred, hmm_pred, crf_pred, data["X_test"], y_test
+            ),
+        },
+    }
+
+    if selection_report is not None:
+        report["svm_selection"] = selection_report
+
+    artifacts = {
+        "svm_model": svm_model,
+        "hmm_model": hmm_model,
+        "crf_model": crf_model,
+        "scaler": data["scaler"],
+    }
+
+    if approx_job is not None:
+        approx_report["comparison"] = compare_svm_engines(
+            svm_model, svm_pred, approx_model, approx_pred, X_test
+        )
+        report["models"]["svm_approx"] = approx_report
+        artifacts["svm_approx_model"] = approx_model
+
+    # Distillation labels with the ensemble, so it runs once that is final.
+    # The tree serves build_features() rows (what compute_health submits),
+    # so the test profiles are rebuilt from their amounts the same way.
+    if distill is not None:
+        from ml_models.distill import distill as distill_ensemble
+        from ml_models.features import EMI, EXPENSES, INCOME, build_features
+
+        def amounts(X_raw):
+            return X_raw[:, INCOME], X_raw[:, EXPENSES], X_raw[:, EMI]
+
+        X_reference = build_features(*amounts(data["X_test"]))
+        distilled, distill_report = distill_ensemble(
+            (data["scaler"], svm_model, hmm_model, crf_model),
+            seed=seed, anchors=amounts(data["X_train"]), X_reference=X_reference,
+            **distill,
+        )
+        report["models"]["distilled"] = _report(
+            y_test, distilled.predict(X_reference), distill_report.pop("fit_seconds"),
+            **distill_report,
+        )
+        artifacts["persona_distilled"] = distilled
+
+    if output_dir:
+        save_models(artifacts, output_dir)
+
+    report["total_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+if __name__ == "__main__":
+    from ml_models.manager import MODEL_DIR
+
+    result = train_all(output_dir=MODEL_DIR)
+
+    for name, model_report in result["models"].items():
+        print(f"{name:>9}: accuracy {model_report['accuracy']:.4f} "
+              f"(fit {model_report['fit_seconds']}s)")
+
+    print("\nAll models saved successfully.")
@@ -0,0 +1,305 @@
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from django.test import SimpleTestCase
+from sklearn.metrics import confusion_matrix
+from sklearn.preprocessing import StandardScaler
+
+from ml_models.cache import PredictionCache
+from ml_models.ensemble import (
+    NOT_AVAILABLE, REASON_CONSISTENCY, REASON_PRIMARY, REASON_STRESS,
+    predict_persona, predict_personas, prediction_cache, vote,
+)
+from ml_models.features import (
+    FEATURES, behaviour_labels, build_features, dataset_features, frame_features, health_score, scale_features,
+)
+from ml_models.manager import registry, run_models
+from ml_models.svm.train import load_training_data, sequence_lengths
+from ml_models.pool import ModelPool
+
+NA = NOT_AVAILABLE
+
+# (income, expenses, fixed) rows for the override rules
+NEUTRAL = (100000, 60000, 15000)     # savings rate 0.25, EMI ratio 0.15
+STRESSED = (100000, 80000, 15000)    # savings rate 0.05
+IN_DEBT = (100000, 20000, 50000)     # EMI ratio 0.5
+CONSISTENT = (100000, 45000, 5000)   # savings rate 0.5, EMI ratio 0.05, expense ratio 0.45
+
+MAJORITY = "Selected based on majority agreement between {}."
+
+
+def rows(*profiles):
+    return build_features(*zip(*profiles))
+
+
+def votes(svm, hmm, crf, profile=NEUTRAL):
+    final, reasons = vote(np.array([svm]), np.array([hmm]), np.array([crf]), rows(profile))
+    return int(final[0]), reasons[0]
+
+
+class FeatureTests(SimpleTestCase):
+    def test_build_features(self):
+        X = rows(NEUTRAL, STRESSED, IN_DEBT)
+
+        self.assertEqual(X.shape, (3, len(FEATURES)))
+        np.testing.assert_allclose(X[0], [100000, 60000, 15000, 0.15, 0.6, 0, 1, 1, 25000, 0.25])
+        # Low saver, moderate spender / high EMI burden
+        np.testing.assert_array_equal(X[1:, 5:8], [[1, 1, 1], [0, 0, 0]])
+
+    def test_explicit_savings_set_the_rate(self):
+        X = build_features([100000], [60000], [15000], savings=[5000])
+
+        self.assertEqual((X[0, -2], X[0, -1], X[0, 5]), (25000, 0.05, 1))
+
+    def test_frame_and_dataset_features_match(self):
+        df = pd.DataFrame([NEUTRAL, STRESSED, IN_DEBT], columns=["income", "expenses", "fixed"])
+        X = frame_features(df)
+        np.testing.assert_array_equal(X, rows(NEUTRAL, STRESSED, IN_DEBT))
+
+        dataset = pd.DataFrame(X, columns=FEATURES)
+        savings, spending, emi = behaviour_labels(X)
+        dataset["savings_behaviour"], dataset["spending_behaviour"], dataset["emi_status"] = savings, spending, emi
+        np.testing.assert_array_equal(dataset_features(dataset), X)
+
+    def test_scale_features_matches_the_scaler(self):
+        X = rows(NEUTRAL, STRESSED, IN_DEBT, CONSISTENT)
+        scaler = StandardScaler().fit(X)
+
+        np.testing.assert_allclose(scale_features(X, scaler), scaler.transform(X))
+        np.testing.assert_array_equal(X, rows(NEUTRAL, STRESSED, IN_DEBT, CONSISTENT))
+
+    def test_health_score(self):
+        X = rows(NEUTRAL, (100000, 150000, 60000))
+
+        # 14 + 21.25 + 10, to one decimal; the overspent row is clipped at 0
+        self.assertEqual(health_score(X).tolist(), [45.2, 0.0])
+
+
+class VoteTests(SimpleTestCase):
+    def test_all_three_agree(self):
+        self.assertEqual(votes(1, 1, 1, STRESSED), (1, MAJORITY.format("SVM and CRF and HMM")))
+
+    def test_each_pairwise_majority(self):
+        self.assertEqual(votes(0, 2, 0), (0, MAJORITY.format("SVM and CRF")))
+        self.assertEqual(votes(0, 0, 2), (0, MAJORITY.format("SVM and HMM")))
+        self.assertEqual(votes(0, 2, 2), (2, MAJORITY.format("CRF and HMM")))
+
+    def test_a_majority_beats_the_overrides(self):
+        self.assertEqual(votes(0, 0, 2, CONSISTENT), (0, MAJORITY.format("SVM and HMM")))
+        self.assertEqual(votes(1, 2, 1, STRESSED), (1, MAJORITY.format("SVM and CRF")))
+
+    def test_consistency_override(self):
+        self.assertEqual(votes(0, 2, 1, CONSISTENT), (1, REASON_CONSISTENCY))
+
+    def test_stress_override(self):
+        self.assertEqual(votes(0, 1, 2, STRESSED), (2, REASON_STRESS))
+        self.assertEqual(votes(0, 1, 2, IN_DEBT), (2, REASON_STRESS))
+
+    def test_no_majority_or_override_keeps_the_svm(self):
+        self.assertEqual(votes(0, 1, 2), (0, REASON_PRIMARY))
+
+    def test_rows_are_voted_independently(self):
+        final, reasons = vote(
+            np.array([1, 0, 0, 0]), np.array([1, 2, 1, 1]), np.array([1, 1, 2, 2]),
+            rows(NEUTRAL, CONSISTENT, STRESSED, NEUTRAL),
+        )
+        self.assertEqual(final.tolist(), [1, 1, 2, 0])
+        self.assertEqual(
+            reasons,
+            [MAJORITY.format("SVM and CRF and HMM"), REASON_CONSISTENCY, REASON_STRESS, REASON_PRIMARY],
+        )
+
+
+class VoteTimeoutTests(SimpleTestCase):
+    def test_both_timed_out_falls_back_to_the_svm(self):
+        self.assertEqual(votes(0, NA, NA), (0, REASON_PRIMARY))
+        # No override either: there is no disagreement to settle
+        self.assertEqual(votes(1, NA, NA, STRESSED), (1, REASON_PRIMARY))
+
+    def test_one_timed_out_votes_with_the_other_two(self):
+        self.assertEqual(votes(2, NA, 2), (2, MAJORITY.format("SVM and CRF")))
+        self.assertEqual(votes(2, 2, NA), (2, MAJORITY.format("SVM and HMM")))
+
+    def test_two_timeouts_never_agree_with_each_other(self):
+        self.assertEqual(votes(1, NA, NA, CONSISTENT), (1, REASON_PRIMARY))
+
+    def test_one_timed_out_and_a_disagreement_uses_the_overrides(self):
+        self.assertEqual(votes(0, NA, 1, STRESSED), (2, REASON_STRESS))
+        self.assertEqual(votes(0, 1, NA), (0, REASON_PRIMARY))
+
+
+class ModelPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.pool = ModelPool(max_workers=1, timeout=0.2)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_a_slow_job_misses_the_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        results = self.pool.run({"svm": lambda: 0, "hmm": lambda: release.wait(5)})
+        self.assertEqual(results, {"svm": 0})
+        self.assertEqual(self.pool.stats()["models"]["hmm"]["timeouts"], 1)
+
+    def test_time_spent_queued_does_not_count(self):
+        # One worker: the HMM waits for the SVM, finishing after 0.3 s
+        results = self.pool.run({"svm": lambda: time.sleep(0.15) or 0, "hmm": lambda: time.sleep(0.15) or 1})
+        self.assertEqual(results, {"svm": 0, "hmm": 1})
+
+    def test_a_job_that_never_starts_is_cancelled(self):
+        ran = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+        results = self.pool.run({"svm": lambda: release.wait(5), "hmm": ran.set})
+        self.assertEqual(results, {})
+        release.set()
+        self.pool.shutdown()
+        self.assertFalse(ran.is_set())
+
+    def test_a_timed_out_model_is_not_available(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_hmm(model, X):
+            release.wait(5)
+
+        with mock.patch("ml_models.ensemble.model_pool", ModelPool(max_workers=3, timeout=0.2)) as pool, \
+                mock.patch("ml_models.ensemble.predict_rows", slow_hmm):
+            self.addCleanup(pool.shutdown)
+            result = predict_personas(rows(NEUTRAL, STRESSED))
+
+        self.assertEqual(result["hmm"].tolist(), [NA, NA])
+        self.assertNotIn(NA, result["crf"].tolist())
+        self.assertEqual(len(result["final"]), 2)
+
+    def test_serial_pool_runs_every_job(self):
+        pool = ModelPool(max_workers=0, timeout=0)
+        self.assertEqual(pool.run({"svm": lambda: 1, "hmm": lambda: 2}), {"svm": 1, "hmm": 2})
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = PredictionCache(maxsize=2, ttl=60, name="test")
+
+    def get(self, key, value=None, version=1, **kwargs):
+        return self.cache.get_or_compute(version, key, lambda: value if value is not None else key, **kwargs)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for key in ("a", "b", "a", "c"):
+            self.get(key)
+        self.assertEqual(self.get("a", "new"), "a")
+        self.assertEqual(self.get("b", "new"), "new")
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+    def test_entries_expire_after_the_ttl(self):
+        with mock.patch("ml_models.cache.time.monotonic", return_value=1000.0):
+            self.get("a")
+        with mock.patch("ml_models.cache.time.monotonic", return_value=1059.0):
+            self.assertEqual(self.get("a", "new"), "a")
+        with mock.patch("ml_models.cache.time.monotonic", return_value=1061.0):
+            self.assertEqual(self.get("a", "new"), "new")
+
+    def test_a_new_version_drops_every_entry(self):
+        self.get("a")
+        self.assertEqual(self.get("a", "new", version=2), "new")
+
+    def test_cacheable_can_veto_storing(self):
+        self.assertEqual(self.get("a", cacheable=lambda value: False), "a")
+        self.assertEqual(self.get("a", "new"), "new")
+
+    def test_concurrent_misses_compute_once(self):
+        calls, release = [], threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_compute(1, "a", compute)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        while self.cache.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["value"] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_errors_are_not_cached(self):
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_compute(1, "a", fail)
+        self.assertEqual(self.get("a"), "a")
+
+
+class PredictPersonaTests(SimpleTestCase):
+    def setUp(self):
+        prediction_cache.clear()
+        self.addCleanup(prediction_cache.clear)
+
+    def test_income_below_the_quantum_is_predicted(self):
+        result = predict_persona(4, 1, 0)
+        self.assertIn(result["final"], (0, 1, 2))
+
+    def test_svm_only_votes_are_cached_apart(self):
+        full = predict_persona(*NEUTRAL)
+        hits = prediction_cache.stats()["hits"]
+
+        with mock.patch("ml_models.ensemble.predict_rows") as hmm_rows:
+            svm_only = predict_persona(*NEUTRAL, sequence_models=False)
+            self.assertEqual(predict_persona(*NEUTRAL, sequence_models=False), svm_only)
+
+        hmm_rows.assert_not_called()
+        self.assertEqual(svm_only["svm"], full["svm"])
+        self.assertEqual((svm_only["hmm"], svm_only["crf"]), (NA, NA))
+        self.assertEqual(prediction_cache.stats()["hits"], hits + 1)
+
+
+class RunModelsTests(SimpleTestCase):
+    def test_every_model_runs_on_a_history(self):
+        history = rows(CONSISTENT, NEUTRAL, STRESSED)
+        scaler, svm_model = registry.get_many("scaler", "svm")
+
+        results = run_models(history)
+
+        self.assertEqual(set(results), {"health", "trend", "context"})
+        # The SVM scores the newest submission
+        self.assertEqual(results["health"], int(svm_model.predict(scale_features(history[-1:], scaler))[0]))
+        self.assertNotEqual(results["health"], int(svm_model.predict(scale_features(history[:1], scaler))[0]))
+        self.assertEqual(len(results["context"]), 3)
+
+
+class TrainingSequenceTests(SimpleTestCase):
+    def test_rows_form_one_sequence_per_user(self):
+        X, _, _, groups = load_training_data()
+        lengths = sequence_lengths(groups)
+
+        self.assertEqual(lengths.sum(), len(X))
+        self.assertEqual(len(lengths), len(set(groups)))
+
+    def test_shipped_crf_learnt_transitions(self):
+        self.assertTrue(registry.get("crf").transition_features_)
+
+    def test_shipped_hmm_states_are_aligned_to_personas(self):
+        X, y, _, groups = load_training_data()
+        scaler, hmm_model = registry.get_many("scaler", "hmm")
+        states = hmm_model.predict(scale_features(X, scaler), sequence_lengths(groups))
+
+        # No relabelling of the states matches the personas better
+        overlap = confusion_matrix(y, states, labels=range(hmm_model.n_components))
+        _, order = linear_sum_assignment(-overlap)
+        self.assertEqual(order.tolist(), list(range(hmm_model.n_components)))
+        self.assertGreater(hmm_model.transmat_.diagonal().min(), 0.5)
+
@@ -1,23 +1,10 @@
-import os
-import joblib
-from django.conf import settings
 from django.shortcuts import render
 from .models import UserInput, Prediction
 import json
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
-
-PERSONA_MODEL_PATH = os.path.join(
-    settings.BASE_DIR, "ml_models", "svm_model.pkl"
-)
-
-SCALER_PATH = os.path.join(
-    settings.BASE_DIR, "ml_models", "scaler.pkl"
-)
-
-persona_model = joblib.load(PERSONA_MODEL_PATH)
-scaler = joblib.load(SCALER_PATH)
+from ml_models.features import transform
+from ml_models.manager import registry
 
 PERSONA_MAP = {
     0: "Financially Moderate",
@@ -25,23 +12,6 @@ PERSONA_MAP = {
     2: "Financially Stressed"
 }
 
-# SPENDING_MAP = {
-#     0: "High Spender",
-#     1: "Moderate Spender",
-# }
-
-# SAVINGS_MAP = {
-#     0: "Low Saver",
-#     1: "Good Saver",
-# }
-
-# EMI_MAP = {
-#     0: "Normal EMI",
-#     1: "High EMI Burden",
-# }
-
-
-
 def predict(request):
     if request.method == "POST":
         # 1️⃣ Read inputs
@@ -64,34 +34,11 @@ def predict(request):
             savings=savings
         )
 
-        # Feature Engineering (MUST MATCH TRAINING)
-
-        emi_ratio = total_emi / monthly_income
-        expense_ratio = total_expense / monthly_income
-        net_balance = monthly_income - total_expense - total_emi
-        savings_rate = savings / monthly_income
-
-        # Behaviour encoding (match dataset logic exactly)
-        savings_behaviour = 1 if savings_rate >= 0.2 else 0
-        emi_status = 1 if emi_ratio >= 0.4 else 0
-        spending_behaviour = 1 if expense_ratio < 0.6 else 0
-
-        # Build feature vector in SAME ORDER as training
-        X_raw = [[
-            monthly_income,
-            total_expense,
-            total_emi,
-            emi_ratio,
-            expense_ratio,
-            savings_behaviour,
-            emi_status,
-            spending_behaviour,
-            net_balance,
-            savings_rate
-        ]]
-
-
-        X = scaler.transform(X_raw)
+        # Feature Engineering (shared with training, see ml_models.features)
+        scaler, persona_model = registry.get_many("scaler", "svm")
+        _, X = transform(
+            [monthly_income], [total_expense], [total_emi], scaler, savings=[savings]
+        )
 
         # 5Predict class
         persona_label = int(persona_model.predict(X)[0])